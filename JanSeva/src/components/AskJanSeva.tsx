@@ -147,8 +147,12 @@ export const AskJanSeva: React.FC = () => {
   // };
   const API_BASE_URL = "http://localhost:8000"; // change after deployment
 
-  async function askJanSevaBackend(message: string, language: string) {
-    const response = await fetch(`${API_BASE_URL}/chat`, {
+  async function askJanSevaBackend(
+    message: string,
+    language: string,
+    onToken: (text: string) => void,
+  ) {
+    const response = await fetch(`${API_BASE_URL}/chat/stream`, {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
@@ -160,11 +164,42 @@ export const AskJanSeva: React.FC = () => {
       }),
     });
 
-    if (!response.ok) {
+    if (!response.ok || !response.body) {
       throw new Error("Failed to get response from JanSeva backend");
     }
 
-    return response.json();
+    // Parse Server-Sent Events: "token" frames carry text, "done" carries the final reply
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary = buffer.indexOf("\n\n");
+      while (boundary !== -1) {
+        const frame = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf("\n\n");
+
+        const event = frame.match(/^event: (.*)$/m)?.[1];
+        const data = frame.match(/^data: (.*)$/m)?.[1];
+        if (!event || !data) continue;
+
+        const payload = JSON.parse(data);
+        if (event === "token") {
+          onToken(payload.text);
+        } else if (event === "done") {
+          return payload;
+        } else if (event === "error") {
+          throw new Error(payload.detail);
+        }
+      }
+    }
+
+    throw new Error("JanSeva backend closed the stream early");
   }
 
   const handleSend = async () => {
@@ -176,25 +211,36 @@ export const AskJanSeva: React.FC = () => {
       isUser: true,
       timestamp: new Date(),
     };
+    const botMessageId = (Date.now() + 1).toString();
 
     setMessages((prev) => [...prev, userMessage]);
     setInputText("");
     setIsTyping(true);
 
-    try {
-      const data = await askJanSevaBackend(inputText, language);
-
-      const botMessage: Message = {
-        id: (Date.now() + 1).toString(),
-        text: data.reply, // 🔥 FROM BACKEND
-        isUser: false,
-        timestamp: new Date(),
-      };
+    const updateBotMessage = (text: string) => {
+      setMessages((prev) => {
+        if (!prev.some((m) => m.id === botMessageId)) {
+          return [
+            ...prev,
+            { id: botMessageId, text, isUser: false, timestamp: new Date() },
+          ];
+        }
+        return prev.map((m) => (m.id === botMessageId ? { ...m, text } : m));
+      });
+    };
 
-      setMessages((prev) => [...prev, botMessage]);
+    try {
+      let streamed = "";
+      const data = await askJanSevaBackend(inputText, language, (token) => {
+        streamed += token;
+        setIsTyping(false);
+        updateBotMessage(streamed);
+      });
+
+      updateBotMessage(data.reply); // 🔥 FROM BACKEND
     } catch (error) {
       setMessages((prev) => [
-        ...prev,
+        ...prev.filter((m) => m.id !== botMessageId),
         {
           id: (Date.now() + 2).toString(),
           text: t(translations.outOfScope),
@@ -0,0 +1,211 @@
+import unicodedata
+import re
+from collections import OrderedDict
+from time import time
+from typing import Optional
+
+
+# ---------------- NORMALIZATION ----------------
+_PUNCT_RE = re.compile(r"[?!.,;:।॥\"'()\[\]{}]+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_question(text: str) -> str:
+    """Fold case, punctuation and whitespace so trivially different questions share a key"""
+    text = unicodedata.normalize("NFC", text).casefold()
+    text = _PUNCT_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+# Words whose difference flips the answer even when the rest of the question is identical
+_NUMBER_RE = re.compile(r"[0-9]+|[\u0966-\u096F]+")
+NUMBER_WORDS = {
+    "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "एक", "दो", "दोन", "तीन", "चार", "पांच", "पाँच", "पाच", "छह", "सहा",
+    "ek", "teen", "tin", "paanch", "panch", "pach",
+}
+NEGATIONS = {
+    "not", "no", "never", "without", "cannot", "nor", "neither", "except",
+    "isn", "aren", "wasn", "don", "doesn", "didn", "t",  # contractions split by normalization
+    "नहीं", "नही", "न", "ना", "मत", "बिना", "बंद", "नाही", "नका", "नको", "विना",
+    "nahi", "nahin", "nai", "na", "mat", "bina", "band", "naahi", "naka", "nako", "vina",
+}
+
+
+def meaning_guard(normalized: str) -> tuple:
+    """Numbers and negations in a normalized question; near-duplicates must agree on them exactly"""
+    words = normalized.split()
+    numbers = tuple(w for w in words if _NUMBER_RE.fullmatch(w) or w in NUMBER_WORDS)
+    return numbers, frozenset(w for w in words if w in NEGATIONS)
+
+
+def char_ngrams(text: str, n: int = 3) -> frozenset:
+    padded = f" {text} "
+    if len(padded) <= n:
+        return frozenset([padded])
+    return frozenset(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+
+# ---------------- CACHE ----------------
+class _Entry:
+    __slots__ = ("reply", "created", "ngrams", "guard", "size")
+
+    def __init__(self, reply: str, created: float, ngrams: frozenset, guard: tuple):
+        self.reply = reply
+        self.created = created
+        self.ngrams = ngrams
+        self.guard = guard
+        self.size = len(reply.encode("utf-8"))
+
+
+class AnswerCache:
+    """LRU + TTL cache of LLM replies keyed on normalized (question, lang).
+
+    Exact lookups are O(1). When similarity_threshold > 0 (off by default),
+    misses fall back to a character-trigram Jaccard search over an inverted
+    index restricted to the same language, so near-duplicate phrasings reuse a
+    cached answer. A near-duplicate is only reused when its numbers and
+    negations match exactly: "for 2 girls" never answers "for 3 girls", nor
+    "with a ration card" "without a ration card".
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 5000,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl: float = 3600,
+        similarity_threshold: float = 0.0,
+        version: str = ""
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.version = version
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._index: dict = {}  # (lang, ngram) -> set of keys
+        self.total_bytes = 0
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, text: str, lang: str) -> Optional[str]:
+        key = (normalize_question(text), lang)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if self._expired(entry):
+                self._remove(key)
+                self.expirations += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.reply
+
+        if self.similarity_threshold > 0:
+            similar_key = self._find_similar(key[0], lang)
+            if similar_key is not None:
+                self._entries.move_to_end(similar_key)
+                self.similar_hits += 1
+                return self._entries[similar_key].reply
+
+        self.misses += 1
+        return None
+
+    def set(self, text: str, lang: str, reply: str):
+        if not reply:
+            return
+        key = (normalize_question(text), lang)
+        if key in self._entries:
+            self._remove(key)
+
+        entry = _Entry(reply, time(), char_ngrams(key[0]), meaning_guard(key[0]))
+        if entry.size > self.max_bytes:
+            return
+
+        self._entries[key] = entry
+        self.total_bytes += entry.size
+        if self.similarity_threshold > 0:
+            for gram in entry.ngrams:
+                self._index.setdefault((lang, gram), set()).add(key)
+
+        while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, version: Optional[str] = None):
+        """Drop every cached answer, e.g. after scheme data changes"""
+        self._entries.clear()
+        self._index.clear()
+        self.total_bytes = 0
+        self.invalidations += 1
+        if version is not None:
+            self.version = version
+
+    def ensure_version(self, version: str):
+        if version != self.version:
+            self.invalidate(version)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.similar_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "similarity_threshold": self.similarity_threshold,
+            "version": self.version,
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.similar_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
+
+    def _expired(self, entry: _Entry) -> bool:
+        return self.ttl > 0 and time() - entry.created > self.ttl
+
+    def _remove(self, key: tuple):
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.size
+        lang = key[1]
+        for gram in entry.ngrams:
+            keys = self._index.get((lang, gram))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[(lang, gram)]
+
+    def _find_similar(self, normalized: str, lang: str) -> Optional[tuple]:
+        query = char_ngrams(normalized)
+        guard = meaning_guard(normalized)
+        overlaps: dict = {}
+        for gram in query:
+            for key in self._index.get((lang, gram), ()):
+                overlaps[key] = overlaps.get(key, 0) + 1
+
+        best_key, best_score = None, 0.0
+        for key, overlap in overlaps.items():
+            entry = self._entries[key]
+            if entry.guard != guard:
+                continue
+            score = overlap / (len(query) + len(entry.ngrams) - overlap)
+            if score > best_score:
+                best_key, best_score = key, score
+
+        if best_key is None or best_score < self.similarity_threshold:
+            return None
+        if self._expired(self._entries[best_key]):
+            self._remove(best_key)
+            self.expirations += 1
+            return None
+        return best_key
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import shutil
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TranscodeError(Exception):
+    """The encoder is missing, failed or timed out; callers fall back to the original MP3"""
+
+
+class AudioVariant:
+    """One compact encoding of a reply, e.g. Opus in Ogg at 16 kbps"""
+
+    __slots__ = ("codec", "bitrate", "media_type", "extension", "ffmpeg_args")
+
+    def __init__(self, codec: str, bitrate: int, media_type: str, extension: str, ffmpeg_args: list):
+        self.codec = codec
+        self.bitrate = bitrate  # kbps
+        self.media_type = media_type
+        self.extension = extension
+        self.ffmpeg_args = ffmpeg_args
+
+    @property
+    def tag(self) -> str:
+        return f"{self.codec}-{self.bitrate}"
+
+
+def _opus(bitrate: int) -> AudioVariant:
+    # voip tuning keeps speech intelligible at the lowest bitrates
+    return AudioVariant(
+        "opus", bitrate, "audio/ogg", "ogg",
+        ["-c:a", "libopus", "-b:a", f"{bitrate}k", "-application", "voip", "-f", "ogg"]
+    )
+
+
+def _mp3(bitrate: int) -> AudioVariant:
+    # For players without Opus support; 16 kHz is plenty for speech at these rates
+    return AudioVariant(
+        "mp3", bitrate, "audio/mpeg", "mp3",
+        ["-c:a", "libmp3lame", "-b:a", f"{bitrate}k", "-ar", "16000", "-f", "mp3"]
+    )
+
+
+VARIANTS = {v.tag: v for v in [_opus(12), _opus(16), _opus(24), _opus(32), _mp3(16), _mp3(24)]}
+BITRATES = {codec: sorted(v.bitrate for v in VARIANTS.values() if v.codec == codec) for codec in ("opus", "mp3")}
+
+# Accept media types that select the Opus variants
+OPUS_MEDIA_TYPES = ("audio/ogg", "audio/opus", "audio/ogg; codecs=opus")
+
+
+def variant_key(audio_id: str, variant: AudioVariant) -> str:
+    """Cache key of an encoded variant, stored next to the original audio_id"""
+    return f"{audio_id}.{variant.tag}"
+
+
+def accepted_types(accept: Optional[str]) -> dict:
+    """Media type -> q value from an Accept header, ignoring other parameters"""
+    types = {}
+    for part in (accept or "").split(","):
+        fields = [f.strip() for f in part.split(";")]
+        if not fields[0]:
+            continue
+        q = 1.0
+        params = []
+        for field in fields[1:]:
+            name, _, value = field.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+            else:
+                params.append(field.replace(" ", "").lower())
+        media_type = "; ".join([fields[0].lower()] + params)
+        types[media_type] = max(q, types.get(media_type, 0.0))
+    return types
+
+
+def choose_variant(
+    accept: Optional[str],
+    codec: Optional[str] = None,
+    bitrate: Optional[int] = None,
+    save_data: bool = False,
+    default_bitrate: int = 24
+) -> Optional[AudioVariant]:
+    """Pick the smallest encoding the client asked for, or None to serve the original MP3.
+
+    An explicit `codec` ("opus", "mp3" or "original") wins over the Accept
+    header; otherwise Opus is chosen whenever Accept lists audio/ogg or
+    audio/opus. `bitrate` is rounded down to the nearest offered rate, and a
+    Save-Data client gets the lowest rate unless it asked for one.
+    Raises ValueError for an unknown codec.
+    """
+    if codec is not None:
+        codec = codec.lower()
+        if codec in ("original", "default"):
+            return None
+        if codec not in BITRATES:
+            raise ValueError(f"unsupported audio format '{codec}'")
+    else:
+        types = accepted_types(accept)
+        if not any(types.get(t, 0.0) > 0 for t in OPUS_MEDIA_TYPES):
+            return None
+        codec = "opus"
+
+    rates = BITRATES[codec]
+    if bitrate is None:
+        bitrate = rates[0] if save_data else default_bitrate
+    chosen = max((r for r in rates if r <= bitrate), default=rates[0])
+    return VARIANTS[f"{codec}-{chosen}"]
+
+
+# ---------------- TRANSCODER ----------------
+class Transcoder:
+    """Re-encodes MP3 replies with an ffmpeg subprocess.
+
+    ffmpeg is an optional system binary: without it `available` is False and
+    every reply is served as the original MP3. At most `max_concurrency`
+    encodes run at once so a burst of first requests cannot starve the host.
+    """
+
+    def __init__(self, ffmpeg: str = "ffmpeg", max_concurrency: int = 2, timeout: float = 30.0):
+        self.binary = shutil.which(ffmpeg) if ffmpeg else None
+        self.timeout = timeout
+        self._limit = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.encodes = 0
+        self.failures = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @property
+    def available(self) -> bool:
+        return self.binary is not None
+
+    async def encode(self, data: bytes, variant: AudioVariant) -> bytes:
+        if not self.available:
+            raise TranscodeError("ffmpeg is not installed")
+        async with self._limit:
+            try:
+                output = await asyncio.wait_for(self._run(data, variant), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self.failures += 1
+                raise TranscodeError(f"{variant.tag} encode timed out after {self.timeout}s")
+            except TranscodeError:
+                self.failures += 1
+                raise
+        self.encodes += 1
+        self.bytes_in += len(data)
+        self.bytes_out += len(output)
+        return output
+
+    async def _run(self, data: bytes, variant: AudioVariant) -> bytes:
+        process = await asyncio.create_subprocess_exec(
+            self.binary, "-hide_banner", "-loglevel", "error", "-i", "pipe:0", "-vn", "-ac", "1",
+            *variant.ffmpeg_args, "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            output, errors = await process.communicate(data)
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+        if process.returncode != 0 or not output:
+            raise TranscodeError(
+                f"ffmpeg exited with {process.returncode}: {errors.decode(errors='replace').strip()[:200]}"
+            )
+        return output
+
+    def stats(self) -> dict:
+        return {
+            "available": self.available,
+            "max_concurrency": self.max_concurrency,
+            "encodes": self.encodes,
+            "failures": self.failures,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "compression_ratio": self.bytes_out / self.bytes_in if self.bytes_in else 0.0
+        }
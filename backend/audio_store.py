@@ -0,0 +1,237 @@
+import asyncio
+import heapq
+import logging
+import os
+from collections import OrderedDict
+from time import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- BLOBS ----------------
+class AudioBlob:
+    __slots__ = ("audio_id", "data", "path", "size", "media_type", "expires_at")
+
+    def __init__(self, audio_id: str, data: Optional[bytes], path: Optional[str], size: int,
+                 media_type: str, expires_at: float):
+        self.audio_id = audio_id
+        self.data = data
+        self.path = path
+        self.size = size
+        self.media_type = media_type
+        self.expires_at = expires_at
+
+    @property
+    def on_disk(self) -> bool:
+        return self.data is None
+
+
+# ---------------- STORE ----------------
+class AudioStore:
+    """TTS audio held in memory under a byte budget, optionally spilling to disk.
+
+    Expiry is driven by a min-heap on expires_at, so each put/get only pops the
+    entries that actually expired instead of scanning the whole store. When the
+    memory tier exceeds max_bytes the least recently used blobs move to
+    spill_dir (served later with sendfile) or are dropped if no spill dir is set.
+    Inside an event loop the spill write runs in a thread; the blob keeps its
+    bytes, and is served from memory, until the file is written.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 300,
+        spill_dir: Optional[str] = None,
+        max_disk_bytes: int = 512 * 1024 * 1024
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.spill_dir = spill_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, AudioBlob]" = OrderedDict()
+        self._disk: "OrderedDict[str, AudioBlob]" = OrderedDict()
+        self._expiry: list = []  # heap of (expires_at, audio_id)
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.spills = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._spill_seq = 0
+        self._writes = set()  # spill writes still in flight
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._memory) + len(self._disk)
+
+    def __contains__(self, audio_id: str) -> bool:
+        return self.get(audio_id) is not None
+
+    def put(self, audio_id: str, data: bytes, media_type: str = "audio/mpeg",
+            ttl: Optional[float] = None) -> AudioBlob:
+        self._expire()
+        self.discard(audio_id)
+
+        expires_at = time() + (self.ttl if ttl is None else ttl)
+        blob = AudioBlob(audio_id, data, None, len(data), media_type, expires_at)
+        self._memory[audio_id] = blob
+        self.memory_bytes += blob.size
+        heapq.heappush(self._expiry, (expires_at, audio_id))
+
+        while self.memory_bytes > self.max_bytes and len(self._memory) > 1:
+            _, oldest = self._memory.popitem(last=False)
+            self.memory_bytes -= oldest.size
+            self._spill(oldest)
+        return blob
+
+    def get(self, audio_id: str) -> Optional[AudioBlob]:
+        self._expire()
+        blob = self._memory.get(audio_id)
+        if blob is not None:
+            self._memory.move_to_end(audio_id)
+            return blob
+        return self._disk.get(audio_id)
+
+    def discard(self, audio_id: str):
+        blob = self._memory.pop(audio_id, None)
+        if blob is not None:
+            self.memory_bytes -= blob.size
+            return
+        blob = self._disk.pop(audio_id, None)
+        if blob is not None:
+            self.disk_bytes -= blob.size
+            self._unlink(blob)
+
+    def clear(self):
+        for blob in self._disk.values():
+            self._unlink(blob)
+        self._memory.clear()
+        self._disk.clear()
+        self._expiry.clear()
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self),
+            "memory_entries": len(self._memory),
+            "memory_bytes": self.memory_bytes,
+            "max_bytes": self.max_bytes,
+            "disk_entries": len(self._disk),
+            "disk_bytes": self.disk_bytes,
+            "max_disk_bytes": self.max_disk_bytes,
+            "spill_dir": self.spill_dir,
+            "ttl_seconds": self.ttl,
+            "spills": self.spills,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+    def _spill(self, blob: AudioBlob):
+        if not self.spill_dir:
+            self.evictions += 1
+            return
+        # Unique per spill, so a late write for a replaced blob never touches its successor's file
+        self._spill_seq += 1
+        path = os.path.join(self.spill_dir, f"{blob.audio_id}-{self._spill_seq}.audio")
+
+        # Counted against the disk budget at once; the data stays on the blob until it is written
+        self._disk[blob.audio_id] = blob
+        self.disk_bytes += blob.size
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None:
+            self._spilled(blob, path, _write_file(path, blob.data))
+        else:
+            task = loop.create_task(asyncio.to_thread(_write_file, path, blob.data))
+            self._writes.add(task)
+            task.add_done_callback(lambda t: self._write_done(t, blob, path))
+
+        while self.disk_bytes > self.max_disk_bytes and self._disk:
+            _, oldest = self._disk.popitem(last=False)
+            self.disk_bytes -= oldest.size
+            self._unlink(oldest)
+            self.evictions += 1
+
+    def _write_done(self, task: asyncio.Task, blob: AudioBlob, path: str):
+        self._writes.discard(task)
+        error = OSError("spill write cancelled") if task.cancelled() else task.result()
+        self._spilled(blob, path, error)
+
+    def _spilled(self, blob: AudioBlob, path: str, error: Optional[OSError]):
+        if self._disk.get(blob.audio_id) is not blob:
+            # Replaced, expired or evicted while the write was in flight
+            if error is None:
+                self._unlink_path(path)
+            return
+        if error is not None:
+            logger.error(f"Audio spill failed for {blob.audio_id}: {error}")
+            del self._disk[blob.audio_id]
+            self.disk_bytes -= blob.size
+            self.evictions += 1
+            return
+        blob.data = None
+        blob.path = path
+        self.spills += 1
+
+    def _unlink(self, blob: AudioBlob):
+        if blob.path:
+            self._unlink_path(blob.path)
+
+    @staticmethod
+    def _unlink_path(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _expire(self):
+        now = time()
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, audio_id = heapq.heappop(self._expiry)
+            blob = self._memory.get(audio_id) or self._disk.get(audio_id)
+            # Skip heap entries left behind by a blob that was replaced or already removed
+            if blob is None or blob.expires_at != expires_at:
+                continue
+            self.discard(audio_id)
+            self.expirations += 1
+
+
+def _write_file(path: str, data: bytes) -> Optional[OSError]:
+    try:
+        with open(path, "wb") as f:
+            f.write(data)
+    except OSError as e:
+        return e
+    return None
+
+
+# ---------------- RANGE REQUESTS ----------------
+def parse_range(range_header: Optional[str], size: int) -> Optional[tuple]:
+    """Parse a single 'bytes=start-end' range; returns (start, end) inclusive or None for full content.
+
+    Raises ValueError for an unsatisfiable range.
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].split(",")[0].strip()
+    start_s, _, end_s = spec.partition("-")
+    try:
+        if start_s == "":
+            length = int(end_s)
+            if length <= 0:
+                raise ValueError("empty suffix range")
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(start_s)
+            end = int(end_s) if end_s else size - 1
+    except ValueError:
+        raise ValueError(f"invalid range {range_header!r}")
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        raise ValueError(f"unsatisfiable range {range_header!r}")
+    return start, end
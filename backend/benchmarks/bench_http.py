@@ -0,0 +1,166 @@
+"""Per-request overhead of the HTTP layer: JSON encoding, CORS and compression.
+
+Builds two minimal FastAPI apps serving the same payloads, one with the
+original stack (CORSMiddleware plus a Python OPTIONS middleware, stdlib JSON,
+no compression) and one with the current stack (precomputed CORS, orjson,
+negotiated gzip/brotli), and calls them in-process over ASGI so the numbers
+exclude the network and the server.
+
+    cd backend && python benchmarks/bench_http.py [--requests N]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Request, Response  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from fast_json import FastJSONResponse, to_json_bytes  # noqa: E402
+from http_middleware import CompressionMiddleware, OpenCORSMiddleware, ResponseCompressor  # noqa: E402
+
+HISTORY = {
+    "conversation_id": "3f6c1d2e-8a4b-4c55-9d1e-0b7a2f9e6c41",
+    "messages": [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": (
+                "महात्मा ज्योतिराव फुले जन आरोग्य योजनेसाठी पात्रता काय आहे? "
+                "• Eligibility: Families with a yellow or orange ration card. "
+                "• Benefit: Cashless treatment up to ₹5 lakh per family per year."
+            ),
+            "timestamp": 1760000000.0 + i
+        }
+        for i in range(20)
+    ],
+    "message_count": 20
+}
+
+STATS = {
+    section: {f"counter_{i}": i * 1.5 for i in range(12)}
+    for section in ("llm", "fast_path", "answer_cache", "audio", "tts_cache", "shared_state", "tts", "tokens")
+}
+
+CATALOG_BODY = to_json_bytes([
+    {"id": i, "name": f"Scheme {i}", "category": "health", "benefits": "Financial assistance " * 10}
+    for i in range(60)
+])
+CATALOG_ETAG = '"v1-0123456789ab"'
+
+
+def original_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    @app.middleware("http")
+    async def force_options_middleware(request: Request, call_next):
+        if request.method == "OPTIONS":
+            return Response(status_code=200, headers={
+                "Access-Control-Allow-Origin": "*",
+                "Access-Control-Allow-Methods": "*",
+                "Access-Control-Allow-Headers": "*",
+            })
+        return await call_next(request)
+
+    add_routes(app, JSONResponse)
+    return app
+
+
+def current_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(OpenCORSMiddleware, allow_credentials=True)
+    app.add_middleware(CompressionMiddleware, compressor=ResponseCompressor())
+    add_routes(app, FastJSONResponse)
+    return app
+
+
+def add_routes(app: FastAPI, response_class):
+    @app.get("/history", response_class=response_class)
+    def history():
+        return HISTORY
+
+    @app.get("/stats", response_class=response_class)
+    def stats():
+        return STATS
+
+    @app.get("/health", response_class=response_class)
+    def health():
+        return {"status": "healthy", "service": "JanSeva Assistant", "timestamp": 1760000000.0}
+
+    @app.get("/schemes")
+    def schemes():
+        return Response(content=CATALOG_BODY, media_type="application/json", headers={"ETag": CATALOG_ETAG})
+
+
+async def call(app, method: str, path: str, headers: list) -> int:
+    """One in-process ASGI request; returns the number of body bytes sent"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": headers, "client": ("127.0.0.1", 1234), "server": ("127.0.0.1", 8000)
+    }
+    size = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return size
+
+
+SCENARIOS = [
+    ("preflight", "OPTIONS", "/history", [
+        (b"origin", b"http://localhost:8080"),
+        (b"access-control-request-method", b"GET"),
+    ]),
+    ("health", "GET", "/health", [(b"origin", b"http://localhost:8080")]),
+    ("stats", "GET", "/stats", [(b"origin", b"http://localhost:8080"), (b"accept-encoding", b"gzip, br")]),
+    ("history", "GET", "/history", [(b"origin", b"http://localhost:8080"), (b"accept-encoding", b"gzip, br")]),
+    ("schemes", "GET", "/schemes", [(b"origin", b"http://localhost:8080"), (b"accept-encoding", b"gzip, br")]),
+]
+
+
+async def measure(app, requests: int) -> dict:
+    results = {}
+    for name, method, path, headers in SCENARIOS:
+        for _ in range(50):
+            await call(app, method, path, headers)
+        started = perf_counter()
+        for _ in range(requests):
+            size = await call(app, method, path, headers)
+        elapsed = perf_counter() - started
+        results[name] = (elapsed / requests * 1e6, size)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    args = parser.parse_args()
+
+    before = asyncio.run(measure(original_app(), args.requests))
+    after = asyncio.run(measure(current_app(), args.requests))
+
+    print(f"{'scenario':<10} {'before us':>10} {'after us':>10} {'speedup':>8} {'before B':>9} {'after B':>8}")
+    for name, _, _, _ in SCENARIOS:
+        (t0, b0), (t1, b1) = before[name], after[name]
+        print(f"{name:<10} {t0:>10.1f} {t1:>10.1f} {t0 / t1:>7.2f}x {b0:>9} {b1:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Accuracy/throughput benchmark for language detection.
+
+Compares the single-pass detector in language.py against the original
+substring heuristics and, with --llm, the detect_chain LLM fallback.
+
+language_corpus.tsv is the corpus the lexicon was tuned on, so its accuracy
+is optimistic; language_heldout.tsv was never used for tuning and is scored
+separately. Uncached, the detector is faster than the legacy scan on ASCII
+text but slower on Devanagari, where the legacy code stops after four
+substring checks while the detector scores every token; repeated texts are
+served from the memo cache either way.
+
+    cd backend && python benchmarks/bench_language.py [--llm] [--repeat N]
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from language import analyze_language, fast_detect_language, is_romanized_indic, transliterate_if_roman  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "language_corpus.tsv")
+HELDOUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "language_heldout.tsv")
+
+
+def legacy_detect_language(text: str) -> str:
+    """The heuristic main.py used before the single-pass detector"""
+    if any('\u0900' <= ch <= '\u097F' for ch in text):
+        if any(word in text for word in ["आहे", "काय", "साठी", "मिळते"]):
+            return "mr"
+        return "hi"
+
+    text_l = text.lower()
+    if any(w in text_l for w in ["aahe", "kay", "sathi", "milte"]):
+        return "mr"
+    if any(w in text_l for w in ["kya", "kaise", "liye", "yojana"]):
+        return "hi"
+
+    return "en"
+
+
+def load_corpus(path: str = CORPUS) -> list:
+    samples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            label, text = line.rstrip("\n").split("\t", 1)
+            samples.append((label, text))
+    return samples
+
+
+def evaluate(name: str, detect, samples: list, repeat: int) -> dict:
+    correct = {}
+    total = {}
+    errors = []
+    for label, text in samples:
+        predicted = detect(text)
+        total[label] = total.get(label, 0) + 1
+        if predicted == label:
+            correct[label] = correct.get(label, 0) + 1
+        else:
+            errors.append((label, predicted, text))
+
+    start = perf_counter()
+    for _ in range(repeat):
+        for _, text in samples:
+            detect(text)
+    elapsed = perf_counter() - start
+
+    accuracy = sum(correct.values()) / len(samples)
+    per_lang = {lang: correct.get(lang, 0) / n for lang, n in sorted(total.items())}
+    throughput = repeat * len(samples) / elapsed if elapsed else float("inf")
+
+    by_script = []
+    for script, texts in (("ascii", [t for _, t in samples if t.isascii()]),
+                          ("non-ascii", [t for _, t in samples if not t.isascii()])):
+        if texts:
+            start = perf_counter()
+            for _ in range(repeat):
+                for text in texts:
+                    detect(text)
+            by_script.append(f"{script} {(perf_counter() - start) / (repeat * len(texts)) * 1e6:.1f}")
+
+    print(f"\n{name}")
+    print(f"  accuracy: {accuracy:.1%}  " + "  ".join(f"{k}={v:.0%}" for k, v in per_lang.items()))
+    print(f"  throughput: {throughput:,.0f} texts/s ({elapsed / (repeat * len(samples)) * 1e6:.1f} us/text; "
+          f"{', '.join(by_script)} us/text)")
+    for label, predicted, text in errors:
+        print(f"    miss: expected={label} got={predicted} | {text}")
+    return {"accuracy": accuracy, "throughput": throughput}
+
+
+def single_pass_detector(text: str) -> str:
+    # The detector itself, not its memo cache
+    return analyze_language.__wrapped__(text)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="timing passes over the corpus")
+    parser.add_argument("--llm", action="store_true", help="also evaluate detect_chain (needs GROQ_API_KEY)")
+    args = parser.parse_args()
+
+    samples = load_corpus()
+    print(f"corpus: {len(samples)} labelled texts")
+
+    evaluate("legacy heuristics", legacy_detect_language, samples, args.repeat)
+    evaluate("single-pass detector", single_pass_detector, samples, args.repeat)
+    evaluate("single-pass detector (memoized)", fast_detect_language, samples, args.repeat)
+
+    heldout = load_corpus(HELDOUT)
+    print(f"\nheld-out corpus: {len(heldout)} labelled texts, not used to tune the lexicon")
+    evaluate("legacy heuristics (held-out)", legacy_detect_language, heldout, args.repeat)
+    evaluate("single-pass detector (held-out)", single_pass_detector, heldout, args.repeat)
+
+    # Transliteration gating: romanized hi/mr should be converted, English should not
+    latin = [(label, text) for label, text in samples if not any('\u0900' <= ch <= '\u097F' for ch in text)]
+    indic_hits = sum(is_romanized_indic(text) for label, text in latin if label != "en")
+    indic_total = sum(1 for label, _ in latin if label != "en")
+    english_false = sum(is_romanized_indic(text) for label, text in latin if label == "en")
+    english_total = sum(1 for label, _ in latin if label == "en")
+    print(f"\ntransliteration gate: romanized hi/mr recognised {indic_hits}/{indic_total}, "
+          f"English wrongly transliterated {english_false}/{english_total}")
+
+    start = perf_counter()
+    for _ in range(args.repeat):
+        for _, text in samples:
+            transliterate_if_roman.__wrapped__(text)
+    cold = perf_counter() - start
+    start = perf_counter()
+    for _ in range(args.repeat):
+        for _, text in samples:
+            transliterate_if_roman(text)
+    warm = perf_counter() - start
+    print(f"transliteration: {cold / warm:.0f}x faster memoized "
+          f"({cold / (args.repeat * len(samples)) * 1e6:.1f} -> {warm / (args.repeat * len(samples)) * 1e6:.2f} us/text)")
+
+    if args.llm:
+        os.environ.setdefault("LLM_MAX_CONCURRENCY", "1")
+        import main as app_main
+        app_main.init_llm()
+
+        mapping = {"english": "en", "hindi": "hi", "marathi": "mr"}
+
+        def llm_detect(text: str) -> str:
+            word = app_main.detect_chain.invoke({"text": text}).content.strip().lower()
+            return mapping.get(word, "en")
+
+        evaluate("detect_chain LLM", llm_detect, samples, repeat=1)
+
+
+if __name__ == "__main__":
+    main()
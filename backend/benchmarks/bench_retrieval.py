@@ -0,0 +1,95 @@
+"""Latency/recall benchmark for scheme retrieval.
+
+Runs every labelled query in retrieval_queries.tsv through BM25 alone and
+BM25 + hashed n-gram embeddings (when NumPy is installed), reporting
+recall@1, recall@k, MRR, per-query latency and the prompt size of the
+injected facts compared with putting the whole catalog in the prompt.
+
+    cd backend && python benchmarks/bench_retrieval.py [--k 3] [--repeat 200]
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+
+from context_builder import estimate_tokens  # noqa: E402
+from language import fast_detect_language  # noqa: E402
+from retrieval import SchemeRetriever, build_scheme_context  # noqa: E402
+from scheme_catalog import SchemeCatalog  # noqa: E402
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+QUERIES = os.path.join(HERE, "retrieval_queries.tsv")
+CATALOG = os.path.join(os.path.dirname(HERE), "data", "schemes.json")
+
+
+def load_queries(path: str = QUERIES) -> list:
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            slug, query = line.rstrip("\n").split("\t", 1)
+            queries.append((slug, query))
+    return queries
+
+
+def evaluate(name: str, retriever: SchemeRetriever, queries: list, k: int, repeat: int):
+    hits_at_1 = hits_at_k = 0
+    reciprocal_rank = 0.0
+    context_tokens = 0
+    misses = []
+    for slug, query in queries:
+        results = retriever.search(query, k=k)
+        ranked = [scheme.slug for scheme, _ in results]
+        if ranked[:1] == [slug]:
+            hits_at_1 += 1
+        if slug in ranked:
+            hits_at_k += 1
+            reciprocal_rank += 1 / (ranked.index(slug) + 1)
+        else:
+            misses.append((slug, ranked, query))
+        context_tokens += estimate_tokens(build_scheme_context(results, fast_detect_language(query)))
+
+    start = perf_counter()
+    for _ in range(repeat):
+        for _, query in queries:
+            retriever.search(query, k=k)
+    per_query = (perf_counter() - start) / (repeat * len(queries))
+
+    n = len(queries)
+    print(f"\n{name}")
+    print(f"  recall@1: {hits_at_1 / n:.1%}  recall@{k}: {hits_at_k / n:.1%}  MRR: {reciprocal_rank / n:.3f}")
+    print(f"  latency: {per_query * 1e6:.1f} us/query")
+    print(f"  injected facts: ~{context_tokens / n:.0f} tokens/query")
+    for slug, ranked, query in misses:
+        print(f"    miss: expected={slug} got={ranked} | {query}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    catalog = SchemeCatalog.load(CATALOG)
+    queries = load_queries()
+    full_catalog = "\n\n".join(build_scheme_context([(s, 0)], lang) for s in catalog.schemes for lang in ("en", "hi", "mr"))
+    print(f"catalog: {len(catalog)} schemes, {len(queries)} labelled queries")
+    print(f"whole catalog in prompt (all languages): ~{estimate_tokens(full_catalog)} tokens")
+
+    start = perf_counter()
+    bm25 = SchemeRetriever(catalog, use_embeddings=False)
+    print(f"index build: {(perf_counter() - start) * 1000:.1f} ms (BM25)")
+    evaluate("BM25", bm25, queries, args.k, args.repeat)
+
+    hybrid = SchemeRetriever(catalog, use_embeddings=True)
+    if hybrid.uses_embeddings:
+        evaluate("BM25 + n-gram embeddings", hybrid, queries, args.k, args.repeat)
+    else:
+        print("\nNumPy not installed; skipping embedding fusion")
+
+
+if __name__ == "__main__":
+    main()
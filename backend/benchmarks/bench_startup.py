@@ -0,0 +1,111 @@
+"""Cold-start benchmark: import time of main.py and time until the server is live and ready.
+
+Each measurement runs in a fresh interpreter, so module caches start cold.
+
+    cd backend && python benchmarks/bench_startup.py [--runs 5] [--import-budget-ms 800] [--ready-budget-ms 5000]
+
+Exits non-zero when the median exceeds a budget. Uses a dummy GROQ_API_KEY
+unless one is set; no Groq request is made.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from time import perf_counter, sleep
+
+import httpx
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = """
+from time import perf_counter
+started = perf_counter()
+import main
+print(perf_counter() - started)
+"""
+
+HEAVY_MODULES = ("langchain_groq", "langchain_core", "groq", "httpx", "gtts", "indic_transliteration", "numpy")
+
+LOADED_PROBE = """
+import sys
+import main
+print(",".join(m for m in %r if m in sys.modules))
+""" % (HEAVY_MODULES,)
+
+
+def environment() -> dict:
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "startup-benchmark")
+    return env
+
+
+def measure_import() -> float:
+    out = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=BACKEND, env=environment(),
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_server(port: int) -> tuple:
+    """(seconds until /health answers, seconds until /ready answers 200)"""
+    started = perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND, env=environment(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    live = ready = None
+    try:
+        while perf_counter() - started < 60:
+            if process.poll() is not None:
+                raise SystemExit("server exited during startup")
+            try:
+                if live is None and httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                    live = perf_counter() - started
+                if live is not None and httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1).status_code == 200:
+                    ready = perf_counter() - started
+                    break
+            except httpx.HTTPError:
+                pass
+            sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    if ready is None:
+        raise SystemExit("server never became ready")
+    return live, ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--import-budget-ms", type=float, default=800.0)
+    parser.add_argument("--ready-budget-ms", type=float, default=5000.0)
+    args = parser.parse_args()
+
+    loaded = subprocess.run([sys.executable, "-c", LOADED_PROBE], cwd=BACKEND, env=environment(),
+                            capture_output=True, text=True, check=True).stdout.strip()
+    print(f"heavy modules loaded by 'import main': {loaded or 'none'}")
+
+    imports = [measure_import() for _ in range(args.runs)]
+    servers = [measure_server(args.port) for _ in range(args.runs)]
+    import_ms = statistics.median(imports) * 1000
+    live_ms = statistics.median(s[0] for s in servers) * 1000
+    ready_ms = statistics.median(s[1] for s in servers) * 1000
+
+    print(f"import main:         median {import_ms:7.0f} ms  (min {min(imports) * 1000:.0f}, max {max(imports) * 1000:.0f})")
+    print(f"process -> /health:  median {live_ms:7.0f} ms")
+    print(f"process -> /ready:   median {ready_ms:7.0f} ms")
+
+    over = []
+    if import_ms > args.import_budget_ms:
+        over.append(f"import {import_ms:.0f} ms > {args.import_budget_ms:.0f} ms")
+    if ready_ms > args.ready_budget_ms:
+        over.append(f"ready {ready_ms:.0f} ms > {args.ready_budget_ms:.0f} ms")
+    if over:
+        print("over budget: " + "; ".join(over))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
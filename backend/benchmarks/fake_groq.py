@@ -0,0 +1,160 @@
+"""Local stand-in for the Groq API, for exercising the resilience layer and load tests.
+
+Serves /openai/v1/chat/completions (plain and streamed) and
+/openai/v1/audio/transcriptions with configurable latency, errors and 429s.
+Point the backend at it with GROQ_BASE_URL:
+
+    cd backend && python benchmarks/fake_groq.py --port 9000 --latency 0.8 --error-rate 0.05
+    GROQ_BASE_URL=http://127.0.0.1:9000 GROQ_API_KEY=fake uvicorn main:app
+
+Models listed in --slow-models answer --slow-factor times slower, so the
+fallback to a faster model can be observed in /stats.
+"""
+import argparse
+import asyncio
+import json
+import random
+import uuid
+from time import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+REPLY = (
+    "Maharashtra offers the following support:\n\n"
+    "• Eligibility: Residents of Maharashtra meeting the income limit\n"
+    "• Benefit: Financial assistance through direct benefit transfer\n"
+    "• Apply: Mahadbt portal or the nearest department office"
+)
+
+app = FastAPI()
+config = argparse.Namespace(
+    latency=0.5, jitter=0.2, error_rate=0.0, rate_limit_rate=0.0,
+    slow_models=set(), slow_factor=5.0, chunk_delay=0.02
+)
+counters = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+
+def usage(prompt: str) -> dict:
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = len(REPLY) // 4
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens
+    }
+
+
+def injected_failure():
+    roll = random.random()
+    if roll < config.rate_limit_rate:
+        counters["rate_limited"] += 1
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+            status_code=429,
+            headers={"retry-after": "1"}
+        )
+    if roll < config.rate_limit_rate + config.error_rate:
+        counters["errors"] += 1
+        return JSONResponse({"error": {"message": "Internal server error", "type": "internal_server_error"}}, status_code=500)
+    return None
+
+
+async def model_delay(model: str):
+    delay = max(config.latency + random.uniform(-config.jitter, config.jitter), 0.0)
+    if model in config.slow_models:
+        delay *= config.slow_factor
+    await asyncio.sleep(delay)
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    counters["requests"] += 1
+    body = await request.json()
+    model = body.get("model", "")
+    prompt = "".join(str(m.get("content", "")) for m in body.get("messages", []))
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+    await model_delay(model)
+    failure = injected_failure()
+    if failure is not None:
+        return failure
+
+    if not body.get("stream"):
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": REPLY}, "finish_reason": "stop"}],
+            "usage": usage(prompt)
+        }
+
+    async def events():
+        words = REPLY.split(" ")
+        for i, word in enumerate(words):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": word + (" " if i < len(words) - 1 else "")}, "finish_reason": None}]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(config.chunk_delay)
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "x_groq": {"id": completion_id, "usage": usage(prompt)}
+        }
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/openai/v1/audio/transcriptions")
+async def transcriptions(request: Request):
+    counters["requests"] += 1
+    await request.body()
+    await model_delay("whisper")
+    failure = injected_failure()
+    if failure is not None:
+        return failure
+    return PlainTextResponse("What schemes are available for farmers?")
+
+
+@app.get("/counters")
+def get_counters():
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.5, help="mean seconds before the first byte")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument("--slow-models", default="", help="comma-separated models that answer slowly")
+    parser.add_argument("--slow-factor", type=float, default=5.0)
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="seconds between streamed chunks")
+    args = parser.parse_args()
+
+    config.latency = args.latency
+    config.jitter = args.jitter
+    config.error_rate = args.error_rate
+    config.rate_limit_rate = args.rate_limit_rate
+    config.slow_models = {m for m in args.slow_models.split(",") if m}
+    config.slow_factor = args.slow_factor
+    config.chunk_delay = args.chunk_delay
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""Load test for the request path, with fake Groq chat/Whisper and gTTS backends.
+
+Starts the app in a child process with the upstream calls replaced by fakes
+(latencies drawn from configurable distributions), drives /chat, /chat/voice,
+/audio/{id} and /schemes over HTTP at a fixed concurrency or request rate,
+and reports p50/p95/p99 latency, throughput and the server's RSS growth.
+No Groq quota is used.
+
+    cd backend && python benchmarks/load_test.py --concurrency 50 --duration 30
+    cd backend && python benchmarks/load_test.py --rps 200 --llm-latency lognormal:0.8,0.5 --json out.json
+    cd backend && python benchmarks/load_test.py --groq-url http://127.0.0.1:9000   # use fake_groq.py instead
+
+Latency specs: const:S, uniform:A,B or lognormal:MEDIAN,SIGMA (seconds).
+--max-p95 MS and --max-error-rate make the run exit non-zero, for CI.
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import math
+import os
+import random
+import subprocess
+import sys
+import wave
+from collections import defaultdict
+from time import perf_counter, sleep
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKEND = os.path.dirname(HERE)
+QUERIES = os.path.join(HERE, "retrieval_queries.tsv")
+
+sys.path.insert(0, BACKEND)
+
+REPLY = (
+    "Maharashtra offers the following support. "
+    "• Eligibility: Residents meeting the income limit. "
+    "• Benefit: Financial assistance through direct benefit transfer. "
+    "• Apply: Mahadbt portal or the nearest department office."
+)
+
+
+# ---------------- LATENCY DISTRIBUTIONS ----------------
+def latency_sampler(spec: str):
+    """Parse const:S, uniform:A,B or lognormal:MEDIAN,SIGMA into a zero-argument sampler"""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "const" and len(values) == 1:
+        return lambda: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1])
+    raise argparse.ArgumentTypeError(f"bad latency spec: {spec}")
+
+
+# ---------------- FAKE BACKENDS (server process) ----------------
+class FakeChatModel:
+    """Stands in for ChatGroq behind ResilientChain: same ainvoke/astream surface and usage metadata"""
+
+    def __init__(self, latency, chunk_delay: float):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+
+    @staticmethod
+    def _usage(prompt_value) -> dict:
+        prompt_tokens = sum(len(str(m.content)) for m in prompt_value.to_messages()) // 4
+        completion_tokens = len(REPLY) // 4
+        return {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
+    async def ainvoke(self, prompt_value, config=None):
+        from langchain_core.messages import AIMessage
+        await asyncio.sleep(self.latency())
+        return AIMessage(content=REPLY, usage_metadata=self._usage(prompt_value))
+
+    async def astream(self, prompt_value, config=None):
+        from langchain_core.messages import AIMessageChunk
+        await asyncio.sleep(self.latency())
+        words = REPLY.split(" ")
+        for i, word in enumerate(words):
+            yield AIMessageChunk(content=word + (" " if i < len(words) - 1 else ""))
+            await asyncio.sleep(self.chunk_delay)
+        yield AIMessageChunk(content="", usage_metadata=self._usage(prompt_value))
+
+
+class FakeTranscriptions:
+    def __init__(self, latency, questions: list):
+        self.latency = latency
+        self.questions = questions
+
+    async def create(self, file=None, **kwargs):
+        await asyncio.sleep(self.latency())
+        return random.choice(self.questions)
+
+
+class FakeGroqClient:
+    def __init__(self, latency, questions: list):
+        self.audio = argparse.Namespace(transcriptions=FakeTranscriptions(latency, questions))
+
+
+def serve(args):
+    """Child process: import the app, swap in the fakes, run uvicorn"""
+    os.environ.setdefault("GROQ_API_KEY", "load-test")
+    os.environ.setdefault("TTS_CACHE_DIR", "")
+    if args.groq_url:
+        os.environ["GROQ_BASE_URL"] = args.groq_url
+
+    import uvicorn
+    import main as app_module
+
+    logging.getLogger("main").setLevel(logging.WARNING)  # per-request INFO lines would dominate the run
+
+    llm_latency = latency_sampler(args.llm_latency)
+    if not args.groq_url:
+        app_module.init_llm()
+        for route in (app_module.primary_route, app_module.fallback_route):
+            if route is not None:
+                route.model = FakeChatModel(llm_latency, args.chunk_delay)
+        app_module.groq_async_client = FakeGroqClient(latency_sampler(args.stt_latency), load_questions())
+
+    tts_latency = latency_sampler(args.tts_latency)
+
+    def fake_synthesize_speech(text: str, lang: str) -> bytes:
+        sleep(tts_latency())  # gTTS blocks a pool thread for the whole network round trip
+        return b"ID3" + os.urandom(16) + text.encode("utf-8")[:4096]
+
+    app_module.synthesize_speech = fake_synthesize_speech
+    uvicorn.run(app_module.app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+
+# ---------------- LOAD GENERATION ----------------
+def load_questions() -> list:
+    with open(QUERIES, encoding="utf-8") as f:
+        return [line.rstrip("\n").split("\t", 1)[1] for line in f if line.strip() and not line.startswith("#")]
+
+
+def silent_wav(seconds: float = 1.0, rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buffer.getvalue()
+
+
+def rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+class LoadGenerator:
+    def __init__(self, client: httpx.AsyncClient, args):
+        self.client = client
+        self.args = args
+        self.questions = load_questions()
+        self.wav = silent_wav()
+        self.audio_urls = []
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.counter = 0
+        mix = dict(part.split("=") for part in args.mix.split(","))
+        self.scenarios = list(mix)
+        self.weights = [float(mix[s]) for s in self.scenarios]
+
+    def message(self) -> str:
+        self.counter += 1
+        question = random.choice(self.questions)
+        # Unique messages defeat the answer cache and coalescing, exercising the LLM path
+        return f"{question} ({self.counter})" if random.random() < self.args.unique_ratio else question
+
+    async def chat(self):
+        r = await self.client.post("/chat", json={"message": self.message(), "enable_tts": random.random() < self.args.tts_ratio})
+        if r.status_code == 200 and r.json().get("audio_url"):
+            self.remember_audio(r.json()["audio_url"])
+        return r
+
+    async def voice(self):
+        return await self.client.post(
+            "/chat/voice",
+            params={"enable_tts": "false"},
+            files={"audio": ("question.wav", self.wav, "audio/wav")}
+        )
+
+    async def audio(self):
+        if not self.audio_urls:
+            return await self.chat()
+        return await self.client.get(random.choice(self.audio_urls), params={"wait": 10})
+
+    async def schemes(self):
+        return await self.client.get("/schemes", params={"lang": random.choice(["en", "hi", "mr"]), "limit": 20})
+
+    def remember_audio(self, url: str):
+        self.audio_urls.append(url)
+        if len(self.audio_urls) > 500:
+            del self.audio_urls[:250]
+
+    async def one(self):
+        scenario = random.choices(self.scenarios, self.weights)[0]
+        started = perf_counter()
+        try:
+            response = await getattr(self, scenario)()
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        self.latencies[scenario].append(perf_counter() - started)
+        if not ok:
+            self.errors[scenario] += 1
+
+    async def run_concurrency(self, concurrency: int, until: float):
+        async def worker():
+            while perf_counter() < until:
+                await self.one()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    async def run_rate(self, rps: float, until: float):
+        # Open loop: arrivals follow a Poisson process regardless of how slow responses are
+        pending = set()
+        while perf_counter() < until:
+            task = asyncio.create_task(self.one())
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            await asyncio.sleep(random.expovariate(rps))
+        if pending:
+            await asyncio.wait(pending)
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+
+def summarize(generator: LoadGenerator, elapsed: float, rss_start: int, rss_end: int) -> dict:
+    scenarios = {}
+    everything = []
+    for scenario, values in sorted(generator.latencies.items()):
+        everything.extend(values)
+        scenarios[scenario] = {
+            "requests": len(values),
+            "errors": generator.errors[scenario],
+            "throughput_rps": len(values) / elapsed,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": max(values) * 1000
+        }
+    errors = sum(generator.errors.values())
+    return {
+        "duration_seconds": elapsed,
+        "requests": len(everything),
+        "errors": errors,
+        "error_rate": errors / len(everything) if everything else 0.0,
+        "throughput_rps": len(everything) / elapsed,
+        "p50_ms": percentile(everything, 0.50) * 1000,
+        "p95_ms": percentile(everything, 0.95) * 1000,
+        "p99_ms": percentile(everything, 0.99) * 1000,
+        "rss_start_mb": rss_start / 1024,
+        "rss_end_mb": rss_end / 1024,
+        "rss_growth_mb": (rss_end - rss_start) / 1024,
+        "scenarios": scenarios
+    }
+
+
+def print_report(report: dict):
+    print(f"\n{'scenario':<10} {'reqs':>7} {'errors':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, s in report["scenarios"].items():
+        print(
+            f"{name:<10} {s['requests']:>7} {s['errors']:>7} {s['throughput_rps']:>8.1f} "
+            f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f} {s['max_ms']:>9.1f}"
+        )
+    print(
+        f"{'total':<10} {report['requests']:>7} {report['errors']:>7} {report['throughput_rps']:>8.1f} "
+        f"{report['p50_ms']:>9.1f} {report['p95_ms']:>9.1f} {report['p99_ms']:>9.1f}"
+    )
+    print(
+        f"\nserver RSS: {report['rss_start_mb']:.1f} MB -> {report['rss_end_mb']:.1f} MB "
+        f"({report['rss_growth_mb']:+.1f} MB)"
+    )
+    upstream = report.get("server_stats", {})
+    if upstream:
+        coalescing = upstream.get("llm_coalescing", {})
+        tokens = upstream.get("tokens", {})
+        print(
+            f"LLM calls: {tokens.get('llm_calls', 0)}, coalesced: {coalescing.get('coalesced', 0)}, "
+            f"fast path hit rate: {upstream.get('fast_path', {}).get('hit_rate', 0):.0%}"
+        )
+
+
+async def drive(args, server_pid: int) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency or 1000, max_keepalive_connections=args.concurrency or 1000)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=60) as client:
+        generator = LoadGenerator(client, args)
+
+        if args.warmup > 0:
+            await generator.run_concurrency(min(args.concurrency or 10, 10), perf_counter() + args.warmup)
+            generator.latencies.clear()
+            generator.errors.clear()
+
+        rss_start = rss_kb(server_pid)
+        started = perf_counter()
+        until = started + args.duration
+        if args.rps:
+            await generator.run_rate(args.rps, until)
+        else:
+            await generator.run_concurrency(args.concurrency, until)
+        elapsed = perf_counter() - started
+        rss_end = rss_kb(server_pid)
+
+        report = summarize(generator, elapsed, rss_start, rss_end)
+        report["server_stats"] = (await client.get("/stats")).json()
+        return report
+
+
+def wait_for_server(port: int, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = perf_counter() + timeout
+    while perf_counter() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("server process exited during startup")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        sleep(0.2)
+    raise SystemExit("server did not start in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unmeasured load first")
+    parser.add_argument("--concurrency", type=int, default=20, help="closed-loop workers")
+    parser.add_argument("--rps", type=float, default=0.0, help="open-loop request rate (overrides --concurrency)")
+    parser.add_argument("--mix", default="chat=6,voice=1,audio=2,schemes=1", help="scenario weights")
+    parser.add_argument("--unique-ratio", type=float, default=0.5, help="fraction of uncacheable chat messages")
+    parser.add_argument("--tts-ratio", type=float, default=0.3, help="fraction of chats requesting audio")
+    parser.add_argument("--llm-latency", default="lognormal:0.8,0.4")
+    parser.add_argument("--stt-latency", default="lognormal:0.4,0.3")
+    parser.add_argument("--tts-latency", default="lognormal:0.6,0.4")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="seconds between streamed LLM chunks")
+    parser.add_argument("--groq-url", default="", help="use a fake Groq server (fake_groq.py) instead of in-process fakes")
+    parser.add_argument("--json", default="", help="write the report to this file")
+    parser.add_argument("--max-p95", type=float, default=0.0, help="fail if overall p95 exceeds this many ms")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="fail if the error rate exceeds this")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    for spec in (args.llm_latency, args.stt_latency, args.tts_latency):
+        latency_sampler(spec)
+
+    if args.serve:
+        serve(args)
+        return
+
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", *sys.argv[1:]], cwd=BACKEND)
+    try:
+        wait_for_server(args.port, process)
+        mode = f"{args.rps:g} req/s" if args.rps else f"{args.concurrency} workers"
+        print(f"load: {mode} for {args.duration:g}s, mix {args.mix}")
+        report = asyncio.run(drive(args, process.pid))
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failed = report["error_rate"] > args.max_error_rate or (args.max_p95 and report["p95_ms"] > args.max_p95)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+
+# ---------------- TOKEN ESTIMATES ----------------
+def estimate_tokens(text: str) -> int:
+    # ~4 chars/token for Latin script, Devanagari tokenizes closer to 1 token per 2 chars
+    devanagari = sum(1 for ch in text if "\u0900" <= ch <= "\u097F")
+    return (len(text) - devanagari) // 4 + devanagari // 2
+
+
+# ---------------- PROMPT FRAGMENTS ----------------
+IDENTITY = """You are **JanSeva Assistant (जनसेवा सहाय्यक)** — an official AI assistant for
+**Maharashtra Government Schemes**."""
+
+LANGUAGE_RULES = {
+    "en": "Respond ONLY in English.",
+    "hi": "Respond ONLY in Hindi (हिंदी) using Devanagari. Use आप.",
+    "mr": "Respond ONLY in Marathi (मराठी) using Devanagari. Use तुम्ही.",
+}
+
+LANGUAGE_CONTROL = """==================================================
+MANDATORY LANGUAGE CONTROL
+==================================================
+Target language code: {lang}
+{rule}
+- NEVER mix languages or switch language on your own
+- Romanized Hindi/Marathi input is already normalized internally"""
+
+SCOPE = """==================================================
+SCOPE (STRICT)
+==================================================
+Answer ONLY about ACTIVE Maharashtra Government schemes (State + Central schemes
+applicable in Maharashtra) for women, students, farmers, senior citizens, poor,
+disabled and youth.
+- Other states → politely redirect to Maharashtra
+- Inactive/discontinued schemes → clearly say it is inactive
+- General/non-scheme questions → redirect to scheme-related help"""
+
+ANSWER_FORMAT = """==================================================
+ANSWER FORMAT (MANDATORY)
+==================================================
+Keep answers concise (3–6 lines), bullet points, no long paragraphs:
+• Scheme name (in target language) • Eligibility • Key benefits • How to apply
+Respectful, government-official, citizen-friendly tone in simple language.
+Do NOT hallucinate scheme details; if unsure, say information is unavailable.
+Prefer official portals (Mahadbt, department offices). No emojis."""
+
+FACTS = """==================================================
+SCHEME FACTS (FROM THE OFFICIAL CATALOG)
+==================================================
+Use these facts for scheme names, eligibility, benefits and how to apply.
+Do NOT contradict them. If the question is about a scheme not listed here,
+answer only what you are sure of and point to the official portal.
+
+{context}"""
+
+NO_FACTS = "No matching scheme in the catalog for this question."
+
+EXAMPLES = {
+    "mr": """==================================================
+EXAMPLE
+==================================================
+User: माझी कन्या भाग्यश्री योजना काय आहे?
+Assistant:
+माझी कन्या भाग्यश्री योजना ही मुलींच्या कल्याणासाठीची योजना आहे.
+
+• पात्रता: वार्षिक उत्पन्न ₹7.5 लाखांपेक्षा कमी
+• लाभ: दोन मुलींसाठी ₹50,000 पर्यंत मदत
+• अर्ज: महाडीबीटी पोर्टल किंवा महिला व बाल विकास कार्यालय""",
+    "hi": """==================================================
+EXAMPLE
+==================================================
+User: महिलाओं के लिए कौन सी योजना है?
+Assistant:
+महाराष्ट्र सरकार महिलाओं के लिए कई योजनाएँ चलाती है।
+
+• लेक लाडकी योजना – आर्थिक सहायता
+• पात्रता: पीला/नारंगी राशन कार्ड
+• आवेदन: महिला एवं बाल विकास विभाग""",
+    "en": """==================================================
+EXAMPLE
+==================================================
+User: How to apply for farmer schemes?
+Assistant:
+Farmers in Maharashtra can apply for the following schemes:
+
+• Shetkari Sanman Nidhi – ₹6,000 per year
+• Eligibility: Registered landholding farmers
+• Apply via Mahakisan portal or agriculture office""",
+}
+
+SMALL_TALK = """The citizen is greeting you or making small talk. Reply in one or two
+short lines: greet them and offer help with Maharashtra government schemes."""
+
+SMALL_TALK_WORDS = frozenset({
+    "hi", "hello", "hey", "namaste", "namaskar", "thanks", "thank", "you", "ok", "okay", "bye",
+    "नमस्ते", "नमस्कार", "धन्यवाद", "शुक्रिया", "हॅलो", "हेलो",
+})
+
+_WORD_RE = re.compile(r"[\u0900-\u097F]+|[a-z]+")
+
+
+@lru_cache(maxsize=None)
+def system_fragments(lang: str, small_talk: bool) -> tuple:
+    """Rendered static system prompt for a language/mode and its token estimate, built once"""
+    control = LANGUAGE_CONTROL.format(lang=lang, rule=LANGUAGE_RULES.get(lang, LANGUAGE_RULES["en"]))
+    if small_talk:
+        parts = [IDENTITY, control, SMALL_TALK]
+    else:
+        parts = [IDENTITY, control, SCOPE, ANSWER_FORMAT, EXAMPLES.get(lang, EXAMPLES["en"])]
+    text = "\n\n".join(parts)
+    return text, estimate_tokens(text)
+
+
+def is_small_talk(text: str) -> bool:
+    words = _WORD_RE.findall(text.lower())
+    return 0 < len(words) <= 4 and all(w in SMALL_TALK_WORDS for w in words)
+
+
+# ---------------- HISTORY ----------------
+def trim_history(history: List[dict], budget: int, max_messages: int) -> tuple:
+    """Newest-first slice of history that fits the token budget, plus a one-line summary of the rest.
+
+    The summary quotes the citizen's own earlier questions, so it is user
+    content: callers must send it as a user message, never as instructions.
+    Returns (kept messages oldest-first, summary or None, tokens used).
+    """
+    kept = []
+    used = 0
+    for message in reversed(history[-max_messages:] if max_messages > 0 else []):
+        cost = estimate_tokens(message["content"]) + 4
+        if used + cost > budget:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+
+    older = history[:len(history) - len(kept)]
+    questions = [m["content"].strip().splitlines()[0] for m in older if m["role"] == "user" and m["content"].strip()]
+    summary = None
+    if questions:
+        quoted = "; ".join('"' + q.replace('"', "'")[:120] + '"' for q in questions[-5:])
+        summary = f"(Context only) My earlier questions in this conversation were: {quoted}"[:400]
+        used += estimate_tokens(summary)
+    return kept, summary, used
+
+
+# ---------------- BUILDER ----------------
+class PromptContext:
+    __slots__ = ("system", "history", "prompt_tokens", "history_messages")
+
+    def __init__(self, system: str, history: list, prompt_tokens: int, history_messages: int):
+        self.system = system
+        self.history = history
+        self.prompt_tokens = prompt_tokens
+        self.history_messages = history_messages
+
+
+def build_prompt_context(
+    user_input: str,
+    lang: str,
+    facts: Optional[str],
+    history: List[dict],
+    history_budget: int = 600,
+    max_history_messages: int = 6
+) -> PromptContext:
+    """Assemble the system prompt from cached fragments and a budgeted slice of history"""
+    small_talk = facts is None and not history and is_small_talk(user_input)
+    system, system_tokens = system_fragments(lang, small_talk)
+    tokens = system_tokens
+
+    if not small_talk:
+        facts_block = FACTS.format(context=facts or NO_FACTS)
+        system = f"{system}\n\n{facts_block}"
+        tokens += estimate_tokens(facts_block)
+
+    kept, summary, history_tokens = trim_history(history, history_budget, max_history_messages)
+    # (role, content) pairs; MessagesPlaceholder converts them, so this module needs no langchain import
+    messages = [("human" if m["role"] == "user" else "ai", m["content"]) for m in kept]
+    if summary:
+        # Built from raw citizen text, so it goes in as a user turn and stays out of the system prompt
+        messages.insert(0, ("human", summary))
+    tokens += history_tokens + estimate_tokens(user_input)
+    return PromptContext(system, messages, tokens, len(kept))
@@ -0,0 +1,383 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from time import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- BASE ----------------
+class ConversationStore(ABC):
+    """Async interface shared by all conversation backends.
+
+    Every backend keeps at most `max_messages` per conversation (oldest dropped
+    first) and forgets conversations idle for longer than `ttl` seconds.
+    """
+
+    backend = "base"
+
+    def __init__(self, max_messages: int = 50, ttl: float = 3600):
+        self.max_messages = max_messages
+        self.ttl = ttl
+
+    @abstractmethod
+    async def append(self, conv_id: str, message: dict):
+        ...
+
+    @abstractmethod
+    async def get(self, conv_id: str) -> Optional[list]:
+        ...
+
+    @abstractmethod
+    async def delete(self, conv_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "max_messages": self.max_messages,
+            "ttl_seconds": self.ttl
+        }
+
+
+def _message_size(message: dict) -> int:
+    return sum(len(str(v).encode("utf-8")) for v in message.values()) + 64
+
+
+# ---------------- IN-PROCESS ----------------
+class _Conversation:
+    __slots__ = ("messages", "last_access", "size")
+
+    def __init__(self, max_messages: int):
+        self.messages = deque(maxlen=max_messages)
+        self.last_access = time()
+        self.size = 0
+
+
+class MemoryConversationStore(ConversationStore):
+    """Process-local store with LRU eviction under a global byte budget"""
+
+    backend = "memory"
+
+    def __init__(self, max_messages: int = 50, ttl: float = 3600, max_bytes: int = 64 * 1024 * 1024):
+        super().__init__(max_messages, ttl)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+        # Ordered by last access, so expired and least-recently-used entries sit at the front
+        self._conversations: "OrderedDict[str, _Conversation]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    async def append(self, conv_id: str, message: dict):
+        self._expire()
+        conv = self._conversations.get(conv_id)
+        if conv is None:
+            conv = self._conversations[conv_id] = _Conversation(self.max_messages)
+        else:
+            self._conversations.move_to_end(conv_id)
+
+        if len(conv.messages) == conv.messages.maxlen:
+            dropped = _message_size(conv.messages[0])
+            conv.size -= dropped
+            self.total_bytes -= dropped
+
+        size = _message_size(message)
+        conv.messages.append(message)
+        conv.size += size
+        conv.last_access = time()
+        self.total_bytes += size
+
+        while self.total_bytes > self.max_bytes and len(self._conversations) > 1:
+            oldest_id = next(iter(self._conversations))
+            if oldest_id == conv_id:
+                break
+            self._remove(oldest_id)
+            self.evictions += 1
+
+    async def get(self, conv_id: str) -> Optional[list]:
+        self._expire()
+        conv = self._conversations.get(conv_id)
+        if conv is None:
+            return None
+        conv.last_access = time()
+        self._conversations.move_to_end(conv_id)
+        return list(conv.messages)
+
+    async def delete(self, conv_id: str) -> bool:
+        if conv_id not in self._conversations:
+            return False
+        self._remove(conv_id)
+        return True
+
+    async def clear(self):
+        self._conversations.clear()
+        self.total_bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "conversations": len(self._conversations),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+    def _remove(self, conv_id: str):
+        conv = self._conversations.pop(conv_id)
+        self.total_bytes -= conv.size
+
+    def _expire(self):
+        if self.ttl <= 0:
+            return
+        cutoff = time() - self.ttl
+        while self._conversations:
+            oldest_id, oldest = next(iter(self._conversations.items()))
+            if oldest.last_access >= cutoff:
+                break
+            self._remove(oldest_id)
+            self.expirations += 1
+
+
+# ---------------- SQLITE ----------------
+class SQLiteConversationStore(ConversationStore):
+    """File-backed store; several workers on one host can share the same database file"""
+
+    backend = "sqlite"
+
+    def __init__(
+        self,
+        path: str = "janseva_conversations.db",
+        max_messages: int = 50,
+        ttl: float = 3600,
+        max_conversations: int = 100000
+    ):
+        super().__init__(max_messages, ttl)
+        self.path = path
+        self.max_conversations = max_conversations
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS conversations (
+                id TEXT PRIMARY KEY,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_conversations_last_access
+                ON conversations (last_access);
+            CREATE TABLE IF NOT EXISTS messages (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                conversation_id TEXT NOT NULL,
+                body TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_messages_conversation
+                ON messages (conversation_id, seq);
+        """)
+
+    async def append(self, conv_id: str, message: dict):
+        await asyncio.to_thread(self._append, conv_id, json.dumps(message, ensure_ascii=False))
+
+    async def get(self, conv_id: str) -> Optional[list]:
+        return await asyncio.to_thread(self._get, conv_id)
+
+    async def delete(self, conv_id: str) -> bool:
+        return await asyncio.to_thread(self._delete, conv_id)
+
+    async def clear(self):
+        await asyncio.to_thread(self._run, "DELETE FROM messages; DELETE FROM conversations;")
+
+    async def close(self):
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+        return {
+            **super().stats(),
+            "path": self.path,
+            "conversations": count,
+            "max_conversations": self.max_conversations
+        }
+
+    def _run(self, script: str):
+        with self._lock:
+            self._db.executescript(script)
+
+    def _append(self, conv_id: str, body: str):
+        now = time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "INSERT INTO conversations (id, last_access) VALUES (?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET last_access = excluded.last_access",
+                    (conv_id, now)
+                )
+                self._db.execute(
+                    "INSERT INTO messages (conversation_id, body) VALUES (?, ?)",
+                    (conv_id, body)
+                )
+                self._db.execute(
+                    "DELETE FROM messages WHERE conversation_id = ? AND seq NOT IN ("
+                    "SELECT seq FROM messages WHERE conversation_id = ? ORDER BY seq DESC LIMIT ?)",
+                    (conv_id, conv_id, self.max_messages)
+                )
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    self._evict(now)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _evict(self, now: float):
+        stale = "SELECT id FROM conversations WHERE last_access < ?"
+        params = (now - self.ttl,) if self.ttl > 0 else (0,)
+        self._db.execute(f"DELETE FROM messages WHERE conversation_id IN ({stale})", params)
+        self._db.execute("DELETE FROM conversations WHERE last_access < ?", params)
+
+        overflow = "SELECT id FROM conversations ORDER BY last_access DESC LIMIT -1 OFFSET ?"
+        self._db.execute(f"DELETE FROM messages WHERE conversation_id IN ({overflow})", (self.max_conversations,))
+        self._db.execute(f"DELETE FROM conversations WHERE id IN ({overflow})", (self.max_conversations,))
+
+    def _get(self, conv_id: str) -> Optional[list]:
+        with self._lock:
+            row = self._db.execute("SELECT last_access FROM conversations WHERE id = ?", (conv_id,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl > 0 and time() - row[0] > self.ttl:
+                self._db.execute("DELETE FROM messages WHERE conversation_id = ?", (conv_id,))
+                self._db.execute("DELETE FROM conversations WHERE id = ?", (conv_id,))
+                return None
+            self._db.execute("UPDATE conversations SET last_access = ? WHERE id = ?", (time(), conv_id))
+            rows = self._db.execute(
+                "SELECT body FROM messages WHERE conversation_id = ? ORDER BY seq", (conv_id,)
+            ).fetchall()
+        return [json.loads(body) for (body,) in rows]
+
+    def _delete(self, conv_id: str) -> bool:
+        with self._lock:
+            self._db.execute("DELETE FROM messages WHERE conversation_id = ?", (conv_id,))
+            cursor = self._db.execute("DELETE FROM conversations WHERE id = ?", (conv_id,))
+            return cursor.rowcount > 0
+
+
+# ---------------- REDIS ----------------
+class RedisConversationStore(ConversationStore):
+    """Store speaking the Redis protocol (Redis, Valkey, KeyDB or a local stand-in).
+
+    Each conversation is a capped list with a sliding expiry; the global memory
+    budget is enforced by the server's maxmemory/LRU policy. Requires the
+    optional `redis` package.
+    """
+
+    backend = "redis"
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        max_messages: int = 50,
+        ttl: float = 3600,
+        prefix: str = "janseva:conv:",
+        client=None
+    ):
+        super().__init__(max_messages, ttl)
+        self.url = url
+        self.prefix = prefix
+        if client is None:
+            try:
+                import redis.asyncio as aioredis
+            except ImportError:
+                raise RuntimeError("CONVERSATION_BACKEND=redis requires the 'redis' package (pip install redis)")
+            client = aioredis.from_url(url, decode_responses=True)
+        self._client = client
+
+    def _key(self, conv_id: str) -> str:
+        return f"{self.prefix}{conv_id}"
+
+    async def append(self, conv_id: str, message: dict):
+        key = self._key(conv_id)
+        pipe = self._client.pipeline(transaction=True)
+        pipe.rpush(key, json.dumps(message, ensure_ascii=False))
+        pipe.ltrim(key, -self.max_messages, -1)
+        if self.ttl > 0:
+            pipe.expire(key, int(self.ttl))
+        await pipe.execute()
+
+    async def get(self, conv_id: str) -> Optional[list]:
+        key = self._key(conv_id)
+        pipe = self._client.pipeline(transaction=False)
+        pipe.lrange(key, 0, -1)
+        if self.ttl > 0:
+            pipe.expire(key, int(self.ttl))
+        items = (await pipe.execute())[0]
+        if not items:
+            return None
+        return [json.loads(item) for item in items]
+
+    async def delete(self, conv_id: str) -> bool:
+        return bool(await self._client.delete(self._key(conv_id)))
+
+    async def clear(self):
+        async for key in self._client.scan_iter(match=f"{self.prefix}*"):
+            await self._client.delete(key)
+
+    async def close(self):
+        await self._client.aclose()
+
+    def stats(self) -> dict:
+        return {**super().stats(), "url": self.url, "prefix": self.prefix}
+
+
+# ---------------- FACTORY ----------------
+def create_conversation_store() -> ConversationStore:
+    """Build the store selected by CONVERSATION_BACKEND (memory, sqlite or redis).
+
+    Defaults to SHARED_STATE_BACKEND, so one setting makes every worker see the
+    same conversations.
+    """
+    shared = os.getenv("SHARED_STATE_BACKEND", "none").lower()
+    backend = os.getenv("CONVERSATION_BACKEND", shared if shared in ("sqlite", "redis") else "memory").lower()
+    max_messages = int(os.getenv("CONVERSATION_MAX_MESSAGES", "50"))
+    ttl = float(os.getenv("CONVERSATION_TTL", "3600"))
+
+    if backend == "sqlite":
+        return SQLiteConversationStore(
+            path=os.getenv("CONVERSATION_DB_PATH", "janseva_conversations.db"),
+            max_messages=max_messages,
+            ttl=ttl,
+            max_conversations=int(os.getenv("CONVERSATION_MAX_COUNT", "100000"))
+        )
+    if backend == "redis":
+        return RedisConversationStore(
+            url=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            max_messages=max_messages,
+            ttl=ttl
+        )
+    if backend != "memory":
+        logger.warning(f"Unknown CONVERSATION_BACKEND '{backend}', using memory")
+
+    return MemoryConversationStore(
+        max_messages=max_messages,
+        ttl=ttl,
+        max_bytes=int(os.getenv("CONVERSATION_MAX_BYTES", str(64 * 1024 * 1024)))
+    )
@@ -0,0 +1,328 @@
+import asyncio
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from contextlib import asynccontextmanager
+from time import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from scheme_catalog import CATALOG_LANGUAGES, SchemeCatalog, SchemeInfo
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent builds are not serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"JSFAQ1\n"
+FORMAT = 1
+_HEADER = struct.Struct("<Q")  # index length, after MAGIC
+
+FAQ_INTENTS = ("eligibility", "benefits", "apply")
+
+# Canonical question asked of the model for each scheme x language x intent
+FAQ_QUESTIONS = {
+    "en": {
+        "eligibility": "Who is eligible for {name}?",
+        "benefits": "What are the benefits of {name}?",
+        "apply": "How do I apply for {name}?",
+    },
+    "hi": {
+        "eligibility": "{name} के लिए पात्रता क्या है?",
+        "benefits": "{name} के क्या लाभ हैं?",
+        "apply": "{name} के लिए आवेदन कैसे करें?",
+    },
+    "mr": {
+        "eligibility": "{name} साठी पात्रता काय आहे?",
+        "benefits": "{name} चे लाभ काय आहेत?",
+        "apply": "{name} साठी अर्ज कसा करावा?",
+    },
+}
+
+
+def scheme_digest(scheme: SchemeInfo) -> str:
+    """Content hash of one scheme record; answers are regenerated when it changes"""
+    body = json.dumps(scheme.model_dump(), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()[:16]
+
+
+def faq_question(scheme: SchemeInfo, lang: str, intent: str) -> str:
+    translation = scheme.translations.get(lang)
+    name = translation.name if translation else scheme.name
+    return FAQ_QUESTIONS[lang][intent].format(name=name)
+
+
+def _answer_key(scheme_id: int, lang: str, intent: str) -> str:
+    return f"{scheme_id}/{lang}/{intent}"
+
+
+# ---------------- BUNDLE ----------------
+class FAQBundle:
+    """Pregenerated answers and MP3s in one read-only, memory-mapped file.
+
+    Layout: MAGIC, the index length, a JSON index, then the blobs it points
+    into. Pages are loaded lazily by the OS and shared by every worker mapping
+    the same file. Answers are only served for schemes whose data still
+    matches the digest they were generated from (see bind()).
+    """
+
+    def __init__(self, path: str, index: dict, data: mmap.mmap, offset: int):
+        self.path = path
+        self.index = index
+        self._data = data
+        self._offset = offset
+        self._valid = set(index["schemes"])
+        self.answer_hits = 0
+        self.audio_hits = 0
+
+    @classmethod
+    def load(cls, path: str) -> "FAQBundle":
+        """Map a bundle file; raises OSError or ValueError if it is missing or malformed"""
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if data[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a FAQ bundle")
+            (length,) = _HEADER.unpack_from(data, len(MAGIC))
+            start = len(MAGIC) + _HEADER.size
+            index = json.loads(data[start:start + length])
+            if index.get("format") != FORMAT:
+                raise ValueError(f"{path} has unsupported format {index.get('format')}")
+        except Exception:
+            data.close()
+            raise
+        return cls(path, index, data, start + length)
+
+    @property
+    def version(self) -> str:
+        return self.index["version"]
+
+    def bind(self, catalog: SchemeCatalog) -> int:
+        """Serve only schemes unchanged since generation; returns how many are stale"""
+        current = {str(s.id): scheme_digest(s) for s in catalog.schemes}
+        self._valid = {sid for sid, digest in self.index["schemes"].items() if current.get(sid) == digest}
+        return len(self.index["schemes"]) - len(self._valid)
+
+    def covers(self, catalog: SchemeCatalog, with_audio: bool = True) -> bool:
+        """True when every scheme in catalog is current (and voiced), so a rebuild would only copy it"""
+        if any(self.digest(scheme.id) != scheme_digest(scheme) for scheme in catalog.schemes):
+            return False
+        audio = self.index["audio"]
+        return not with_audio or all(span[2] in audio for span in self.index["answers"].values())
+
+    def digest(self, scheme_id: int) -> Optional[str]:
+        return self.index["schemes"].get(str(scheme_id))
+
+    def _slice(self, span: list) -> bytes:
+        offset, length = span[0], span[1]
+        return self._data[self._offset + offset:self._offset + offset + length]
+
+    def entry(self, scheme_id: int, lang: str, intent: str) -> Optional[tuple]:
+        """(answer, audio_id) regardless of staleness; audio_id is None for text-only entries"""
+        span = self.index["answers"].get(_answer_key(scheme_id, lang, intent))
+        if span is None:
+            return None
+        return self._slice(span).decode("utf-8"), span[2]
+
+    def answer(self, scheme_id: int, lang: str, intent: str) -> Optional[str]:
+        if str(scheme_id) not in self._valid:
+            return None
+        found = self.entry(scheme_id, lang, intent)
+        if found is None:
+            return None
+        self.answer_hits += 1
+        return found[0]
+
+    def has_audio(self, audio_id: str) -> bool:
+        return audio_id in self.index["audio"]
+
+    def audio(self, audio_id: str) -> Optional[bytes]:
+        data = self.audio_bytes(audio_id)
+        if data is not None:
+            self.audio_hits += 1
+        return data
+
+    def audio_bytes(self, audio_id: str) -> Optional[bytes]:
+        span = self.index["audio"].get(audio_id)
+        return self._slice(span) if span is not None else None
+
+    def close(self):
+        self._data.close()
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "version": self.version,
+            "created": self.index["created"],
+            "schemes": len(self.index["schemes"]),
+            "stale_schemes": len(self.index["schemes"]) - len(self._valid),
+            "answers": len(self.index["answers"]),
+            "audio": len(self.index["audio"]),
+            "bytes": len(self._data),
+            "answer_hits": self.answer_hits,
+            "audio_hits": self.audio_hits
+        }
+
+
+def open_faq_bundle(path: Optional[str], catalog: SchemeCatalog) -> Optional[FAQBundle]:
+    """The bundle at path bound to catalog, or None when it is absent or unreadable"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        bundle = FAQBundle.load(path)
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not load FAQ bundle {path}: {e}")
+        return None
+    stale = bundle.bind(catalog)
+    logger.info(
+        f"FAQ bundle {bundle.version}: {len(bundle.index['answers'])} answers, "
+        f"{len(bundle.index['audio'])} audio clips, {stale} stale schemes"
+    )
+    return bundle
+
+
+# ---------------- BUILDER ----------------
+@asynccontextmanager
+async def build_lock(path: str, poll: float = 0.5):
+    """Exclusive lock on path + '.lock' so workers sharing a bundle build it one at a time"""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".lock", "a") as f:
+        # Polled rather than blocking in a thread, so a cancelled waiter lets go at once
+        while True:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                await asyncio.sleep(poll)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+async def build_faq_bundle(
+    path: str,
+    catalog: SchemeCatalog,
+    generate: Callable[[SchemeInfo, str, str], Awaitable[str]],
+    synthesize: Optional[Callable[[str, str], Awaitable[tuple]]] = None,
+    previous: Optional[FAQBundle] = None,
+    force: bool = False,
+    concurrency: int = 4
+) -> dict:
+    """Write a new bundle for catalog, reusing previous entries for unchanged schemes.
+
+    generate(scheme, lang, intent) returns the answer text; synthesize(text,
+    lang) returns (audio_id, mp3 bytes), or is None for a text-only bundle.
+    A scheme whose generation fails is left out and reported, never half-written.
+    """
+    limit = asyncio.Semaphore(concurrency)
+    answers: Dict[str, tuple] = {}  # key -> (text, audio_id)
+    audio: Dict[str, bytes] = {}
+    digests = {}
+    report = {"regenerated": [], "reused": [], "failed": {}}
+
+    def reusable(scheme: SchemeInfo, digest: str, keys: list) -> bool:
+        if force or previous is None or previous.digest(scheme.id) != digest:
+            return False
+        for scheme_id, lang, intent in keys:
+            found = previous.entry(scheme_id, lang, intent)
+            if found is None or (synthesize is not None and (found[1] is None or not previous.has_audio(found[1]))):
+                return False
+        return True
+
+    async def generate_one(scheme: SchemeInfo, lang: str, intent: str) -> tuple:
+        async with limit:
+            text = (await generate(scheme, lang, intent)).strip()
+            if synthesize is None:
+                return text, None, None
+            audio_id, data = await synthesize(text, lang)
+            return text, audio_id, data
+
+    async def build_scheme(scheme: SchemeInfo):
+        digest = scheme_digest(scheme)
+        langs = [lang for lang in CATALOG_LANGUAGES if lang in scheme.translations] or ["en"]
+        keys = [(scheme.id, lang, intent) for lang in langs for intent in FAQ_INTENTS]
+
+        if reusable(scheme, digest, keys):
+            for key in keys:
+                text, audio_id = previous.entry(*key)
+                answers[_answer_key(*key)] = (text, audio_id)
+                if audio_id is not None and synthesize is not None:
+                    audio[audio_id] = previous.audio_bytes(audio_id)
+            digests[str(scheme.id)] = digest
+            report["reused"].append(scheme.id)
+            return
+
+        try:
+            results = await asyncio.gather(*[generate_one(scheme, lang, intent) for _, lang, intent in keys])
+        except Exception as e:
+            logger.error(f"FAQ generation for scheme {scheme.id} failed: {e}")
+            report["failed"][scheme.id] = str(getattr(e, "detail", e))
+            return
+        for key, (text, audio_id, data) in zip(keys, results):
+            answers[_answer_key(*key)] = (text, audio_id)
+            if audio_id is not None:
+                audio[audio_id] = data
+        digests[str(scheme.id)] = digest
+        report["regenerated"].append(scheme.id)
+
+    await asyncio.gather(*[build_scheme(scheme) for scheme in catalog.schemes])
+    size, version = write_faq_bundle(path, catalog.version, digests, answers, audio)
+    return {
+        **report,
+        "path": path,
+        "version": version,
+        "answers": len(answers),
+        "audio": len(audio),
+        "bytes": size
+    }
+
+
+def write_faq_bundle(path: str, catalog_version: str, digests: dict, answers: dict, audio: dict) -> tuple:
+    """Serialize a bundle atomically; returns (size, version)"""
+    blobs = []
+    offset = 0
+
+    def add(data: bytes) -> list:
+        nonlocal offset
+        blobs.append(data)
+        span = [offset, len(data)]
+        offset += len(data)
+        return span
+
+    index = {
+        "format": FORMAT,
+        "catalog_version": catalog_version,
+        "schemes": dict(sorted(digests.items())),
+        "answers": {},
+        "audio": {}
+    }
+    for key in sorted(answers):
+        text, audio_id = answers[key]
+        index["answers"][key] = add(text.encode("utf-8")) + [audio_id]
+    for audio_id in sorted(audio):
+        index["audio"][audio_id] = add(audio[audio_id])
+    index["version"] = hashlib.sha256(json.dumps(index, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    index["created"] = time()
+
+    header = json.dumps(index, ensure_ascii=False).encode("utf-8")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Readers keep their mapping of the old file; the rename swaps in the new one atomically
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_HEADER.pack(len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+    return len(MAGIC) + _HEADER.size + len(header) + offset, index["version"]
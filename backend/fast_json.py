@@ -0,0 +1,44 @@
+import json
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # the stdlib encoder produces the same output, only slower
+    orjson = None
+
+# Plain-dict endpoints (e.g. /stats) may carry int keys, which the stdlib encoder also accepts
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def to_json_bytes(data: Any) -> bytes:
+    """Compact UTF-8 JSON (non-ASCII kept as-is), using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data, option=_ORJSON_OPTIONS)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def to_json(data: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(data, option=_ORJSON_OPTIONS).decode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def from_json(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with to_json_bytes().
+
+    Set per route on endpoints returning plain dicts. Routes with a
+    response_model are left alone: FastAPI serializes those straight to bytes
+    with pydantic-core, which any custom response class (including an
+    app-wide default) would turn off.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json_bytes(content)
@@ -0,0 +1,213 @@
+import re
+from time import perf_counter
+from typing import List, Optional
+
+from faq_bundle import FAQBundle
+from scheme_catalog import SchemeCatalog, SchemeInfo
+
+
+# ---------------- VOCABULARY ----------------
+TOKEN_RE = re.compile(r"[\u0900-\u097F]+|[a-z0-9]+")
+
+# Field intents and the words that ask for them (en, hi, mr, romanized)
+INTENT_KEYWORDS = {
+    "eligibility": {
+        "eligibility", "eligible", "qualify", "criteria", "who",
+        "पात्रता", "पात्र", "कौन", "कोण", "patrata", "patra", "kaun", "kon",
+    },
+    "benefits": {
+        "benefit", "benefits", "amount", "money", "much",
+        "लाभ", "फायदा", "फायदे", "कितना", "कितनी", "किती", "राशि", "रक्कम",
+        "labh", "fayda", "fayde", "faida", "kitna", "kiti", "paisa", "paise",
+    },
+    "documents": {
+        "document", "documents", "papers", "certificate", "certificates",
+        "दस्तावेज", "दस्तावेजों", "कागदपत्रे", "कागदपत्र", "कागजात",
+        "dastavej", "kagadpatre", "kagadpatra", "kagjat",
+    },
+    "apply": {
+        "apply", "application", "register", "registration", "portal", "where",
+        "आवेदन", "अर्ज", "कहाँ", "कहां", "कुठे", "नोंदणी",
+        "aavedan", "avedan", "arj", "kahan", "kuthe",
+    },
+}
+
+# Words that carry no extra meaning beyond "tell me about this scheme"
+FILLER = {
+    "what", "is", "are", "the", "a", "an", "for", "of", "to", "in", "about", "tell", "me", "please",
+    "how", "can", "i", "my", "get", "do", "does", "scheme", "yojana", "details", "info", "information",
+    "क्या", "है", "हैं", "के", "की", "का", "में", "लिए", "बारे", "बताइए", "बताओ", "योजना", "कैसे", "करें",
+    "काय", "आहे", "आहेत", "साठी", "ची", "चे", "चा", "योजनेची", "योजनेचे", "योजनेसाठी", "सांगा", "कसा", "कसे",
+    "करावा", "करायचा", "माहिती", "मिळेल", "मिळते", "लागतात", "कोणती", "करू", "शकते", "शकतो",
+    "कर", "सकता", "सकती", "सकते", "चाहिए",
+    "kya", "hai", "ke", "ki", "ka", "liye", "kaise", "kay", "aahe", "ahe", "sathi", "kasa", "sanga",
+    "mahiti", "karaycha", "milel", "lagtat", "konti", "karu", "shakte", "kar", "sakta", "chahiye",
+}
+
+FIELD_LABELS = {
+    "en": {"eligibility": "Eligibility", "benefits": "Benefits", "documents": "Documents", "apply": "Apply"},
+    "hi": {"eligibility": "पात्रता", "benefits": "लाभ", "documents": "आवश्यक दस्तावेज", "apply": "आवेदन"},
+    "mr": {"eligibility": "पात्रता", "benefits": "लाभ", "documents": "आवश्यक कागदपत्रे", "apply": "अर्ज"},
+}
+
+APPLY_TEXT = {
+    "en": "Apply online at {url} or at the nearest department office.",
+    "hi": "{url} पर ऑनलाइन या निकटतम विभागीय कार्यालय में आवेदन करें।",
+    "mr": "{url} वर ऑनलाइन किंवा जवळच्या विभागीय कार्यालयात अर्ज करा.",
+}
+
+SCHEME_SUFFIXES = ("yojana", "yojna", "scheme", "योजना")
+
+
+def _tokens(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+# ---------------- MATCHER ----------------
+class FastPathMatcher:
+    """Answers "<scheme> + <field>" questions straight from catalog data.
+
+    A question qualifies when exactly one scheme alias matches and every
+    word is explained by that alias, a field keyword or a filler word. A
+    single unexplained word is often the qualifier that changes the answer
+    ("discontinued", "boys", "band"), so anything else falls back to the
+    LLM. Single-field questions are answered from the pregenerated bundle
+    when it has them.
+    """
+
+    def __init__(self, catalog: SchemeCatalog, bundle: Optional[FAQBundle] = None):
+        self.bundle = bundle
+        self.attempts = 0
+        self.hits = 0
+        self.unexplained = 0  # one scheme matched, but other words sent the question to the LLM
+        self.pregenerated_hits = 0
+        self.total_seconds = 0.0
+        self._aliases = []  # (tokens, scheme), longest first
+        for scheme in catalog.schemes:
+            for alias in self._scheme_aliases(scheme):
+                tokens = tuple(_tokens(alias))
+                if tokens:
+                    self._aliases.append((tokens, scheme))
+        self._aliases.sort(key=lambda item: len(item[0]), reverse=True)
+        self._keyword_intents = {
+            word: intent for intent, words in INTENT_KEYWORDS.items() for word in words
+        }
+
+    @staticmethod
+    def _scheme_aliases(scheme: SchemeInfo) -> set:
+        names = {scheme.name, scheme.name_marathi, scheme.name_hindi}
+        names.update(t.name for t in scheme.translations.values())
+        if scheme.slug:
+            names.add(scheme.slug.replace("-", " "))
+        aliases = set()
+        for name in names:
+            aliases.add(name)
+            words = name.lower().split()
+            while words and words[-1] in SCHEME_SUFFIXES:
+                words = words[:-1]
+            if len(words) >= 2:
+                aliases.add(" ".join(words))
+        return aliases
+
+    def match(self, *texts: str) -> Optional[tuple]:
+        """Return (scheme, intents) for the first text whose words are all explained"""
+        for text in texts:
+            if not text:
+                continue
+            tokens = _tokens(text)
+            if not tokens:
+                continue
+
+            found = self._find_schemes(tokens)
+            if len(found) != 1:
+                continue
+            scheme, covered = next(iter(found.values()))
+
+            intents = []
+            for i, token in enumerate(tokens):
+                if i in covered:
+                    continue
+                intent = self._keyword_intents.get(token)
+                if intent:
+                    if intent not in intents:
+                        intents.append(intent)
+                elif token not in FILLER:
+                    break
+            else:
+                return scheme, intents or ["overview"]
+            self.unexplained += 1
+        return None
+
+    def lookup(self, lang: str, *texts: str) -> Optional[tuple]:
+        """(reply, source), source being "pregenerated" or "fast_path", or None to use the LLM"""
+        start = perf_counter()
+        self.attempts += 1
+        try:
+            matched = self.match(*texts)
+            if matched is None:
+                return None
+            scheme, intents = matched
+            self.hits += 1
+            if self.bundle is not None and len(intents) == 1:
+                reply = self.bundle.answer(scheme.id, lang, intents[0])
+                if reply is not None:
+                    self.pregenerated_hits += 1
+                    return reply, "pregenerated"
+            return render_answer(scheme, intents, lang), "fast_path"
+        finally:
+            self.total_seconds += perf_counter() - start
+
+    def stats(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.attempts if self.attempts else 0.0,
+            "pregenerated_hits": self.pregenerated_hits,
+            "unexplained": self.unexplained,
+            "avg_latency_us": self.total_seconds / self.attempts * 1e6 if self.attempts else 0.0
+        }
+
+    def _find_schemes(self, tokens: List[str]) -> dict:
+        """scheme id -> (scheme, covered token positions) for non-overlapping alias matches"""
+        found = {}
+        taken = set()
+        for alias, scheme in self._aliases:
+            n = len(alias)
+            for start in range(len(tokens) - n + 1):
+                span = range(start, start + n)
+                if taken.intersection(span):
+                    continue
+                window = tokens[start:start + n]
+                # Allow Marathi/Hindi inflection on the last word, e.g. भाग्यश्रीसाठी
+                if window[:-1] == list(alias[:-1]) and (
+                    window[-1] == alias[-1]
+                    or (alias[-1][0] >= "\u0900" and window[-1].startswith(alias[-1]))
+                ):
+                    taken.update(span)
+                    entry = found.setdefault(scheme.id, (scheme, set()))
+                    entry[1].update(span)
+        return found
+
+
+# ---------------- TEMPLATES ----------------
+def render_answer(scheme: SchemeInfo, intents: List[str], lang: str) -> str:
+    translation = scheme.translations.get(lang) or scheme.translations.get("en")
+    labels = FIELD_LABELS.get(lang, FIELD_LABELS["en"])
+    name = translation.name if translation else scheme.name
+    lines = [f"{name}: {translation.description}" if translation else f"{name}: {scheme.description}"]
+
+    if "overview" in intents:
+        intents = ["eligibility", "benefits", "apply"]
+
+    for intent in intents:
+        if intent == "apply":
+            url = scheme.apply_url or "https://mahadbt.maharashtra.gov.in/"
+            lines.append(f"• {labels['apply']}: {APPLY_TEXT.get(lang, APPLY_TEXT['en']).format(url=url)}")
+        elif translation is not None:
+            values = getattr(translation, intent)
+            if values:
+                lines.append(f"• {labels[intent]}: " + "; ".join(values))
+        elif intent in ("eligibility", "benefits"):
+            lines.append(f"• {labels[intent]}: {getattr(scheme, intent)}")
+
+    return "\n".join(lines)
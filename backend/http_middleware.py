@@ -0,0 +1,280 @@
+import gzip
+import json
+from collections import OrderedDict
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+
+# ---------------- CORS ----------------
+class OpenCORSMiddleware:
+    """Open CORS policy with every header precomputed at startup.
+
+    A pure ASGI replacement for the per-request Python middleware: preflight
+    OPTIONS requests are answered here without reaching the app, and other
+    responses only get the precomputed headers appended. With credentials
+    allowed browsers ignore '*', so the request Origin is echoed back and a
+    preflight's requested method and headers are granted by name.
+    """
+
+    def __init__(self, app, allow_credentials: bool = True, max_age: int = 600):
+        self.app = app
+        self.allow_credentials = allow_credentials
+        preflight = [
+            (b"access-control-max-age", str(max_age).encode()),
+            (b"content-length", b"0"),
+            (b"vary", b"Origin, Access-Control-Request-Method, Access-Control-Request-Headers"),
+        ]
+        simple = [(b"vary", b"Origin")]
+        if allow_credentials:
+            preflight.append((b"access-control-allow-credentials", b"true"))
+            simple.append((b"access-control-allow-credentials", b"true"))
+        self.preflight_headers = preflight
+        self.simple_headers = simple
+
+    def preflight_grants(self, request_method, request_headers) -> list:
+        if not self.allow_credentials:
+            return [(b"access-control-allow-methods", b"*"), (b"access-control-allow-headers", b"*")]
+        grants = [(b"access-control-allow-methods", request_method or b"GET, POST, PUT, PATCH, DELETE, OPTIONS")]
+        if request_headers:
+            grants.append((b"access-control-allow-headers", request_headers))
+        return grants
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = request_method = request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+        allow_origin = origin if self.allow_credentials and origin is not None else b"*"
+
+        if scope["method"] == "OPTIONS":
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"access-control-allow-origin", allow_origin),
+                    *self.preflight_grants(request_method, request_headers),
+                    *self.preflight_headers
+                ]
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"access-control-allow-origin", allow_origin),
+                    *self.simple_headers
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+
+# ---------------- UPLOAD LIMIT ----------------
+class UploadLimitMiddleware:
+    """413 for POSTs under path_prefix whose Content-Length exceeds max_bytes.
+
+    Checked from the request headers before anything reads the body, so an
+    oversized multipart upload is refused without being received.
+    """
+
+    def __init__(self, app, path_prefix: str, max_bytes: int, detail: str = "Request body too large"):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.max_bytes = max_bytes
+        self.body = json.dumps({"detail": detail}).encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"].startswith(self.path_prefix):
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > self.max_bytes:
+                        await send({
+                            "type": "http.response.start",
+                            "status": 413,
+                            "headers": [
+                                (b"content-type", b"application/json"),
+                                (b"content-length", str(len(self.body)).encode()),
+                            ]
+                        })
+                        await send({"type": "http.response.body", "body": self.body})
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+
+# ---------------- COMPRESSION ----------------
+COMPRESSIBLE_TYPES = (b"application/json", b"text/plain", b"text/html", b"application/javascript", b"text/css")
+
+
+def accepted_encoding(accept_encoding: bytes) -> Optional[str]:
+    """'br' or 'gzip' from an Accept-Encoding header, preferring brotli when it is installed"""
+    offered = {}
+    for part in accept_encoding.decode("latin-1").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip()] = q
+    if brotli is not None and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", offered.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+
+class ResponseCompressor:
+    """Compresses response bodies, caching the result for bodies that carry an ETag.
+
+    ETags here are content hashes (the scheme catalog), so each representation
+    is compressed once and served from a small LRU after that.
+    """
+
+    def __init__(self, minimum_size: int = 1024, gzip_level: int = 5, brotli_quality: int = 4,
+                 cache_entries: int = 64):
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_entries = cache_entries
+        self._cache: "OrderedDict[tuple, bytes]" = OrderedDict()  # (etag, size, encoding) -> body
+        self.compressed = 0
+        self.cache_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def compress(self, body: bytes, encoding: str, etag: Optional[bytes] = None) -> bytes:
+        key = (etag, len(body), encoding)
+        if etag is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return cached
+
+        if encoding == "br":
+            compressed = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        self.compressed += 1
+        self.bytes_in += len(body)
+        self.bytes_out += len(compressed)
+
+        if etag is not None:
+            self._cache[key] = compressed
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return compressed
+
+    def stats(self) -> dict:
+        return {
+            "brotli": brotli is not None,
+            "minimum_size": self.minimum_size,
+            "compressed": self.compressed,
+            "cache_hits": self.cache_hits,
+            "cached": len(self._cache),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": self.bytes_out / self.bytes_in if self.bytes_in else 0.0
+        }
+
+
+class CompressionMiddleware:
+    """Negotiated brotli/gzip for complete JSON and text bodies above the compressor's minimum size.
+
+    Streamed responses (SSE, NDJSON, audio) pass through untouched so tokens
+    and segments are not held back by the compressor, as do ranges and bodies
+    that are already encoded.
+    """
+
+    def __init__(self, app, compressor: Optional[ResponseCompressor] = None):
+        self.app = app
+        self.compressor = compressor or ResponseCompressor()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                encoding = accepted_encoding(value)
+                break
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                if compressible(message):
+                    start = message
+                else:
+                    passthrough = True
+                    await send(message)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.compressor.minimum_size:
+                # Streaming or too small to be worth it: release the held start as-is
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            headers = [(k, v) for k, v in start["headers"] if k not in (b"content-length", b"etag")]
+            etag = next((v for k, v in start["headers"] if k == b"etag"), None)
+            if etag is not None:
+                # The encoded bytes are a different representation, so the validator becomes weak
+                headers.append((b"etag", etag if etag.startswith(b"W/") else b"W/" + etag))
+            body = self.compressor.compress(body, encoding, etag)
+            headers.extend([
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(body)).encode()),
+                (b"vary", b"Accept-Encoding"),
+            ])
+            start["headers"] = headers
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def compressible(start: dict) -> bool:
+    if start["status"] != 200:
+        return False
+    content_type = b""
+    for name, value in start.get("headers", []):
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value
+    return content_type.startswith(COMPRESSIBLE_TYPES)
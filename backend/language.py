@@ -0,0 +1,164 @@
+import re
+from functools import lru_cache
+
+
+# ---------------- LEXICON ----------------
+# token -> {lang: weight}. Words shared by Hindi and Marathi carry weight for both.
+_MARATHI = {
+    # Devanagari
+    "आहे": 3, "आहेत": 3, "काय": 3, "कसा": 3, "कसे": 2, "कशी": 3, "साठी": 3, "मिळते": 3,
+    "मिळेल": 3, "मिळतो": 3, "मला": 3, "तुम्ही": 3, "आम्ही": 3, "करायचा": 3, "करायचे": 3,
+    "करावा": 3, "करावे": 2, "कोणती": 3, "कोणत्या": 3, "कोणते": 3, "पाहिजे": 3, "सांगा": 3,
+    "माहिती": 1, "शेतकरी": 2, "शेतकऱ्यांसाठी": 3, "किती": 1, "कुठे": 3, "केव्हा": 3,
+    "अर्ज": 2, "आणि": 3, "पण": 2, "नाही": 1, "लागतात": 3, "मध्ये": 3, "कागदपत्रे": 3,
+    "योजनेसाठी": 3, "योजनेची": 3, "मुलींसाठी": 3, "महिलांसाठी": 3, "का": 1,
+    # Romanized
+    "aahe": 3, "ahe": 3, "aahet": 3, "kay": 3, "kasa": 3, "kase": 2, "kashi": 3, "sathi": 3,
+    "milte": 3, "milel": 3, "milto": 3, "mala": 3, "tumhi": 3, "amhi": 3, "karaycha": 3,
+    "karayche": 3, "karava": 3, "konti": 3, "kontya": 3, "konte": 3, "pahije": 3, "sanga": 3,
+    "mahiti": 2, "shetkari": 2, "kuthe": 3, "kevha": 3, "arj": 2, "ani": 2, "majhi": 1,
+    "maza": 2, "mazi": 2, "lagtat": 3, "madhye": 3, "kagadpatre": 3, "ka": 1, "nahi": 1,
+}
+
+_HINDI = {
+    # Devanagari
+    "है": 3, "हैं": 3, "क्या": 3, "कैसे": 3, "कौन": 3, "कौनसी": 3, "के": 2, "की": 2,
+    "का": 1, "में": 3, "लिए": 3, "मुझे": 3, "आप": 2, "नहीं": 3, "चाहिए": 3, "मिलता": 3,
+    "मिलती": 3, "मिलेगा": 3, "करें": 3, "बताइए": 3, "बताओ": 3, "किसान": 2, "कहाँ": 3,
+    "कहां": 3, "कब": 2, "कितना": 3, "कितनी": 3, "और": 3, "यह": 2, "वह": 2, "होता": 2,
+    "सकता": 3, "सकते": 3, "आवेदन": 2, "दस्तावेज": 2, "महिलाओं": 3, "किसानों": 3,
+    "योजना": 0.5, "नाही": 0,
+    # Romanized
+    "kya": 3, "kaise": 3, "kaun": 3, "kaunsi": 3, "konsi": 3, "hai": 3, "hain": 3,
+    "ke": 2, "ki": 2, "mein": 3, "me": 1, "liye": 3, "mujhe": 3, "aap": 2, "nahin": 3,
+    "chahiye": 3, "milta": 3, "milti": 3, "milega": 3, "kare": 2, "karen": 3, "batao": 3,
+    "bataiye": 3, "kisan": 2, "kahan": 3, "kab": 2, "kitna": 3, "kitni": 3, "aur": 3,
+    "yeh": 2, "ye": 1, "sakta": 3, "sakte": 3, "hota": 2, "aavedan": 2, "yojana": 0.5,
+    "ka": 1, "nahi": 1, "hoon": 3, "hun": 2,
+}
+
+_ENGLISH = {
+    "what": 3, "how": 3, "who": 3, "which": 3, "is": 2, "are": 2, "the": 3, "for": 2,
+    "of": 2, "to": 2, "can": 2, "apply": 2, "scheme": 2, "schemes": 2, "eligibility": 3,
+    "eligible": 3, "benefit": 3, "benefits": 3, "documents": 3, "required": 3, "get": 2,
+    "i": 2, "my": 2, "please": 3, "tell": 2, "about": 3, "and": 2, "in": 1, "when": 3,
+    "where": 3, "do": 2, "does": 3, "need": 2, "farmer": 2, "farmers": 2, "women": 2,
+    "girl": 2, "student": 2, "students": 2, "senior": 2, "citizens": 2, "pension": 1,
+    "health": 2, "money": 2, "much": 2, "there": 2, "any": 2, "hello": 1, "hi": 1,
+}
+
+# Token bigrams that are much more telling than their parts
+_BIGRAMS = {
+    ("kay", "aahe"): {"mr": 4}, ("kay", "ahe"): {"mr": 4}, ("kasa", "karaycha"): {"mr": 4},
+    ("ke", "liye"): {"hi": 4}, ("kaise", "kare"): {"hi": 4}, ("kya", "hai"): {"hi": 4},
+    ("काय", "आहे"): {"mr": 4}, ("के", "लिए"): {"hi": 4}, ("क्या", "है"): {"hi": 4},
+}
+
+# Marathi attaches postpositions to the noun; Hindi keeps them as separate words
+_MARATHI_SUFFIXES = ("साठी", "च्या", "मध्ये", "ांना", "ाला", "ीला", "ची", "चे")
+
+LANGUAGES = ("en", "hi", "mr")
+
+
+def _weights(weights: dict) -> tuple:
+    return tuple(float(weights.get(lang, 0)) for lang in LANGUAGES)
+
+
+# Flattened for the hot loop: token -> (en, hi, mr) weights, and first token -> {second token: weights}
+LEXICON: dict = {}
+for _lang, _words in (("mr", _MARATHI), ("hi", _HINDI), ("en", _ENGLISH)):
+    for _word, _weight in _words.items():
+        if _weight:
+            LEXICON.setdefault(_word, {})[_lang] = _weight
+LEXICON = {word: _weights(weights) for word, weights in LEXICON.items()}
+
+BIGRAMS: dict = {}
+for (_first, _second), _weight in _BIGRAMS.items():
+    BIGRAMS.setdefault(_first, {})[_second] = _weights(_weight)
+
+TOKEN_RE = re.compile(r"[\u0900-\u097F]+|[a-z]+")
+# Same tokens as TOKEN_RE for ASCII text, without the regex: anything but a-z becomes a separator
+_ASCII_WORDS = str.maketrans({chr(i): chr(i) if "a" <= chr(i) <= "z" else " " for i in range(128)})
+
+
+# ---------------- DETECTION ----------------
+def language_scores(text: str) -> tuple:
+    """One pass over the tokens: (scores per language, devanagari token count, latin token count)"""
+    en = hi = mr = 0.0
+    devanagari = latin = 0
+    following = None  # bigrams that start with the previous token
+
+    text = text.lower()
+    mixed = not text.isascii()  # only then can a token be Devanagari
+    if mixed:
+        tokens = TOKEN_RE.findall(text)
+    else:
+        tokens = text.translate(_ASCII_WORDS).split()
+        latin = len(tokens)
+
+    for token in tokens:
+        weights = LEXICON.get(token)
+        if mixed:
+            if token[0] >= "\u0900":
+                devanagari += 1
+                if weights is None and token.endswith(_MARATHI_SUFFIXES):
+                    mr += 1
+            else:
+                latin += 1
+        if weights is not None:
+            en += weights[0]
+            hi += weights[1]
+            mr += weights[2]
+
+        if following is not None:
+            weights = following.get(token)
+            if weights is not None:
+                en += weights[0]
+                hi += weights[1]
+                mr += weights[2]
+        following = BIGRAMS.get(token)
+
+    return {"en": en, "hi": hi, "mr": mr}, devanagari, latin
+
+
+@lru_cache(maxsize=4096)
+def analyze_language(text: str) -> tuple:
+    """(language, romanized) from one scoring pass, memoized so detection and the transliteration gate share it"""
+    scores, devanagari, latin = language_scores(text)
+    indic = "mr" if scores["mr"] > scores["hi"] else "hi"
+
+    if devanagari and devanagari >= latin:
+        # Devanagari script: Hindi unless Marathi evidence wins
+        return indic, False
+
+    if scores[indic] > scores["en"]:
+        # Romanized only when no token is Devanagari: the input the transliterator converts
+        return indic, not devanagari and latin > 0
+    return "en", False
+
+
+def fast_detect_language(text: str) -> str:
+    return analyze_language(text)[0]
+
+
+def is_romanized_indic(text: str) -> bool:
+    """True when Latin-script text reads as romanized Hindi/Marathi rather than English"""
+    return analyze_language(text)[1]
+
+
+# ---------------- TRANSLITERATION ----------------
+@lru_cache(maxsize=1)
+def _sanscript():
+    # indic_transliteration is slow to import and only needed for romanized input
+    from indic_transliteration import sanscript
+    return sanscript
+
+@lru_cache(maxsize=4096)
+def transliterate_if_roman(text: str) -> str:
+    sanscript = _sanscript()
+    try:
+        converted = sanscript.transliterate(text, sanscript.HK, sanscript.DEVANAGARI)
+
+        return converted if converted != text else text
+    except Exception:
+        return text
@@ -1,20 +1,43 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile, Request, Response
-from fastapi.responses import StreamingResponse
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi import (
+    Depends, FastAPI, HTTPException, File, Header, UploadFile, Request, Response, Query, WebSocket, WebSocketDisconnect
+)
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field, field_validator
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from groq import Groq
+import asyncio
+import hmac
 import logging
 import os
+import threading
 import io
+import math
 import uuid
-import tempfile
-from time import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from time import perf_counter, time
 from dotenv import load_dotenv
-from typing import Optional
-from indic_transliteration import sanscript
-from indic_transliteration.sanscript import transliterate
+from typing import List, Optional
+from answer_cache import AnswerCache, normalize_question
+from scheme_catalog import MAX_PAGE_SIZE, SchemeCatalog, SchemeInfo
+from retrieval import SchemeRetriever, build_scheme_context, format_scheme_facts
+from context_builder import PromptContext, build_prompt_context, estimate_tokens
+from fast_path import FastPathMatcher
+from faq_bundle import build_faq_bundle, build_lock, faq_question, open_faq_bundle
+from language import fast_detect_language, is_romanized_indic, transliterate_if_roman
+from conversation_store import create_conversation_store
+from audio_store import AudioBlob, AudioStore, parse_range
+from fast_json import FastJSONResponse, from_json, to_json
+from http_middleware import CompressionMiddleware, OpenCORSMiddleware, ResponseCompressor, UploadLimitMiddleware
+from audio_codec import VARIANTS, TranscodeError, Transcoder, choose_variant, variant_key
+from tts_cache import TTSCache, tts_cache_key
+from shared_state import FAILED, PENDING, READY, create_shared_state
+from speech_pipeline import AudioStream, SpeechSegmenter
+from voice_activity import EnergyVAD, pcm_to_wav
+from single_flight import SharedStream, SingleFlight
+from metrics import REGISTRY, STAGE_SECONDS, MetricsMiddleware, RequestProfiler, timed
+from upstream import (
+    CircuitBreaker, LatencyWindow, ModelRoute, RateLimiter, ResilientChain, UpstreamUnavailable, is_retryable
+)
 
 
 load_dotenv()
@@ -30,28 +53,48 @@ app = FastAPI(
     version="2.0.0"
 )
 
-# ---------------- CORS CONFIGURATION ----------------
+# ---------------- COMPRESSION ----------------
+# gzip (or brotli, when installed) for complete JSON/text bodies of at least COMPRESS_MIN_BYTES
+response_compressor = ResponseCompressor(minimum_size=int(os.getenv("COMPRESS_MIN_BYTES", "1024")))
+app.add_middleware(CompressionMiddleware, compressor=response_compressor)
+
+# Oversized voice uploads are rejected before the multipart body is read (64 KiB allows for the form fields)
+VOICE_MAX_BYTES = int(os.getenv("VOICE_MAX_BYTES", str(10 * 1024 * 1024)))
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, specify exact origins like ["http://localhost:8080"]
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    UploadLimitMiddleware, path_prefix="/chat/voice", max_bytes=VOICE_MAX_BYTES + 64 * 1024,
+    detail="Audio file too large"
 )
 
-@app.middleware("http")
-async def force_options_middleware(request: Request, call_next):
-    if request.method == "OPTIONS":
-        return Response(status_code=200, headers={
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "*",
-            "Access-Control-Allow-Headers": "*",
-        })
-    return await call_next(request)
+# ---------------- ADMIN ----------------
+# One operator token guards on-demand profiling and the maintenance endpoints (answer cache flush,
+# scheme reload). PROFILE_TOKEN is still read for older deployments; with neither set they answer 403
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or os.getenv("PROFILE_TOKEN") or None
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency for endpoints that cost money or drop caches; expects the X-Admin-Token header"""
+    if (
+        ADMIN_TOKEN is None
+        or x_admin_token is None
+        or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode())
+    ):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+# ---------------- METRICS ----------------
+# PROFILE_DIR enables per-request cProfile dumps for a PROFILE_SAMPLE_RATE sample of requests, and on
+# demand for requests sending "X-Profile: <ADMIN_TOKEN>" (never without a token)
+request_profiler = RequestProfiler(
+    os.getenv("PROFILE_DIR") or None,
+    sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+    token=ADMIN_TOKEN
+)
+
+app.add_middleware(MetricsMiddleware, profiler=request_profiler)
 
-@app.options("/{path:path}")
-async def options_handler(path: str):
-    return {}
+# ---------------- CORS CONFIGURATION ----------------
+# Any origin, credentials allowed; preflights are answered from precomputed headers and cached
+# by browsers for CORS_MAX_AGE seconds. In production, restrict origins at the proxy.
+# Added last so it is outermost: early responses such as the upload 413 also carry CORS headers.
+app.add_middleware(OpenCORSMiddleware, allow_credentials=True, max_age=int(os.getenv("CORS_MAX_AGE", "600")))
 
 # ---------------- LANGUAGES ----------------
 LANGUAGE_MAP = {
@@ -78,6 +121,28 @@ class ChatResponse(BaseModel):
     conversation_id: str
     status: str = "success"
     audio_url: Optional[str] = None
+    usage: Optional[dict] = None
+    timestamp: float
+
+# Gateways (SMS/IVR) forward messages in bulk through /chat/batch
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+class ChatBatchRequest(BaseModel):
+    items: List[ChatRequest] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+    stream: bool = False  # NDJSON, one line per item as it completes
+
+class ChatBatchItem(BaseModel):
+    index: int
+    status: str  # 'success' or 'error'
+    result: Optional[ChatResponse] = None
+    error: Optional[dict] = None  # {"status_code", "detail"}
+
+class ChatBatchResponse(BaseModel):
+    items: List[ChatBatchItem]
+    succeeded: int
+    failed: int
+    deduplicated: int
     timestamp: float
 
 class VoiceChatResponse(BaseModel):
@@ -87,152 +152,127 @@ class VoiceChatResponse(BaseModel):
     conversation_id: str
     status: str = "success"
     audio_url: Optional[str] = None
+    usage: Optional[dict] = None
     timestamp: float
 
-class SchemeInfo(BaseModel):
-    id: int
-    name: str
-    name_marathi: str
-    name_hindi: str
-    category: str
-    description: str
-    eligibility: str
-    benefits: str
-
-# ---------------- AI INITIALIZATION ----------------
-# Check if API key exists
-if not os.getenv("GROQ_API_KEY"):
-    logger.error("GROQ_API_KEY not found in environment variables!")
-    raise ValueError("GROQ_API_KEY is required. Please set it in your .env file")
-
-llm = ChatGroq(
-    model="llama-3.3-70b-versatile",
-    temperature=0.3,
-    max_tokens=800,
-    timeout=30
+# ---------------- SCHEME DATA ----------------
+SCHEME_DATA_PATH = os.getenv(
+    "SCHEME_DATA_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "schemes.json")
 )
 
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# Loaded once at startup; POST /schemes/reload picks up edits to the data file
+scheme_catalog = SchemeCatalog.load(SCHEME_DATA_PATH)
 
 # ---------------- CONVERSATION STORAGE ----------------
-# In production, use Redis or a database
-conversations = {}
-
-# ---------------- ENHANCED PROMPTS ----------------
-prompt = ChatPromptTemplate.from_messages([
-    ("system", """
-You are **JanSeva Assistant (जनसेवा सहाय्यक)** — an official AI assistant for
-**Maharashtra Government Schemes**.
-
-==================================================
-MANDATORY LANGUAGE CONTROL
-==================================================
-You MUST respond ONLY in the language specified below.
-
-Target language code: {lang}
-
-Language rules:
-- en → Respond ONLY in English
-- hi → Respond ONLY in Hindi (हिंदी) using Devanagari
-- mr → Respond ONLY in Marathi (मराठी) using Devanagari
-- NEVER mix languages
-- NEVER switch language on your own
-- Romanized Hindi/Marathi input is already normalized internally
-
-==================================================
-SCOPE (STRICT)
-==================================================
-Answer ONLY about:
-- ACTIVE Maharashtra Government schemes
-- Citizens: women, students, farmers, senior citizens, poor, disabled, youth
-- State schemes + Central schemes applicable in Maharashtra
-
-If user asks:
-- About other states → politely redirect to Maharashtra
-- About inactive/discontinued schemes → clearly say it is inactive
-- General/non-scheme questions → redirect to scheme-related help
-
-==================================================
-ANSWER FORMAT (MANDATORY)
-==================================================
-Keep answers concise (3–6 lines).
-
-Include:
-• Scheme name (in target language)
-• Eligibility criteria
-• Key benefits
-• How to apply (official portal / office)
-
-Use bullet points where appropriate.
-Avoid long paragraphs.
-
-==================================================
-TONE & STYLE
-==================================================
-- Respectful, government-official tone
-- Helpful and citizen-friendly
-- Use honorifics:
-  - Hindi → आप
-  - Marathi → तुम्ही
-- Clear, simple language (for non-technical users)
-
-==================================================
-IMPORTANT BEHAVIOR
-==================================================
-- Do NOT hallucinate scheme details
-- If unsure, say information is unavailable
-- Prefer official portals (Mahadbt, department offices)
-- Do NOT include emojis
-- Do NOT include unnecessary explanations
-
-==================================================
-REFERENCE SCHEMES (EXAMPLES, NOT LIMIT)
-==================================================
-- माझी कन्या भाग्यश्री योजना / Majhi Kanya Bhagyashree Yojana
-- लेक लाडकी योजना / Lek Ladki Yojana
-- श्रावण बाल योजना / Shravan Bal Yojana
-- महात्मा ज्योतिबा फुले जन आरोग्य योजना
-- शेतकरी सन्मान निधी योजना
-- प्रधानमंत्री आवास योजना
-- स्वाधार गृह योजना
-
-==================================================
-EXAMPLES
-==================================================
-
-User (mr): माझी कन्या भाग्यश्री योजना काय आहे?
-Assistant (mr):
-माझी कन्या भाग्यश्री योजना ही मुलींच्या कल्याणासाठीची योजना आहे.
-
-• पात्रता: वार्षिक उत्पन्न ₹1 लाखांपेक्षा कमी
-• लाभ: दोन मुलींसाठी ₹50,000 पर्यंत मदत
-• अर्ज: महाडीबीटी पोर्टल किंवा महिला व बाल विकास कार्यालय
-
----
-
-User (hi): महिलाओं के लिए कौन सी योजना है?
-Assistant (hi):
-महाराष्ट्र सरकार महिलाओं के लिए कई योजनाएँ चलाती है।
-
-• लेक लाडकी योजना – आर्थिक सहायता
-• पात्रता: पीला/नारंगी राशन कार्ड
-• आवेदन: महिला एवं बाल विकास विभाग
-
----
-
-User (en): How to apply for farmer schemes?
-Assistant (en):
-Farmers in Maharashtra can apply for the following schemes:
-
-• Shetkari Sanman Nidhi – ₹6,000 per year
-• Eligibility: Registered landholding farmers
-• Apply via Mahakisan portal or agriculture office
-"""),
-    ("human", "{user_input}")
-])
+# Backend chosen by CONVERSATION_BACKEND (defaults to SHARED_STATE_BACKEND): memory, sqlite or redis
+conversation_store = create_conversation_store()
+
+# ---------------- ANSWER CACHE ----------------
+answer_cache = AnswerCache(
+    max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "5000")),
+    max_bytes=int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+    ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+    # Near-duplicate reuse is opt-in, e.g. ANSWER_CACHE_SIMILARITY=0.9
+    similarity_threshold=float(os.getenv("ANSWER_CACHE_SIMILARITY", "0")),
+    version=scheme_catalog.version
+)
 
-detect_prompt = ChatPromptTemplate.from_messages([
-    ("system", """
+# ---------------- AI INITIALIZATION ----------------
+# langchain, the Groq SDK and httpx take most of the import time, so the clients,
+# prompts and chain are built by init_llm(): in the startup warm-up, or on first use
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None  # e.g. benchmarks/fake_groq.py for local testing
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+GROQ_FALLBACK_MODEL = os.getenv("GROQ_FALLBACK_MODEL", "llama-3.1-8b-instant")  # empty disables fallback
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "20"))
+
+groq_http_client = None  # one keep-alive connection pool shared by every Groq call (chat and Whisper)
+groq_async_client = None
+primary_route = None
+fallback_route = None
+llm = None
+prompt = None
+chain = None
+detect_chain = None
+_llm_init_lock = threading.Lock()
+
+def groq_chat_model(model: str):
+    from langchain_groq import ChatGroq
+
+    return ChatGroq(
+        model=model,
+        temperature=0.3,
+        max_tokens=800,
+        timeout=GROQ_TIMEOUT,
+        max_retries=0,  # retries are handled by ResilientChain
+        base_url=GROQ_BASE_URL,
+        http_async_client=groq_http_client
+    )
+
+def model_route(model: str, rpm: float, tpm: float) -> ModelRoute:
+    return ModelRoute(
+        model,
+        groq_chat_model(model),
+        RateLimiter(rpm, tpm),
+        CircuitBreaker(
+            failure_threshold=int(os.getenv("GROQ_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("GROQ_BREAKER_RESET", "30"))
+        ),
+        LatencyWindow(window=float(os.getenv("GROQ_LATENCY_WINDOW", "60")))
+    )
+
+def init_llm():
+    """Build the Groq clients, prompts and chain once; safe to call from any thread"""
+    global groq_http_client, groq_async_client, primary_route, fallback_route, llm, prompt, chain, detect_chain
+
+    with _llm_init_lock:
+        if chain is not None:
+            return
+        if not os.getenv("GROQ_API_KEY"):
+            logger.error("GROQ_API_KEY not found in environment variables!")
+            raise HTTPException(status_code=503, detail="Assistant is not configured (GROQ_API_KEY missing)")
+
+        import httpx
+        from groq import AsyncGroq
+        from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+        groq_http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("GROQ_MAX_CONNECTIONS", "100")),
+                max_keepalive_connections=int(os.getenv("GROQ_MAX_KEEPALIVE", "20")),
+                keepalive_expiry=60
+            ),
+            timeout=httpx.Timeout(GROQ_TIMEOUT, connect=5.0)
+        )
+
+        # Quotas per model (requests and tokens per minute); 0 disables the limit
+        primary_route = model_route(
+            GROQ_MODEL,
+            float(os.getenv("GROQ_RPM", "1000")),
+            float(os.getenv("GROQ_TPM", "300000"))
+        )
+        fallback_route = model_route(
+            GROQ_FALLBACK_MODEL,
+            float(os.getenv("GROQ_FALLBACK_RPM", "1000")),
+            float(os.getenv("GROQ_FALLBACK_TPM", "250000"))
+        ) if GROQ_FALLBACK_MODEL else None
+        llm = primary_route.model
+
+        groq_async_client = AsyncGroq(
+            api_key=os.getenv("GROQ_API_KEY"),
+            base_url=GROQ_BASE_URL,
+            http_client=groq_http_client
+        )
+
+        # The system prompt is assembled per request by context_builder from cached fragments
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", "{system}"),
+            MessagesPlaceholder("history"),
+            ("human", "{user_input}")
+        ])
+
+        detect_prompt = ChatPromptTemplate.from_messages([
+            ("system", """
 Detect the language of the text. Reply with ONLY ONE WORD:
 - english
 - hindi  
@@ -243,82 +283,399 @@ Detection hints:
 - Hindi: "kya", "kaise", "yojana", "labh", क्या, कैसे
 - Marathi: "kay", "kasa", "yojana", "aahe", काय, कसा
 """),
-    ("human", "{text}")
-])
+            ("human", "{text}")
+        ])
+        detect_chain = detect_prompt | llm
+
+        hedge_after = float(os.getenv("GROQ_HEDGE_AFTER", "2.5"))
+        chain = ResilientChain(
+            prompt,
+            primary_route,
+            fallback_route,
+            max_retries=int(os.getenv("GROQ_MAX_RETRIES", "2")),
+            hedge_after=hedge_after if hedge_after > 0 else None,
+            fallback_p95=float(os.getenv("GROQ_FALLBACK_P95", "8"))
+        )
+
+async def ensure_llm():
+    """Build the LLM stack off the event loop if the warm-up has not got there yet"""
+    if chain is None:
+        await asyncio.to_thread(init_llm)
+
+# ---------------- LLM EXECUTION ----------------
+def upstream_http_error(e: Exception) -> Optional[HTTPException]:
+    """503 with Retry-After for upstream overload, instead of a generic 500"""
+    if isinstance(e, UpstreamUnavailable):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    if is_retryable(e):
+        return HTTPException(status_code=503, detail="Assistant is busy, please try again", headers={"Retry-After": "1"})
+    return None
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "30"))
+
+
+class LLMExecutor:
+    """Runs chain calls natively async with bounded concurrency and a per-request deadline"""
+
+    def __init__(self, max_concurrency: int, deadline: float):
+        self.max_concurrency = max_concurrency
+        self.deadline = deadline
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    async def _acquire(self) -> float:
+        enqueued = time()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.deadline)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise HTTPException(status_code=503, detail="Assistant is busy, please try again")
+        finally:
+            self.waiting -= 1
 
-chain = prompt | llm
-detect_chain = detect_prompt | llm
+        waited = time() - enqueued
+        self.queue_wait_total += waited
+        self.queue_wait_max = max(self.queue_wait_max, waited)
+        self.in_flight += 1
+        return waited
 
+    def _release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
 
-def transliterate_if_roman(text: str) -> str:
-    try:
-        converted = transliterate(text, sanscript.HK, sanscript.DEVANAGARI)
+    async def invoke(self, runnable, inputs: dict):
+        waited = await self._acquire()
+        try:
+            result = await asyncio.wait_for(
+                runnable.ainvoke(inputs),
+                timeout=max(self.deadline - waited, 0.001)
+            )
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise HTTPException(status_code=504, detail="Assistant took too long to respond")
+        except Exception as e:
+            self.failed += 1
+            error = upstream_http_error(e)
+            if error is not None:
+                raise error from e
+            raise
+        finally:
+            self._release()
+
+    async def stream(self, runnable, inputs: dict):
+        """Yield chunks from runnable.astream under the same limit and deadline"""
+        waited = await self._acquire()
+        deadline_at = time() + self.deadline - waited
+        chunks = runnable.astream(inputs)
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(
+                        chunks.__anext__(),
+                        timeout=max(deadline_at - time(), 0.001)
+                    )
+                except StopAsyncIteration:
+                    break
+                yield chunk
+            self.completed += 1
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise HTTPException(status_code=504, detail="Assistant took too long to respond")
+        except Exception as e:
+            self.failed += 1
+            error = upstream_http_error(e)
+            if error is not None:
+                raise error from e
+            raise
+        finally:
+            await chunks.aclose()
+            self._release()
+
+    def stats(self) -> dict:
+        started = self.completed + self.failed + self.timeouts
+        return {
+            "max_concurrency": self.max_concurrency,
+            "deadline_seconds": self.deadline,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "avg_queue_wait_seconds": self.queue_wait_total / started if started else 0.0,
+            "max_queue_wait_seconds": self.queue_wait_max
+        }
 
-        return converted if converted != text else text
-    except Exception:
-        return text
 
-# ---------------- HELPER FUNCTIONS #
-# ---------------- HELPER FUNCTIONS #
+llm_executor = LLMExecutor(LLM_MAX_CONCURRENCY, LLM_DEADLINE)
+
+
+# ---------------- RETRIEVAL ----------------
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "3"))
+
+scheme_retriever = SchemeRetriever(scheme_catalog, use_embeddings=os.getenv("RAG_EMBEDDINGS", "1") == "1")
+
+def retrieve_scheme_facts(
+    processed_text: str,
+    lang: str,
+    raw_text: Optional[str] = None,
+    history: Optional[list] = None
+) -> Optional[str]:
+    """Top-k relevant scheme records rendered as prompt facts, or None when nothing matches"""
+    # Search the raw text too: romanized scheme names match the English catalog names
+    query = processed_text if raw_text is None or raw_text == processed_text else f"{raw_text}\n{processed_text}"
+    if history:
+        # Follow-ups like "how do I apply?" name no scheme; search them together with the previous question
+        previous = next((m["content"] for m in reversed(history) if m.get("role") == "user"), None)
+        if previous:
+            query = f"{previous}\n{query}"
+    with timed("retrieval"):
+        results = scheme_retriever.search(query, k=RAG_TOP_K)
+    return build_scheme_context(results, lang) if results else None
+
+# ---------------- CONTEXT BUDGET ----------------
+PROMPT_HISTORY_TOKENS = int(os.getenv("PROMPT_HISTORY_TOKENS", "600"))
+PROMPT_HISTORY_MESSAGES = int(os.getenv("PROMPT_HISTORY_MESSAGES", "6"))
+
+token_stats = {
+    "llm_calls": 0,
+    "estimated_calls": 0,
+    "prompt_tokens": 0,
+    "completion_tokens": 0
+}
 
-def is_devanagari(text: str) -> bool:
-    return any('\u0900' <= ch <= '\u097F' for ch in text)
+def chain_inputs(
+    processed_text: str,
+    lang: str,
+    raw_text: Optional[str] = None,
+    history: Optional[list] = None
+) -> tuple:
+    """Prompt variables and the PromptContext they were built from"""
+    context = build_prompt_context(
+        processed_text,
+        lang,
+        retrieve_scheme_facts(processed_text, lang, raw_text, history),
+        history or [],
+        history_budget=PROMPT_HISTORY_TOKENS,
+        max_history_messages=PROMPT_HISTORY_MESSAGES
+    )
+    return {"system": context.system, "history": context.history, "user_input": processed_text}, context
+
+def llm_usage(context: PromptContext, reply: str, usage_metadata: Optional[dict]) -> dict:
+    """Token counts for one LLM call, as reported by Groq or estimated when it reports none"""
+    estimated = not usage_metadata
+    if estimated:
+        prompt_tokens, completion_tokens = context.prompt_tokens, estimate_tokens(reply)
+    else:
+        prompt_tokens = usage_metadata.get("input_tokens", 0)
+        completion_tokens = usage_metadata.get("output_tokens", 0)
 
+    token_stats["llm_calls"] += 1
+    token_stats["estimated_calls"] += estimated
+    token_stats["prompt_tokens"] += prompt_tokens
+    token_stats["completion_tokens"] += completion_tokens
+    return {
+        "source": "llm",
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "history_messages": context.history_messages,
+        "estimated": estimated
+    }
 
-def fast_detect_language(text: str) -> str:
-    # Devanagari detection
-    if any('\u0900' <= ch <= '\u097F' for ch in text):
-        # Simple Hindi vs Marathi heuristic
-        if any(word in text for word in ["आहे", "काय", "साठी", "मिळते"]):
-            return "mr"
-        return "hi"
+def ready_usage(source: str) -> dict:
+    return {
+        "source": source,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_tokens": 0,
+        "history_messages": 0,
+        "estimated": False
+    }
 
-    # Romanized hints
-    text_l = text.lower()
-    if any(w in text_l for w in ["aahe", "kay", "sathi", "milte"]):
-        return "mr"
-    if any(w in text_l for w in ["kya", "kaise", "liye", "yojana"]):
-        return "hi"
+def token_usage_stats() -> dict:
+    calls = token_stats["llm_calls"]
+    return {
+        **token_stats,
+        "avg_prompt_tokens": token_stats["prompt_tokens"] / calls if calls else 0.0,
+        "avg_completion_tokens": token_stats["completion_tokens"] / calls if calls else 0.0
+    }
 
-    return "en"
+# ---------------- FAST PATH ----------------
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "1") == "1"
+
+# Canonical answers and audio built offline (python pregenerate_faqs.py), served from a memory-mapped bundle
+FAQ_BUNDLE_PATH = os.getenv("FAQ_BUNDLE_PATH", "pregenerated/faq_bundle.bin")
+FAQ_PREGENERATE = os.getenv("FAQ_PREGENERATE", "0") == "1"
+
+faq_bundle = open_faq_bundle(FAQ_BUNDLE_PATH, scheme_catalog)
+
+fast_path = FastPathMatcher(scheme_catalog, bundle=faq_bundle)
+
+def lookup_ready_answer(
+    processed_text: str,
+    lang: str,
+    raw_text: Optional[str] = None,
+    history: Optional[list] = None
+) -> Optional[tuple]:
+    """(reply, source) from the pregenerated bundle, catalog templates or the answer cache, if any has one"""
+    if FAST_PATH_ENABLED:
+        with timed("fast_path"):
+            found = fast_path.lookup(lang, raw_text, processed_text)
+        if found is not None:
+            return found
+    # Mid-conversation the same words can mean something else ("how do I apply?")
+    if not history:
+        with timed("answer_cache"):
+            reply = answer_cache.get(processed_text, lang)
+        if reply is not None:
+            return reply, "cache"
+    return None
+
+# ---------------- REQUEST COALESCING ----------------
+# Identical first-turn questions asked concurrently share one LLM call
+llm_flight = SingleFlight()
+
+def start_llm_reply(
+    processed_text: str,
+    lang: str,
+    raw_text: Optional[str] = None,
+    history: Optional[list] = None,
+    streaming: bool = False
+) -> tuple:
+    """(SharedStream of reply text chunks, usage) for a new or already in-flight LLM call.
+
+    Coalesced callers get usage with source "coalesced": the tokens are counted once, for the leader.
+    """
+    def produce(call):
+        inputs, context = chain_inputs(processed_text, lang, raw_text, history)
+
+        async def chunks():
+            usage_metadata = None
+            parts = []
+            await ensure_llm()
+            started = perf_counter()
+            if streaming:
+                async for chunk in llm_executor.stream(chain, inputs):
+                    # Groq reports token usage on the final chunk
+                    usage_metadata = getattr(chunk, "usage_metadata", None) or usage_metadata
+                    if chunk.content:
+                        if not parts:
+                            STAGE_SECONDS.observe(perf_counter() - started, "llm_first_token")
+                        parts.append(chunk.content)
+                        yield chunk.content
+            else:
+                result = await llm_executor.invoke(chain, inputs)
+                usage_metadata = getattr(result, "usage_metadata", None)
+                parts.append(result.content)
+                yield result.content
+            STAGE_SECONDS.observe(perf_counter() - started, "llm")
+
+            reply = "".join(parts).strip()
+            if not history:
+                answer_cache.set(processed_text, lang, reply)
+            call.metadata["usage"] = llm_usage(context, reply, usage_metadata)
+
+        return chunks()
+
+    # Answers that depend on earlier turns are never shared
+    if history:
+        call = SharedStream()
+        call.start(produce(call))
+        return call, None
+    key = (normalize_question(processed_text), lang)
+    call, leader = llm_flight.stream(key, produce)
+    return call, None if leader else ready_usage("coalesced")
+
+async def generate_reply(
+    processed_text: str,
+    lang: str,
+    raw_text: Optional[str] = None,
+    history: Optional[list] = None
+) -> tuple:
+    """(reply, usage): fast path or cache when possible, otherwise a (possibly shared) LLM call"""
+    ready = lookup_ready_answer(processed_text, lang, raw_text, history)
+    if ready is not None:
+        reply, source = ready
+        return reply, ready_usage(source)
+
+    call, usage = start_llm_reply(processed_text, lang, raw_text, history)
+    reply = "".join(await call.result()).strip()
+    return reply, usage or call.metadata["usage"]
 
 
-# ----------------#
+# ---------------- HELPER FUNCTIONS #
 def detect_language(text: str, preferred_lang: Optional[str] = None) -> str:
     if preferred_lang in ["en", "hi", "mr"]:
         return preferred_lang
     return fast_detect_language(text)
 
-async def text_to_speech(text: str, lang: str) -> bytes:
-    try:
-        from gtts import gTTS
-        import io
+def preprocess_message(text: str, preferred_lang: Optional[str] = None) -> tuple:
+    """Detect language and normalize romanized Hindi/Marathi to Devanagari"""
+    with timed("detect_language"):
+        lang = detect_language(text, preferred_lang)
 
-        # Sanitize text for TTS
-        text = sanitize_for_tts(text, lang)
+    # Only romanized Hindi/Marathi is transliterated; English typed with hi/mr selected is kept as-is
+    if lang in ["hi", "mr"] and is_romanized_indic(text):
+        with timed("transliterate"):
+            processed_text = transliterate_if_roman(text)
+    else:
+        processed_text = text
 
-        # Map languages to gTTS codes
-        language_map = {
-            "en": "en",
-            "hi": "hi",
-            "mr": "mr"
-        }
+    return lang, processed_text
 
-        tts_lang = language_map.get(lang, "en")
+# gTTS is blocking network I/O, so it runs on its own pool sized independently of the request path
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "8"))
+tts_executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
 
-        # Generate TTS
-        tts = gTTS(text=text, lang=tts_lang, slow=False)
-        
-        # Save to bytes
-        audio_buffer = io.BytesIO()
-        tts.write_to_fp(audio_buffer)
-        audio_buffer.seek(0)
-        
-        return audio_buffer.getvalue()
+@lru_cache(maxsize=1)
+def gtts_class():
+    """gTTS, imported once on first use or by the warm-up"""
+    from gtts import gTTS
+    return gTTS
+
+def synthesize_speech(text: str, lang: str) -> bytes:
+    """Blocking gTTS synthesis; call through text_to_speech()"""
+    gTTS = gtts_class()
 
+    # Sanitize text for TTS
+    text = sanitize_for_tts(text, lang)
+
+    # Map languages to gTTS codes
+    language_map = {
+        "en": "en",
+        "hi": "hi",
+        "mr": "mr"
+    }
+
+    tts_lang = language_map.get(lang, "en")
+
+    # Generate TTS
+    tts = gTTS(text=text, lang=tts_lang, slow=False)
+
+    # Save to bytes
+    audio_buffer = io.BytesIO()
+    tts.write_to_fp(audio_buffer)
+    return audio_buffer.getvalue()
+
+async def text_to_speech(text: str, lang: str) -> bytes:
+    try:
+        loop = asyncio.get_running_loop()
+        with timed("tts"):
+            return await loop.run_in_executor(tts_executor, synthesize_speech, text, lang)
     except Exception as e:
         logger.error(f"TTS error: {e}")
         raise HTTPException(status_code=500, detail="Text-to-speech failed")
+
 import re
 
 def sanitize_for_tts(text: str, lang: str) -> str:
@@ -339,44 +696,430 @@ def sanitize_for_tts(text: str, lang: str) -> str:
 
     return text.strip()
 
+VOICE_MAX_SECONDS = float(os.getenv("VOICE_MAX_SECONDS", "120"))
+
+def wav_duration(f) -> Optional[float]:
+    """Duration of a RIFF/WAVE upload from its header, or None for other containers"""
+    header = f.read(44)
+    f.seek(0)
+    if len(header) < 44 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    byte_rate = int.from_bytes(header[28:32], "little")
+    if byte_rate == 0:
+        return None
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(0)
+    return (size - 44) / byte_rate
+
 async def transcribe_audio(audio: UploadFile) -> str:
-    """Transcribe audio using Groq Whisper"""
+    """Transcribe an uploaded recording using Groq Whisper"""
+    # The multipart parser already spooled the upload; hand that buffer to the
+    # client as-is instead of copying it through a temp file
+    size = audio.size
+    if size is None:
+        audio.file.seek(0, os.SEEK_END)
+        size = audio.file.tell()
+    if size > VOICE_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Audio file too large")
+    if size == 0:
+        raise HTTPException(status_code=400, detail="Audio file is empty")
+
+    audio.file.seek(0)
+    duration = wav_duration(audio.file)
+    if duration is not None and duration > VOICE_MAX_SECONDS:
+        raise HTTPException(status_code=413, detail="Audio recording too long")
+
+    return await transcribe_file(
+        audio.filename or "audio.webm", audio.file, audio.content_type or "application/octet-stream"
+    )
+
+async def transcribe_file(filename: str, file, content_type: str) -> str:
+    """Transcribe a validated audio file object using Groq Whisper"""
+    await ensure_llm()
     try:
-        content = await audio.read()
-        suffix = os.path.splitext(audio.filename)[1] or ".webm"
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(content)
-            path = tmp.name
-        
-        try:
-            with open(path, "rb") as f:
-                transcription = groq_client.audio.transcriptions.create(
-                    file=(audio.filename, f.read()),
-                    model="whisper-large-v3-turbo",
-                    response_format="text",
-                    language="auto"  # Auto-detect language
-                )
-            return transcription
-        finally:
-            os.remove(path)
+        with timed("transcribe"):
+            transcription = await groq_async_client.audio.transcriptions.create(
+                file=(filename, file, content_type),
+                model="whisper-large-v3-turbo",
+                response_format="text",
+                language="auto"  # Auto-detect language
+            )
+        return transcription
     except Exception as e:
         logger.error(f"Transcription error: {e}")
         raise HTTPException(status_code=500, detail="Audio transcription failed")
 
-# ---------------- AUDIO CACHE ----------------
-audio_cache = {}  # audio_id -> (bytes, timestamp)
-AUDIO_TTL = 300  # 5 minutes
+# ---------------- AUDIO STORE ----------------
+AUDIO_TTL = int(os.getenv("AUDIO_TTL", "300"))  # 5 minutes
+
+audio_store = AudioStore(
+    max_bytes=int(os.getenv("AUDIO_MAX_BYTES", str(64 * 1024 * 1024))),
+    ttl=AUDIO_TTL,
+    spill_dir=os.getenv("AUDIO_SPILL_DIR") or None,
+    max_disk_bytes=int(os.getenv("AUDIO_MAX_DISK_BYTES", str(512 * 1024 * 1024)))
+)
+
+TTS_KEY_RE = re.compile(r"[0-9a-f]{32}")
+
+# Persistent content-addressed tier: identical replies share one audio blob and URL.
+# Relative paths resolve against this directory, not the CWD; the directory is created on first write
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache") or None
+if TTS_CACHE_DIR:
+    TTS_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), TTS_CACHE_DIR)
+
+tts_cache = TTSCache(
+    TTS_CACHE_DIR,
+    max_bytes=int(os.getenv("TTS_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+)
+
+# ---------------- SHARED STATE ----------------
+# With several workers or hosts, a follow-up GET can land anywhere: reply audio and
+# stream manifests are published to SHARED_STATE_BACKEND (none, sqlite or redis)
+TTS_MAX_WAIT = float(os.getenv("TTS_MAX_WAIT", "30"))
+SHARED_POLL_INTERVAL = float(os.getenv("SHARED_POLL_INTERVAL", "0.1"))
+
+shared_state = create_shared_state(ttl=AUDIO_TTL, pending_ttl=max(2 * TTS_MAX_WAIT, 60))
+shared_writes = set()  # fire-and-forget publishes still in flight
+
+def publish(write):
+    """Run a shared-state write in the background; a failed write only costs cross-worker visibility"""
+    if not shared_state.enabled:
+        write.close()
+        return
+    task = asyncio.create_task(write)
+    shared_writes.add(task)
+    task.add_done_callback(published)
+
+def published(task: asyncio.Task):
+    shared_writes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Shared state write failed: {task.exception()}")
+
+async def wait_for_shared_audio(audio_id: str, wait: float):
+    """Audio state published by another worker, polling up to `wait` seconds while it is pending"""
+    deadline = time() + min(wait, TTS_MAX_WAIT)
+    while True:
+        shared = await shared_state.get_audio(audio_id)
+        if shared is None or shared.status != PENDING or time() >= deadline:
+            return shared
+        await asyncio.sleep(SHARED_POLL_INTERVAL)
+
+async def iter_shared_stream(stream_id: str):
+    """Bytes of a pipelined stream generated on another worker, segment by segment as they are published"""
+    position = 0
+    deadline = time() + TTS_MAX_WAIT
+    while time() < deadline:
+        manifest = await shared_state.get_stream(stream_id)
+        if manifest is None:
+            return
+        while position < len(manifest.audio_ids):
+            audio_id = manifest.audio_ids[position]
+            shared = await shared_state.get_audio(audio_id)
+            if shared is not None and shared.status == READY:
+                data = shared.data
+            else:
+                data = await asyncio.to_thread(tts_cache.load, audio_id)
+            if data:
+                yield data
+            elif shared is None or shared.status != FAILED:
+                break
+            position += 1
+            deadline = time() + TTS_MAX_WAIT
+        if manifest.total is not None and position >= manifest.total:
+            return
+        await asyncio.sleep(SHARED_POLL_INTERVAL)
+    logger.warning(f"Shared audio stream {stream_id} stalled at segment {position}")
+
+# ---------------- BACKGROUND TTS ----------------
+TTS_FAILURES_MAX = 1000
+
+tts_jobs = {}  # audio_id -> asyncio.Task still synthesizing
+tts_failures = OrderedDict()  # audio_id -> error, most recent last
+tts_job_stats = {"scheduled": 0, "coalesced": 0, "completed": 0, "failed": 0}
+
+# Identical text+language is synthesized once, however many callers want it at the same time
+tts_flight = SingleFlight()
+
+async def synthesize_cached(audio_id: str, text: str, lang: str) -> bytes:
+    """Audio from the disk cache, or one shared gTTS call per audio_id"""
+    async def synthesize():
+        with timed("tts_cache"):
+            audio_bytes = faq_bundle.audio(audio_id) if faq_bundle is not None else None
+            if audio_bytes is None:
+                audio_bytes = await asyncio.to_thread(tts_cache.load, audio_id)
+        if audio_bytes is not None:
+            tts_cache.disk_hits += 1
+        else:
+            tts_cache.misses += 1
+            try:
+                audio_bytes = await text_to_speech(text, lang)
+            except Exception:
+                publish(shared_state.mark_failed(audio_id))
+                raise
+            await asyncio.to_thread(tts_cache.save, audio_id, audio_bytes)
+        publish(shared_state.put_audio(audio_id, audio_bytes))
+        return audio_bytes
+
+    return await tts_flight.do(audio_id, synthesize)
+
+async def schedule_reply_audio(reply: str, lang: str) -> str:
+    """Start synthesizing the reply in the background and return its audio URL.
+
+    The URL is returned once the audio is marked pending in shared state, so a
+    GET for it on another worker waits for the audio instead of answering 404.
+    """
+    audio_id = tts_cache_key(sanitize_for_tts(reply, lang), lang)
+    audio_url = f"/audio/{audio_id}"
+
+    if audio_id in tts_jobs:
+        tts_job_stats["coalesced"] += 1
+        return audio_url
+    if faq_bundle is not None and faq_bundle.has_audio(audio_id):
+        return audio_url
+    if audio_store.get(audio_id) is not None:
+        tts_cache.memory_hits += 1
+        return audio_url
+
+    tts_failures.pop(audio_id, None)
+    marked = asyncio.Event()
+    tts_jobs[audio_id] = asyncio.create_task(run_tts_job(audio_id, reply, lang, marked))
+    tts_job_stats["scheduled"] += 1
+    try:
+        if shared_state.enabled:
+            await shared_state.mark_pending(audio_id)
+    except Exception as e:
+        logger.warning(f"Shared state write failed: {e}")
+    finally:
+        marked.set()
+    return audio_url
+
+async def run_tts_job(audio_id: str, reply: str, lang: str, marked: asyncio.Event):
+    try:
+        # A fast failure must not be overwritten by the pending mark
+        await marked.wait()
+        audio_bytes = await synthesize_cached(audio_id, reply, lang)
+        audio_store.put(audio_id, audio_bytes)
+        tts_job_stats["completed"] += 1
+        preencode_audio(audio_id)
+    except Exception as e:
+        tts_job_stats["failed"] += 1
+        tts_failures[audio_id] = str(getattr(e, "detail", e))
+        while len(tts_failures) > TTS_FAILURES_MAX:
+            tts_failures.popitem(last=False)
+    finally:
+        tts_jobs.pop(audio_id, None)
+
+# ---------------- PIPELINED SPEECH ----------------
+audio_streams = OrderedDict()  # stream_id -> AudioStream, oldest first
+
+def open_audio_stream() -> AudioStream:
+    cutoff = time() - AUDIO_TTL
+    while audio_streams:
+        oldest = next(iter(audio_streams.values()))
+        if oldest.created >= cutoff:
+            break
+        audio_streams.popitem(last=False)
+        oldest.cancel()
+
+    stream = AudioStream(str(uuid.uuid4()))
+    audio_streams[stream.stream_id] = stream
+    publish(shared_state.open_stream(stream.stream_id))
+    return stream
+
+def speak_segment(stream: AudioStream, text: str, lang: str):
+    """Queue one segment on the stream and publish its position for readers on other workers"""
+    audio_id = tts_cache_key(sanitize_for_tts(text, lang), lang)
+    publish(shared_state.add_segment(stream.stream_id, len(stream), audio_id))
+    stream.add(asyncio.create_task(synthesize_segment(audio_id, text, lang)))
+
+def close_audio_stream(stream: AudioStream):
+    stream.close()
+    publish(shared_state.close_stream(stream.stream_id, len(stream)))
+
+async def synthesize_segment(audio_id: str, text: str, lang: str) -> bytes:
+    """Synthesize one reply segment, reusing content-addressed audio when available"""
+    blob = audio_store.get(audio_id)
+    if blob is not None and not blob.on_disk:
+        tts_cache.memory_hits += 1
+        publish(shared_state.put_audio(audio_id, blob.data))
+        return blob.data
+
+    return await synthesize_cached(audio_id, text, lang)
+
+# ---------------- COMPACT AUDIO ----------------
+# Low-bitrate Opus/MP3 variants for 2G clients, encoded once per reply with ffmpeg (optional)
+# and cached next to the original; /audio/{id} picks one from ?format=, ?bitrate=, Accept or Save-Data.
+# AUDIO_PREENCODE lists variants (e.g. "opus-16,opus-24") to encode as soon as a reply is synthesized
+AUDIO_DEFAULT_BITRATE = int(os.getenv("AUDIO_DEFAULT_BITRATE", "24"))
+AUDIO_PREENCODE = [tag for tag in os.getenv("AUDIO_PREENCODE", "").replace(" ", "").split(",") if tag]
+
+transcoder = Transcoder(
+    ffmpeg=os.getenv("FFMPEG_PATH", "ffmpeg"),
+    max_concurrency=int(os.getenv("TRANSCODE_WORKERS", "2"))
+)
+
+tts_variants = TTSCache(
+    os.path.join(TTS_CACHE_DIR, "variants") if TTS_CACHE_DIR else None,
+    max_bytes=int(os.getenv("TTS_VARIANT_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    suffix=".audio"
+)
+transcode_flight = SingleFlight()
+preencode_tasks = set()
+
+def original_audio_bytes(blob: AudioBlob) -> bytes:
+    if not blob.on_disk:
+        return blob.data
+    with open(blob.path, "rb") as f:
+        return f.read()
+
+async def encoded_audio(blob: AudioBlob, variant) -> Optional[AudioBlob]:
+    """The variant of an original MP3 blob, encoding it at most once; None if it cannot be encoded"""
+    key = variant_key(blob.audio_id, variant)
+    encoded = audio_store.get(key)
+    if encoded is not None:
+        tts_variants.memory_hits += 1
+        return encoded
+    # Read into the hot store like the original MP3, never sent by path: another worker may evict the file
+    data = await asyncio.to_thread(tts_variants.load, key)
+    if data is not None:
+        tts_variants.disk_hits += 1
+        return audio_store.put(key, data, media_type=variant.media_type)
+    if not transcoder.available:
+        return None
+    tts_variants.misses += 1
+
+    async def encode():
+        source = await asyncio.to_thread(original_audio_bytes, blob)
+        with timed("transcode"):
+            data = await transcoder.encode(source, variant)
+        await asyncio.to_thread(tts_variants.save, key, data)
+        return data
+
+    try:
+        data = await transcode_flight.do(key, encode)
+    except (TranscodeError, OSError) as e:
+        logger.warning(f"Could not encode {blob.audio_id} as {variant.tag}: {e}")
+        return None
+    return audio_store.put(key, data, media_type=variant.media_type)
+
+def preencode_audio(audio_id: str):
+    """Encode the AUDIO_PREENCODE variants of freshly synthesized audio in the background"""
+    if not AUDIO_PREENCODE or not transcoder.available:
+        return
+    blob = audio_store.get(audio_id)
+    if blob is None:
+        return
+    for tag in AUDIO_PREENCODE:
+        variant = VARIANTS.get(tag)
+        if variant is not None:
+            task = asyncio.create_task(preencode_variant(blob, variant))
+            preencode_tasks.add(task)
+            task.add_done_callback(preencode_tasks.discard)
+
+async def preencode_variant(blob: AudioBlob, variant):
+    # The disk check is a stat; keep it off the event loop like every other cache access
+    if not await asyncio.to_thread(tts_variants.has, variant_key(blob.audio_id, variant)):
+        await encoded_audio(blob, variant)
+
+def audio_variant_stats() -> dict:
+    return {
+        **transcoder.stats(),
+        "default_bitrate": AUDIO_DEFAULT_BITRATE,
+        "preencode": AUDIO_PREENCODE,
+        "preencoding": len(preencode_tasks),
+        "cache": tts_variants.stats()
+    }
+
+# ---------------- FAQ PREGENERATION ----------------
+faq_task = None
+
+async def generate_faq_answer(scheme: SchemeInfo, lang: str, intent: str) -> str:
+    """Canonical LLM answer to one scheme question, grounded on that scheme's facts only"""
+    question = faq_question(scheme, lang, intent)
+    context = build_prompt_context(question, lang, format_scheme_facts(scheme, lang), [])
+    inputs = {"system": context.system, "history": context.history, "user_input": question}
+    result = await llm_executor.invoke(chain, inputs)
+    llm_usage(context, result.content, getattr(result, "usage_metadata", None))
+    return result.content
+
+async def synthesize_faq_audio(text: str, lang: str) -> tuple:
+    audio_id = tts_cache_key(sanitize_for_tts(text, lang), lang)
+    return audio_id, await synthesize_cached(audio_id, text, lang)
+
+async def pregenerate_faqs(force: bool = False, with_audio: bool = True, concurrency: int = 4) -> dict:
+    """Rebuild the FAQ bundle (only schemes whose data changed, unless force) and start serving it.
+
+    Workers sharing FAQ_BUNDLE_PATH build one at a time; a worker that waited
+    for another's build loads the result instead of rebuilding when it
+    already covers the catalog.
+    """
+    global faq_bundle
+    async with build_lock(FAQ_BUNDLE_PATH):
+        current = open_faq_bundle(FAQ_BUNDLE_PATH, scheme_catalog)
+        if not force and current is not None and current.covers(scheme_catalog, with_audio):
+            stats = current.stats()
+            report = {
+                "regenerated": [],
+                "reused": [scheme.id for scheme in scheme_catalog.schemes],
+                "failed": {},
+                **{key: stats[key] for key in ("path", "version", "answers", "audio", "bytes")}
+            }
+        else:
+            # Reuse from what is on disk: another worker may have written a newer bundle than the one
+            # this process serves. The write is an atomic rename, so the open mapping stays readable
+            try:
+                await ensure_llm()
+                report = await build_faq_bundle(
+                    FAQ_BUNDLE_PATH,
+                    scheme_catalog,
+                    generate_faq_answer,
+                    synthesize_faq_audio if with_audio else None,
+                    previous=current if current is not None else faq_bundle,
+                    force=force,
+                    concurrency=concurrency
+                )
+            finally:
+                if current is not None:
+                    current.close()
+            current = open_faq_bundle(FAQ_BUNDLE_PATH, scheme_catalog)
+    previous, faq_bundle = faq_bundle, current
+    fast_path.bundle = faq_bundle
+    if previous is not None:
+        previous.close()
+    return report
+
+def schedule_faq_pregeneration():
+    """Incremental rebuild in the background, at most one at a time"""
+    global faq_task
+    if faq_task is not None and not faq_task.done():
+        return
+
+    async def run():
+        try:
+            report = await pregenerate_faqs()
+            logger.info(
+                f"FAQ bundle {report['version']}: regenerated {len(report['regenerated'])} schemes, "
+                f"reused {len(report['reused'])}, failed {len(report['failed'])}"
+            )
+        except Exception as e:
+            logger.error(f"FAQ pregeneration failed: {getattr(e, 'detail', e)}")
+
+    faq_task = asyncio.create_task(run())
 
-def cleanup_audio_cache():
-    """Remove expired audio files from cache"""
-    current_time = time()
-    expired = [aid for aid, (_, ts) in audio_cache.items() if current_time - ts > AUDIO_TTL]
-    for aid in expired:
-        del audio_cache[aid]
+def tts_stats() -> dict:
+    return {
+        **tts_job_stats,
+        "pending": len(tts_jobs),
+        "workers": TTS_WORKERS,
+        "recent_failures": len(tts_failures),
+        "audio_streams": len(audio_streams),
+        "shared_writes_in_flight": len(shared_writes),
+        "synthesis": tts_flight.stats()
+    }
 
 # ---------------- API ROUTES ----------------
-@app.get("/")
+@app.get("/", response_class=FastJSONResponse)
 def root():
     return {
         "service": "JanSeva - Maharashtra Government Schemes Assistant",
@@ -386,12 +1129,19 @@ def root():
         "endpoints": {
             "health": "/health",
             "text_chat": "/chat",
+            "text_chat_stream": "/chat/stream",
+            "text_chat_batch": "/chat/batch",
             "voice_chat": "/chat/voice",
-            "schemes_list": "/schemes"
+            "voice_chat_stream": "/chat/voice/stream",
+            "voice_session": "/ws/voice",
+            "schemes_list": "/schemes",
+            "ready": "/ready",
+            "stats": "/stats",
+            "metrics": "/metrics"
         }
     }
 
-@app.get("/health")
+@app.get("/health", response_class=FastJSONResponse)
 def health_check():
     return {
         "status": "healthy",
@@ -399,65 +1149,362 @@ def health_check():
         "timestamp": time()
     }
 
+@app.get("/ready", response_class=FastJSONResponse)
+def readiness_check():
+    """Readiness probe: 503 until the warm-up has built the clients; /health only says the process is up"""
+    if not WARMUP:
+        return {"status": "ready", "warmup": "disabled", "timestamp": time()}
+    ready = warmup_state["finished"] is not None and not warmup_state["errors"]
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else ("failed" if warmup_state["errors"] else "warming"),
+            **warmup_state,
+            "timestamp": time()
+        }
+    )
+
+@app.get("/stats", response_class=FastJSONResponse)
+def get_stats():
+    return {
+        "llm": llm_executor.stats(),
+        "llm_coalescing": llm_flight.stats(),
+        "upstream": chain.stats() if chain is not None else None,
+        "fast_path": fast_path.stats(),
+        "answer_cache": answer_cache.stats(),
+        "conversations": conversation_store.stats(),
+        "audio": audio_store.stats(),
+        "tts_cache": tts_cache.stats(),
+        "audio_variants": audio_variant_stats(),
+        "compression": response_compressor.stats(),
+        "shared_state": shared_state.stats(),
+        "tts": tts_stats(),
+        "pregenerated": faq_bundle.stats() if faq_bundle is not None else None,
+        "batch": batch_stats,
+        "voice_sessions": voice_session_stats,
+        "tokens": token_usage_stats(),
+        "timestamp": time()
+    }
+
+# Every numeric /stats field is also a scrape-time gauge, e.g. janseva_audio_cache_memory_bytes
+REGISTRY.stats_gauges("llm", lambda: llm_executor.stats())
+REGISTRY.stats_gauges("llm_coalescing", lambda: llm_flight.stats())
+REGISTRY.stats_gauges("upstream", lambda: chain.stats() if chain is not None else {})
+REGISTRY.stats_gauges("fast_path", lambda: fast_path.stats())
+REGISTRY.stats_gauges("answer_cache", lambda: answer_cache.stats())
+REGISTRY.stats_gauges("conversations", lambda: conversation_store.stats())
+REGISTRY.stats_gauges("audio_cache", lambda: audio_store.stats())
+REGISTRY.stats_gauges("tts_cache", lambda: tts_cache.stats())
+REGISTRY.stats_gauges("audio_variants", audio_variant_stats)
+REGISTRY.stats_gauges("compression", lambda: response_compressor.stats())
+REGISTRY.stats_gauges("shared_state", lambda: shared_state.stats())
+REGISTRY.stats_gauges("tts", tts_stats)
+REGISTRY.stats_gauges("pregenerated", lambda: faq_bundle.stats() if faq_bundle is not None else {})
+REGISTRY.stats_gauges("batch", lambda: batch_stats)
+REGISTRY.stats_gauges("voice_sessions", lambda: voice_session_stats)
+REGISTRY.stats_gauges("tokens", token_usage_stats)
+REGISTRY.stats_gauges("profiler", lambda: {"dumps": request_profiler.dumps})
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition of stage/request latency histograms and component gauges"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(req: ChatRequest):
     """Text-based chat endpoint"""
     try:
         # Detect language
-        lang = detect_language(req.message, req.language)
+        lang, processed_text = preprocess_message(req.message, req.language)
+        return await answer_chat(req, lang, processed_text, generate_reply)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Chat error: {e}")
+        raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
+
+async def answer_chat(req: ChatRequest, lang: str, processed_text: str, reply_with) -> ChatResponse:
+    """One chat turn on a preprocessed message; reply_with(processed_text, lang, raw_text, history) -> (reply, usage)"""
+    # Generate conversation ID if not provided
+    conv_id = req.conversation_id or str(uuid.uuid4())
+
+    # Earlier turns, fed back to the model under the history token budget
+    history = await conversation_store.get(conv_id) if req.conversation_id else None
+
+    # Add user message to history
+    await conversation_store.append(conv_id, {
+        "role": "user",
+        "content": req.message
+    })
+
+    # Get AI response
+    reply, usage = await reply_with(processed_text, lang, req.message, history)
+
+    # Add assistant response to history
+    await conversation_store.append(conv_id, {
+        "role": "assistant",
+        "content": reply
+    })
+
+    # Generate audio if requested
+    audio_url = None
+    if req.enable_tts:
+        audio_url = await schedule_reply_audio(reply, lang)
+
+    return ChatResponse(
+        reply=reply,
+        detected_language=lang,
+        conversation_id=conv_id,
+        audio_url=audio_url,
+        usage=usage,
+        timestamp=time()
+    )
+
+# ---------------- BATCH CHAT ----------------
+batch_stats = {"batches": 0, "items": 0, "succeeded": 0, "failed": 0, "deduplicated": 0}
+
+def preprocess_batch(items: list) -> list:
+    """Detection and transliteration once per distinct (message, language); failures are kept per item"""
+    processed = {}
+    results = []
+    for item in items:
+        key = (item.message, item.language)
+        if key not in processed:
+            try:
+                processed[key] = preprocess_message(item.message, item.language)
+            except Exception as e:
+                processed[key] = e
+        results.append(processed[key])
+    return results
+
+def batch_error(e: Exception) -> dict:
+    if isinstance(e, HTTPException):
+        return {"status_code": e.status_code, "detail": e.detail}
+    return {"status_code": 500, "detail": f"Chat processing failed: {str(e)}"}
+
+async def run_chat_batch(items: list, flight: SingleFlight):
+    """Yield a ChatBatchItem per request as it completes.
+
+    Identical history-free questions share one reply, turns of the same
+    conversation run in order, and at most BATCH_CONCURRENCY replies are
+    generated at once. `flight` dedupes within this batch only.
+    """
+    batch_stats["batches"] += 1
+    batch_stats["items"] += len(items)
+    limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+    preprocessed = preprocess_batch(items)
+
+    async def reply_with(processed_text: str, lang: str, raw_text: str, history: Optional[list]):
+        async def generate():
+            async with limit:
+                return await generate_reply(processed_text, lang, raw_text, history)
+
+        if history:
+            return await generate()
+        return await flight.do((lang, normalize_question(processed_text)), generate)
+
+    async def run_item(index: int) -> ChatBatchItem:
+        try:
+            if isinstance(preprocessed[index], Exception):
+                raise preprocessed[index]
+            lang, processed_text = preprocessed[index]
+            result = await answer_chat(items[index], lang, processed_text, reply_with)
+        except Exception as e:
+            if not isinstance(e, HTTPException):
+                logger.error(f"Batch chat item {index} error: {e}")
+            batch_stats["failed"] += 1
+            return ChatBatchItem(index=index, status="error", error=batch_error(e))
+        batch_stats["succeeded"] += 1
+        return ChatBatchItem(index=index, status="success", result=result)
+
+    async def run_conversation(indexes: list) -> list:
+        return [await run_item(index) for index in indexes]
+
+    # Items without a conversation each run alone; a conversation's turns run sequentially
+    groups = OrderedDict()
+    for index, item in enumerate(items):
+        groups.setdefault(item.conversation_id or index, []).append(index)
+
+    tasks = [asyncio.ensure_future(run_conversation(indexes)) for indexes in groups.values()]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            for result in await finished:
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+        batch_stats["deduplicated"] += flight.coalesced
+
+@app.post("/chat/batch", response_model=ChatBatchResponse)
+async def chat_batch(batch: ChatBatchRequest):
+    """Answer many messages in one request; per-item errors never fail the whole batch"""
+    if batch.stream:
+        async def lines():
+            async for result in run_chat_batch(batch.items, SingleFlight()):
+                yield result.model_dump_json() + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    results = [None] * len(batch.items)
+    flight = SingleFlight()
+    async for result in run_chat_batch(batch.items, flight):
+        results[result.index] = result
+    failed = sum(1 for result in results if result.status == "error")
+    return ChatBatchResponse(
+        items=results,
+        succeeded=len(results) - failed,
+        failed=failed,
+        deduplicated=flight.coalesced,
+        timestamp=time()
+    )
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {to_json(data)}\n\n"
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+async def stream_reply_events(
+    processed_text: str,
+    raw_text: str,
+    lang: str,
+    conv_id: str,
+    enable_tts: bool,
+    response_fields: dict,
+    history: Optional[list] = None
+):
+    """Stream reply tokens as SSE; with TTS, speak each finished sentence while the rest is generated"""
+    audio_stream = open_audio_stream() if enable_tts else None
+    async for event, data in reply_events(
+        processed_text, raw_text, lang, conv_id, audio_stream, response_fields, history
+    ):
+        yield sse_event(event, data)
+
+async def reply_events(
+    processed_text: str,
+    raw_text: str,
+    lang: str,
+    conv_id: str,
+    audio_stream: Optional[AudioStream],
+    response_fields: dict,
+    history: Optional[list] = None
+):
+    """(event, data) pairs for one reply: audio, token..., then done or error.
 
-        if lang in ["hi", "mr"] and not is_devanagari(req.message):
-            processed_text = transliterate_if_roman(req.message)
+    Finished sentences are queued on audio_stream, when given, while the rest
+    of the reply is still being generated.
+    """
+    segmenter = SpeechSegmenter()
+
+    def speak(segments: list):
+        for segment in segments:
+            speak_segment(audio_stream, segment, lang)
+
+    parts = []
+    try:
+        if audio_stream is not None:
+            yield "audio", {"audio_url": f"/audio/stream/{audio_stream.stream_id}"}
+
+        ready = lookup_ready_answer(processed_text, lang, raw_text, history)
+        if ready is not None:
+            reply, source = ready
+            usage = ready_usage(source)
+            if audio_stream is not None:
+                if source == "pregenerated":
+                    # One segment, so the whole reply maps onto the pregenerated MP3
+                    speak_segment(audio_stream, reply, lang)
+                else:
+                    speak(segmenter.feed(reply))
+            yield "token", {"text": reply}
         else:
-            processed_text = req.message
+            call, usage = start_llm_reply(processed_text, lang, raw_text, history, streaming=True)
+            async for text in call:
+                parts.append(text)
+                if audio_stream is not None:
+                    speak(segmenter.feed(text))
+                yield "token", {"text": text}
 
-        
-        # Generate conversation ID if not provided
-        conv_id = req.conversation_id or str(uuid.uuid4())
-        
-        # Get or create conversation history
-        if conv_id not in conversations:
-            conversations[conv_id] = []
-        
-        # Add user message to history
-        conversations[conv_id].append({
-            "role": "user",
-            "content": req.message
-        })
-        
-        # Get AI response
-        result = chain.invoke({
-        "user_input": processed_text,
-        "lang": lang
-        })
+            reply = "".join(parts).strip()
+            usage = usage or call.metadata["usage"]
 
-        reply = result.content.strip()
-        
-        # Add assistant response to history
-        conversations[conv_id].append({
+        if audio_stream is not None:
+            speak(segmenter.flush())
+            close_audio_stream(audio_stream)
+
+        await conversation_store.append(conv_id, {
             "role": "assistant",
             "content": reply
         })
-        
-        # Generate audio if requested
-        audio_url = None
-        if req.enable_tts:
-            cleanup_audio_cache()  # Clean old audio files
-            audio_id = str(uuid.uuid4())
-            audio_cache[audio_id] = (await text_to_speech(reply, lang), time())
-            audio_url = f"/audio/{audio_id}"
-        
-        return ChatResponse(
-            reply=reply,
-            detected_language=lang,
-            conversation_id=conv_id,
-            audio_url=audio_url,
-            timestamp=time()
-        )
-    
+
+        yield "done", {
+            **response_fields,
+            "reply": reply,
+            "detected_language": lang,
+            "conversation_id": conv_id,
+            "status": "success",
+            "audio_url": f"/audio/stream/{audio_stream.stream_id}" if audio_stream else None,
+            "usage": usage,
+            "timestamp": time()
+        }
+    except HTTPException as e:
+        yield "error", {"status_code": e.status_code, "detail": e.detail}
     except Exception as e:
-        logger.error(f"Chat error: {e}")
-        raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
+        logger.error(f"Chat stream error: {e}")
+        yield "error", {"status_code": 500, "detail": f"Chat processing failed: {str(e)}"}
+    finally:
+        if audio_stream is not None and not audio_stream.closed:
+            audio_stream.cancel()
+            publish(shared_state.close_stream(audio_stream.stream_id, 0))
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest):
+    """Text-based chat endpoint streaming tokens as Server-Sent Events"""
+    lang, processed_text = preprocess_message(req.message, req.language)
+    conv_id = req.conversation_id or str(uuid.uuid4())
+    history = await conversation_store.get(conv_id) if req.conversation_id else None
+
+    await conversation_store.append(conv_id, {
+        "role": "user",
+        "content": req.message
+    })
+
+    return sse_response(stream_reply_events(processed_text, req.message, lang, conv_id, req.enable_tts, {}, history))
+
+@app.post("/chat/voice/stream")
+async def chat_voice_stream(
+    audio: UploadFile = File(...),
+    conversation_id: Optional[str] = None,
+    enable_tts: bool = True
+):
+    """Voice-based chat endpoint streaming the reply, with sentence-level pipelined speech"""
+    try:
+        transcribed_text = await transcribe_audio(audio)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Voice chat error: {e}")
+        raise HTTPException(status_code=500, detail=f"Voice processing failed: {str(e)}")
+    logger.info(f"Transcribed: {transcribed_text}")
+
+    lang, processed_text = preprocess_message(transcribed_text)
+    conv_id = conversation_id or str(uuid.uuid4())
+    history = await conversation_store.get(conv_id) if conversation_id else None
+
+    await conversation_store.append(conv_id, {
+        "role": "user",
+        "content": transcribed_text
+    })
+
+    return sse_response(stream_reply_events(
+        processed_text, transcribed_text, lang, conv_id, enable_tts, {"transcribed_text": transcribed_text}, history
+    ))
 
 @app.post("/chat/voice", response_model=VoiceChatResponse)
 async def chat_voice(
@@ -473,35 +1520,22 @@ async def chat_voice(
         
         # Detect language from transcription
         # Detect language from RAW transcription
-        lang = detect_language(transcribed_text)
-
-        if lang in ["hi", "mr"] and not is_devanagari(transcribed_text):
-            processed_text = transliterate_if_roman(transcribed_text)
-        else:
-            processed_text = transcribed_text
-
+        lang, processed_text = preprocess_message(transcribed_text)
 
         # Generate conversation ID if not provided
         conv_id = conversation_id or str(uuid.uuid4())
-        
-        # Get or create conversation history
-        if conv_id not in conversations:
-            conversations[conv_id] = []
+        history = await conversation_store.get(conv_id) if conversation_id else None
         
         # Add to conversation
-        conversations[conv_id].append({
+        await conversation_store.append(conv_id, {
             "role": "user",
             "content": transcribed_text
         })
         
         # Get AI response
-        result = chain.invoke({
-        "user_input": processed_text,
-        "lang": lang
-        })
-        reply = result.content.strip()
+        reply, usage = await generate_reply(processed_text, lang, transcribed_text, history)
         
-        conversations[conv_id].append({
+        await conversation_store.append(conv_id, {
             "role": "assistant",
             "content": reply
         })
@@ -509,10 +1543,7 @@ async def chat_voice(
         # Generate audio response
         audio_url = None
         if enable_tts:
-            cleanup_audio_cache()
-            audio_id = str(uuid.uuid4())
-            audio_cache[audio_id] = (await text_to_speech(reply, lang), time())
-            audio_url = f"/audio/{audio_id}"
+            audio_url = await schedule_reply_audio(reply, lang)
         
         return VoiceChatResponse(
             transcribed_text=transcribed_text,
@@ -520,141 +1551,473 @@ async def chat_voice(
             detected_language=lang,
             conversation_id=conv_id,
             audio_url=audio_url,
+            usage=usage,
             timestamp=time()
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Voice chat error: {e}")
         raise HTTPException(status_code=500, detail=f"Voice processing failed: {str(e)}")
 
-@app.get("/audio/{audio_id}")
-async def get_audio(audio_id: str):
-    """Retrieve generated audio file"""
-    if audio_id not in audio_cache:
-        raise HTTPException(status_code=404, detail="Audio not found or expired")
-    
-    audio_bytes, ts = audio_cache[audio_id]
-    
-    # Check if audio has expired
-    if time() - ts > AUDIO_TTL:
-        del audio_cache[audio_id]
-        raise HTTPException(status_code=404, detail="Audio expired")
-    
+# ---------------- VOICE SESSIONS ----------------
+# Full-duplex voice over one WebSocket: 16-bit mono PCM frames in, server-side VAD
+# cuts utterances, and transcript, reply tokens and MP3 segments come back as they are ready
+VOICE_SAMPLE_RATES = (8000, 16000, 24000, 48000)
+VOICE_VAD_HANGOVER_MS = int(os.getenv("VOICE_VAD_HANGOVER_MS", "600"))
+VOICE_VAD_MIN_RMS = float(os.getenv("VOICE_VAD_MIN_RMS", "300"))
+VOICE_MAX_QUEUED_TURNS = 4
+
+voice_session_stats = {"sessions": 0, "active": 0, "utterances": 0, "dropped": 0, "turns": 0, "failed_turns": 0}
+
+class VoiceSession:
+    """One citizen's conversation over a WebSocket; turns are answered in the order they were spoken"""
+
+    def __init__(self, websocket: WebSocket, conv_id: str, sample_rate: int, enable_tts: bool, lang: Optional[str]):
+        self.websocket = websocket
+        self.conv_id = conv_id
+        self.sample_rate = sample_rate
+        self.enable_tts = enable_tts
+        self.lang = lang
+        self.vad = EnergyVAD(
+            sample_rate,
+            hangover_ms=VOICE_VAD_HANGOVER_MS,
+            max_speech_ms=int(VOICE_MAX_SECONDS * 1000),
+            min_rms=VOICE_VAD_MIN_RMS
+        )
+        self.turns = asyncio.Queue(maxsize=VOICE_MAX_QUEUED_TURNS)
+        self.turn_count = 0
+        self._send_lock = asyncio.Lock()
+
+    async def send_event(self, event: str, data: dict):
+        async with self._send_lock:
+            await self.websocket.send_text(to_json({"type": event, **data}))
+
+    async def send_audio(self, data: bytes):
+        async with self._send_lock:
+            await self.websocket.send_bytes(data)
+
+    async def receive(self, runner: asyncio.Task):
+        """Read frames until the client disconnects or sends {"type": "close"}"""
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes") is not None:
+                for event, pcm in self.vad.feed(message["bytes"]):
+                    if event == "start":
+                        await self.send_event("vad", {"state": "speech_start"})
+                    else:
+                        await self.utterance_ended(pcm)
+                continue
+
+            try:
+                command = from_json(message.get("text") or "{}")
+            except ValueError:
+                await self.send_event("error", {"status_code": 400, "detail": "Control messages must be JSON"})
+                continue
+            kind = command.get("type")
+            if kind == "end":
+                # Push-to-talk release: don't wait for the silence timeout
+                await self.utterance_ended(self.vad.flush())
+            elif kind == "text" and str(command.get("text", "")).strip():
+                await self.queue_turn(None, str(command["text"]).strip()[:2000])
+            elif kind == "close":
+                # Answer what is queued first, unless the turn runner has died and never will
+                drained = asyncio.ensure_future(self.turns.join())
+                try:
+                    await asyncio.wait([drained, runner], return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    drained.cancel()
+                return
+
+    async def utterance_ended(self, pcm: Optional[bytes]):
+        await self.send_event("vad", {"state": "speech_end"})
+        if pcm is None:
+            voice_session_stats["dropped"] += 1
+            return
+        voice_session_stats["utterances"] += 1
+        await self.queue_turn(pcm, None)
+
+    async def queue_turn(self, pcm: Optional[bytes], text: Optional[str]):
+        try:
+            self.turns.put_nowait((pcm, text))
+        except asyncio.QueueFull:
+            await self.send_event("error", {"status_code": 429, "detail": "Too many unanswered turns"})
+
+    async def run_turns(self):
+        while True:
+            pcm, text = await self.turns.get()
+            self.turn_count += 1
+            try:
+                await self.turn(self.turn_count, pcm, text)
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                voice_session_stats["failed_turns"] += 1
+                if isinstance(e, HTTPException):
+                    error = {"status_code": e.status_code, "detail": e.detail}
+                else:
+                    logger.error(f"Voice session turn error: {e}")
+                    error = {"status_code": 500, "detail": f"Voice processing failed: {str(e)}"}
+                await self.send_event("error", {"turn": self.turn_count, **error})
+            finally:
+                self.turns.task_done()
+
+    async def turn(self, number: int, pcm: Optional[bytes], text: Optional[str]):
+        voice_session_stats["turns"] += 1
+        if pcm is not None:
+            with timed("voice_turn_transcribe"):
+                text = (await transcribe_file(
+                    "utterance.wav", io.BytesIO(pcm_to_wav(pcm, self.sample_rate)), "audio/wav"
+                )).strip()
+            await self.send_event("transcript", {"turn": number, "text": text})
+            if not text:
+                return
+            logger.info(f"Transcribed: {text}")
+
+        lang, processed_text = preprocess_message(text, self.lang)
+        history = await conversation_store.get(self.conv_id)
+        await conversation_store.append(self.conv_id, {
+            "role": "user",
+            "content": text
+        })
+
+        audio_stream = open_audio_stream() if self.enable_tts else None
+        sender = asyncio.create_task(self.push_audio(number, audio_stream)) if audio_stream is not None else None
+        try:
+            async for event, data in reply_events(
+                processed_text, text, lang, self.conv_id, audio_stream, {"transcribed_text": text}, history
+            ):
+                if event == "error":
+                    raise HTTPException(status_code=data["status_code"], detail=data["detail"])
+                await self.send_event(event, {"turn": number, **data})
+            if sender is not None:
+                await sender
+        finally:
+            if sender is not None and not sender.done():
+                sender.cancel()
+
+    async def push_audio(self, number: int, audio_stream: AudioStream):
+        """Send each MP3 segment as a binary message as soon as it is synthesized, in order"""
+        segments = 0
+        async for data in audio_stream.iter_bytes():
+            await self.send_audio(data)
+            segments += 1
+        await self.send_event("audio_end", {"turn": number, "segments": segments})
+
+@app.websocket("/ws/voice")
+async def voice_session(
+    websocket: WebSocket,
+    conversation_id: Optional[str] = None,
+    sample_rate: int = 16000,
+    enable_tts: bool = True,
+    language: Optional[str] = None
+):
+    """Full-duplex voice chat: stream PCM in, receive transcript, reply tokens and speech back"""
+    await websocket.accept()
+    if sample_rate not in VOICE_SAMPLE_RATES:
+        await websocket.send_text(to_json({"type": "error", "status_code": 400, "detail": "Unsupported sample_rate"}))
+        await websocket.close(code=1003)
+        return
+
+    session = VoiceSession(websocket, conversation_id or str(uuid.uuid4()), sample_rate, enable_tts, language)
+    voice_session_stats["sessions"] += 1
+    voice_session_stats["active"] += 1
+    turns = asyncio.create_task(session.run_turns())
+    try:
+        await session.send_event("session", {
+            "conversation_id": session.conv_id,
+            "sample_rate": sample_rate,
+            "encoding": "pcm_s16le",
+            "audio_format": "audio/mpeg"
+        })
+        await session.receive(turns)
+        if turns.done() and not turns.cancelled() and turns.exception() is not None:
+            error = turns.exception()
+            if isinstance(error, WebSocketDisconnect):
+                return
+            logger.error(f"Voice session turn runner failed: {error}")
+            await websocket.close(code=1011)
+            return
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        turns.cancel()
+        await asyncio.gather(turns, return_exceptions=True)
+        voice_session_stats["active"] -= 1
+
+@app.get("/audio/stream/{stream_id}")
+async def get_audio_stream(stream_id: str):
+    """Stream pipelined reply audio, segment by segment, as it is synthesized"""
+    stream = audio_streams.get(stream_id)
+    if stream is not None:
+        chunks = stream.iter_bytes()
+    elif await shared_state.get_stream(stream_id) is not None:
+        chunks = iter_shared_stream(stream_id)
+    else:
+        raise HTTPException(status_code=404, detail="Audio stream not found or expired")
+
     return StreamingResponse(
-        io.BytesIO(audio_bytes),
+        chunks,
         media_type="audio/mpeg",
-        headers={
-            "Content-Disposition": f"inline; filename=audio_{audio_id}.mp3"
-        }
+        headers={"Cache-Control": "no-cache"}
     )
 
-@app.get("/schemes")
-async def get_schemes():
-    """Get list of popular Maharashtra government schemes"""
-    schemes = [
-        {
-            "id": 1,
-            "name": "Majhi Kanya Bhagyashree Yojana",
-            "name_marathi": "माझी कन्या भाग्यश्री योजना",
-            "name_hindi": "माझी कन्या भाग्यश्री योजना",
-            "category": "women_child",
-            "description": "Financial assistance for families with girl children",
-            "eligibility": "Annual income less than ₹1 lakh",
-            "benefits": "Up to ₹50,000 for two girl children"
-        },
-        {
-            "id": 2,
-            "name": "Shravan Bal Yojana",
-            "name_marathi": "श्रावण बाल योजना",
-            "name_hindi": "श्रावण बाल योजना",
-            "category": "senior_citizens",
-            "description": "Monthly financial assistance for senior citizens",
-            "eligibility": "Age 65+, below poverty line",
-            "benefits": "₹600 per month"
-        },
-        {
-            "id": 3,
-            "name": "Lek Ladki Yojana",
-            "name_marathi": "लेक लाडकी योजना",
-            "name_hindi": "लेक लाडकी योजना",
-            "category": "women_child",
-            "description": "Financial support for girls from yellow and orange ration card families",
-            "eligibility": "Yellow/Orange ration card holders",
-            "benefits": "Financial aid at different life stages up to ₹75,000"
-        },
-        {
-            "id": 4,
-            "name": "Mahatma Jyotiba Phule Jan Arogya Yojana",
-            "name_marathi": "महात्मा ज्योतिबा फुले जन आरोग्य योजना",
-            "name_hindi": "महात्मा ज्योतिबा फुले जन आरोग्य योजना",
-            "category": "health",
-            "description": "Health insurance scheme for families",
-            "eligibility": "Yellow and orange ration card holders",
-            "benefits": "Free treatment up to ₹1.5 lakh per family per year"
-        },
-        {
-            "id": 5,
-            "name": "Pradhan Mantri Awas Yojana",
-            "name_marathi": "प्रधानमंत्री आवास योजना",
-            "name_hindi": "प्रधानमंत्री आवास योजना",
-            "category": "housing",
-            "description": "Affordable housing scheme",
-            "eligibility": "Economically weaker sections without pucca house",
-            "benefits": "Subsidy for home construction/purchase"
-        },
-        {
-            "id": 6,
-            "name": "Shetkari Sanman Nidhi Yojana",
-            "name_marathi": "शेतकरी सन्मान निधी योजना",
-            "name_hindi": "शेतकरी सन्मान निधी योजना",
-            "category": "agriculture",
-            "description": "Financial assistance for farmers",
-            "eligibility": "Registered farmers with land records",
-            "benefits": "₹6,000 per year in installments"
-        }
-    ]
-    
-    return {"schemes": schemes, "total": len(schemes)}
+def pending_audio_response(audio_id: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=202,
+        content={"status": "pending", "audio_id": audio_id},
+        headers={"Retry-After": "1"}
+    )
+
+@app.get("/audio/{audio_id}")
+async def get_audio(
+    audio_id: str,
+    request: Request,
+    wait: float = 0,
+    format: Optional[str] = Query(None, description="opus, mp3 or original; defaults to the Accept header"),
+    bitrate: Optional[int] = Query(None, ge=1, description="Target kbps for the compact formats")
+):
+    """Retrieve generated audio file (supports HTTP Range requests).
+
+    Returns 202 while synthesis is still running; pass ?wait=<seconds> to long-poll.
+    Clients on slow links get a compact Opus/OGG (or low-bitrate MP3) encoding via
+    ?format=opus&bitrate=16, an Accept header listing audio/ogg, or Save-Data: on.
+    """
+    try:
+        variant = choose_variant(
+            request.headers.get("accept"),
+            codec=format,
+            bitrate=bitrate,
+            save_data=request.headers.get("save-data", "").lower() == "on",
+            default_bitrate=AUDIO_DEFAULT_BITRATE
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    job = tts_jobs.get(audio_id)
+    if job is not None and wait > 0:
+        try:
+            await asyncio.wait_for(asyncio.shield(job), timeout=min(wait, TTS_MAX_WAIT))
+        except asyncio.TimeoutError:
+            pass
+
+    if audio_id in tts_jobs:
+        return pending_audio_response(audio_id)
+    if audio_id in tts_failures:
+        raise HTTPException(status_code=500, detail="Text-to-speech failed")
+
+    headers = {
+        "Content-Disposition": f"inline; filename=audio_{audio_id}.mp3",
+        "Cache-Control": f"private, max-age={AUDIO_TTL}",
+        "Vary": "Accept, Save-Data"
+    }
+
+    blob = audio_store.get(audio_id)
+    if blob is None and faq_bundle is not None:
+        # Pregenerated audio is served from the mapped bundle without entering the hot store
+        data = faq_bundle.audio(audio_id)
+        if data is not None:
+            blob = AudioBlob(audio_id, data, None, len(data), "audio/mpeg", time() + AUDIO_TTL)
+    if blob is None:
+        # Content-addressed audio outlives the hot store (and restarts) on disk. It is read into the
+        # hot store rather than sent by path: another worker may evict the file at any moment
+        data = await asyncio.to_thread(tts_cache.load, audio_id) if TTS_KEY_RE.fullmatch(audio_id) else None
+        if data is not None:
+            blob = audio_store.put(audio_id, data)
+    if blob is None:
+        # Synthesized (or still synthesizing) on another worker
+        shared = await wait_for_shared_audio(audio_id, wait)
+        if shared is None:
+            raise HTTPException(status_code=404, detail="Audio not found or expired")
+        if shared.status == PENDING:
+            return pending_audio_response(audio_id)
+        if shared.status == FAILED:
+            raise HTTPException(status_code=500, detail="Text-to-speech failed")
+        blob = audio_store.put(audio_id, shared.data)
+
+    if variant is not None:
+        # Falls back to the original MP3 when ffmpeg is unavailable or the encode fails
+        encoded = await encoded_audio(blob, variant)
+        if encoded is not None:
+            blob = encoded
+            headers["Content-Disposition"] = f"inline; filename=audio_{audio_id}.{variant.extension}"
+
+    # Spilled audio is sent straight from disk; FileResponse handles Range itself
+    if blob.on_disk:
+        return FileResponse(blob.path, media_type=blob.media_type, headers=headers)
+
+    headers["Accept-Ranges"] = "bytes"
+    try:
+        byte_range = parse_range(request.headers.get("range"), blob.size)
+    except ValueError:
+        return Response(
+            status_code=416,
+            headers={"Content-Range": f"bytes */{blob.size}"}
+        )
+
+    if byte_range is None:
+        return Response(content=blob.data, media_type=blob.media_type, headers=headers)
 
-@app.get("/conversations/{conversation_id}")
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{blob.size}"
+    return Response(
+        content=memoryview(blob.data)[start:end + 1].tobytes(),
+        status_code=206,
+        media_type=blob.media_type,
+        headers=headers
+    )
+
+def catalog_response(request: Request, body: bytes, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/schemes")
+async def get_schemes(
+    request: Request,
+    category: Optional[str] = None,
+    lang: Optional[str] = None,
+    fields: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    """Get Maharashtra government schemes (filter by category/lang, select fields, paginate)"""
+    try:
+        body, etag = scheme_catalog.query(category, lang, fields, offset, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return catalog_response(request, body, etag)
+
+@app.get("/schemes/{scheme_id}")
+async def get_scheme(scheme_id: str, request: Request, lang: Optional[str] = None, fields: Optional[str] = None):
+    """Get one scheme by numeric id or slug"""
+    try:
+        result = scheme_catalog.item(scheme_id, lang, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Scheme not found")
+    return catalog_response(request, *result)
+
+@app.post("/schemes/reload", response_class=FastJSONResponse, dependencies=[Depends(require_admin)])
+async def reload_schemes():
+    """Reload the scheme data file; cached answers are invalidated if it changed"""
+    global scheme_catalog, scheme_retriever, fast_path
+    try:
+        catalog = SchemeCatalog.load(SCHEME_DATA_PATH)
+    except Exception as e:
+        logger.error(f"Scheme reload error: {e}")
+        raise HTTPException(status_code=500, detail=f"Scheme reload failed: {str(e)}")
+
+    changed = catalog.version != scheme_catalog.version
+    scheme_catalog = catalog
+    scheme_retriever = SchemeRetriever(catalog, use_embeddings=scheme_retriever.uses_embeddings)
+    fast_path = FastPathMatcher(catalog, bundle=faq_bundle)
+    answer_cache.ensure_version(catalog.version)
+    if faq_bundle is not None:
+        faq_bundle.bind(catalog)
+    if changed and FAQ_PREGENERATE:
+        schedule_faq_pregeneration()
+    return {"version": catalog.version, "changed": changed, "total": len(catalog)}
+
+@app.delete("/cache/answers", response_class=FastJSONResponse, dependencies=[Depends(require_admin)])
+async def clear_answer_cache():
+    """Invalidate cached answers (e.g. after scheme details are updated)"""
+    answer_cache.invalidate()
+    return {"message": "Answer cache cleared successfully"}
+
+@app.get("/conversations/{conversation_id}", response_class=FastJSONResponse)
 async def get_conversation(conversation_id: str):
     """Retrieve conversation history"""
-    if conversation_id not in conversations:
+    messages = await conversation_store.get(conversation_id)
+    if messages is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
     return {
         "conversation_id": conversation_id,
-        "messages": conversations[conversation_id],
-        "message_count": len(conversations[conversation_id])
+        "messages": messages,
+        "message_count": len(messages)
     }
 
-@app.delete("/conversations/{conversation_id}")
+@app.delete("/conversations/{conversation_id}", response_class=FastJSONResponse)
 async def delete_conversation(conversation_id: str):
     """Delete conversation history"""
-    if conversation_id not in conversations:
+    if not await conversation_store.delete(conversation_id):
         raise HTTPException(status_code=404, detail="Conversation not found")
-    
-    del conversations[conversation_id]
+
     return {"message": "Conversation deleted successfully"}
 
 # ---------------- STARTUP/SHUTDOWN EVENTS ----------------
+# ---------------- WARM-UP ----------------
+# With WARMUP=1 (default) the heavy imports and clients are built in the background
+# right after startup, and /ready turns 200 when they are done
+WARMUP = os.getenv("WARMUP", "1") == "1"
+warmup_state = {"started": None, "finished": None, "components": {}, "errors": {}}
+warmup_task = None
+
+def warm_up():
+    """Pay the first-request costs up front: imports, clients, indexes"""
+    warmup_state["started"] = time()
+    steps = {
+        "llm": init_llm,
+        "tts": gtts_class,
+        "transliteration": lambda: transliterate_if_roman("namaskar"),
+        "retrieval": lambda: scheme_retriever.warm()
+    }
+    for name, step in steps.items():
+        started = perf_counter()
+        try:
+            step()
+            warmup_state["components"][name] = round(perf_counter() - started, 3)
+        except Exception as e:
+            warmup_state["errors"][name] = str(getattr(e, "detail", e))
+            logger.error(f"Warm-up of {name} failed: {warmup_state['errors'][name]}")
+    warmup_state["finished"] = time()
+    logger.info(f"Warm-up finished in {warmup_state['finished'] - warmup_state['started']:.2f}s")
+
 @app.on_event("startup")
 async def startup_event():
+    global warmup_task
     logger.info("JanSeva Assistant API starting up...")
     logger.info(f"Groq API Key configured: {bool(os.getenv('GROQ_API_KEY'))}")
+    logger.info(f"Shared state: {shared_state.backend}, conversations: {conversation_store.backend}")
+    if WARMUP:
+        warmup_task = asyncio.create_task(asyncio.to_thread(warm_up))
+    if FAQ_PREGENERATE:
+        schedule_faq_pregeneration()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("JanSeva Assistant API shutting down...")
-    audio_cache.clear()
-    conversations.clear()
+    for job in list(tts_jobs.values()):
+        job.cancel()
+    if faq_task is not None:
+        faq_task.cancel()
+    for stream in audio_streams.values():
+        stream.cancel()
+    tts_executor.shutdown(wait=False)
+    audio_store.clear()
+    if shared_writes:
+        await asyncio.wait(shared_writes, timeout=2)
+    await shared_state.close()
+    await conversation_store.close()
+    if groq_http_client is not None:
+        await groq_http_client.aclose()
 
 # ---------------- RUN ----------------
 if __name__ == "__main__":
     import uvicorn
+    # Several workers need SHARED_STATE_BACKEND=sqlite (one host) or redis (several hosts)
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
     uvicorn.run(
-        app,
+        "main:app" if workers > 1 else app,
         host="0.0.0.0",
         port=8000,
+        workers=workers,
         log_level="info"
     )
\ No newline at end of file
@@ -0,0 +1,238 @@
+import cProfile
+import hmac
+import logging
+import os
+import random
+import re
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter, time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers sub-millisecond cache lookups up to slow Whisper/gTTS calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+def _label_text(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition format"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class StatsGauges:
+    """Exposes every numeric field of a component's stats() dict as a gauge, read at scrape time"""
+
+    def __init__(self, prefix: str, source: Callable[[], dict]):
+        self.prefix = prefix
+        self.source = source
+
+    def render(self) -> list:
+        try:
+            stats = self.source()
+        except Exception as e:
+            logger.warning(f"Metrics collection for {self.prefix} failed: {e}")
+            return []
+        lines = []
+        for key, value in _flatten(stats):
+            name = f"{self.prefix}_{key}"
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_number(value)}")
+        return lines
+
+
+_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _flatten(stats: dict, prefix: str = ""):
+    for key, value in stats.items():
+        key = _NAME_RE.sub("_", f"{prefix}{key}")
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{key}_")
+        elif isinstance(value, bool):
+            yield key, int(value)
+        elif isinstance(value, (int, float)):
+            yield key, value
+
+
+class MetricsRegistry:
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._metrics = []
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(f"{self.namespace}_{name}", documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def stats_gauges(self, name: str, source: Callable[[], dict]):
+        self._metrics.append(StatsGauges(f"{self.namespace}_{name}", source))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry("janseva")
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "stage_duration_seconds",
+    "Time spent in each stage of the request path",
+    ("stage",)
+)
+
+HTTP_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Request duration through the last body chunk, by route",
+    ("method", "route", "status")
+)
+
+
+@contextmanager
+def timed(stage: str):
+    """Record the wall time of the enclosed block (including awaits) under `stage`"""
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(perf_counter() - started, stage)
+
+
+# ---------------- PROFILING ----------------
+class RequestProfiler:
+    """Per-request cProfile dumps, on demand (X-Profile header matching token) or for a random sample of requests.
+
+    cProfile sees the whole event loop thread, so concurrent requests show up in
+    the dump too; only one request is profiled at a time.
+    """
+
+    def __init__(self, directory: Optional[str], sample_rate: float = 0.0, token: Optional[str] = None):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.token = token
+        self.active = False
+        self.dumps = 0
+
+    def wants(self, header: Optional[str]) -> bool:
+        if self.directory is None or self.active:
+            return False
+        # On-demand dumps always need the token: without one configured the header is ignored
+        if header is not None and self.token is not None and hmac.compare_digest(header.encode(), self.token.encode()):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self) -> cProfile.Profile:
+        self.active = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def finish(self, profiler: cProfile.Profile, method: str, path: str) -> Optional[str]:
+        try:
+            profiler.disable()
+        finally:
+            self.active = False
+        name = f"{int(time() * 1000)}-{method}-{_NAME_RE.sub('_', path.strip('/')) or 'root'}.prof"
+        path = os.path.join(self.directory, name)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profiler.dump_stats(path)
+        except OSError as e:
+            logger.warning(f"Could not write profile {path}: {e}")
+            return None
+        self.dumps += 1
+        return path
+
+
+# ---------------- MIDDLEWARE ----------------
+class MetricsMiddleware:
+    """Times every HTTP request into HTTP_SECONDS and runs the request profiler.
+
+    Pure ASGI, so streamed responses (SSE, audio) are timed until their last
+    chunk is sent, and the timer and profiler are always released when the
+    app returns, including after an error or a client disconnect.
+    """
+
+    def __init__(self, app, profiler: Optional[RequestProfiler] = None):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = None
+        if self.profiler is not None:
+            header = None
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    header = value.decode("latin-1")
+                    break
+            if self.profiler.wants(header):
+                profile = self.profiler.start()
+        started = perf_counter()
+        status = 500  # unless the app starts a response
+
+        async def send_observed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_observed)
+        finally:
+            # The router records the matched route on the shared scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_SECONDS.observe(perf_counter() - started, scope["method"], route, str(status))
+            if profile is not None:
+                dump = self.profiler.finish(profile, scope["method"], scope["path"])
+                if dump is not None:
+                    logger.info(f"Profile for {scope['method']} {scope['path']} written to {dump}")
@@ -0,0 +1,53 @@
+"""Pregenerate canonical scheme FAQ answers and audio into the bundle main.py serves.
+
+Every scheme x {en, hi, mr} x {eligibility, benefits, apply} is answered by the
+backend's own chain and spoken with gTTS. Only schemes whose data changed since
+the last bundle are regenerated unless --force is given:
+
+    cd backend && python pregenerate_faqs.py [--force] [--no-audio] [--concurrency 4]
+
+The bundle is written to FAQ_BUNDLE_PATH (default pregenerated/faq_bundle.bin);
+running servers pick it up on restart, or set FAQ_PREGENERATE=1 to have the
+servers rebuild it incrementally at startup and after POST /schemes/reload.
+Builds sharing a bundle path take turns on a lock file, and a bundle that
+already covers the catalog is loaded rather than rebuilt (unless --force).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--force", action="store_true", help="regenerate every scheme, not just changed ones")
+    parser.add_argument("--no-audio", action="store_true", help="build a text-only bundle")
+    parser.add_argument("--concurrency", type=int, default=4, help="answers generated at once")
+    args = parser.parse_args()
+
+    import main as app_module
+
+    logging.getLogger("main").setLevel(logging.WARNING)
+    app_module.init_llm()
+
+    async def run() -> dict:
+        try:
+            return await app_module.pregenerate_faqs(
+                force=args.force,
+                with_audio=not args.no_audio,
+                concurrency=args.concurrency
+            )
+        finally:
+            if app_module.groq_http_client is not None:
+                await app_module.groq_http_client.aclose()
+
+    report = asyncio.run(run())
+    app_module.tts_executor.shutdown(wait=False)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if report["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import math
+import re
+import zlib
+from typing import List
+
+from scheme_catalog import SchemeCatalog, SchemeInfo
+
+_numpy = None
+
+
+def numpy_module():
+    """NumPy, imported on first use (it is slow to import); None when not installed"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:  # embeddings are optional; BM25 alone works without NumPy
+            _numpy = False
+    return _numpy or None
+
+
+# ---------------- TOKENIZATION ----------------
+TOKEN_RE = re.compile(r"[\u0900-\u097F]+|[a-z0-9]+")
+
+# Very common words that carry no scheme signal in any of the three languages
+STOPWORDS = frozenset("""
+    a an the is are of for to in on and or what how who which can i my me do does
+    about tell please get scheme schemes yojana
+    है हैं क्या कैसे के की का में लिए और योजना योजनाओं
+    आहे आहेत काय कसे कसा साठी आणि योजनेसाठी
+    kya kaise ke ki ka mein liye hai aur kay aahe ahe sathi kasa kase ani
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def scheme_document(scheme: SchemeInfo) -> str:
+    """All searchable text for a scheme, across every language"""
+    parts = [
+        scheme.name, scheme.name_marathi, scheme.name_hindi,
+        scheme.category.replace("_", " "), (scheme.slug or "").replace("-", " "),
+        scheme.description, scheme.eligibility, scheme.benefits
+    ]
+    for translation in scheme.translations.values():
+        parts.append(translation.name)
+        parts.append(translation.description)
+        parts.extend(translation.eligibility)
+        parts.extend(translation.benefits)
+        parts.extend(translation.documents)
+    for faq in scheme.faqs:
+        parts.extend(faq.question.values())
+    return "\n".join(parts)
+
+
+# ---------------- INDEX ----------------
+class SchemeRetriever:
+    """BM25 index over trilingual scheme text, optionally fused with hashed char n-gram embeddings.
+
+    Names are indexed twice so that a scheme mentioned by name outranks one
+    that merely shares eligibility vocabulary.
+    """
+
+    def __init__(self, catalog: SchemeCatalog, k1: float = 1.5, b: float = 0.75,
+                 use_embeddings: bool = True, dimensions: int = 4096):
+        self.catalog = catalog
+        self.k1 = k1
+        self.b = b
+        self.schemes = list(catalog.schemes)
+        self._postings: dict = {}  # token -> list of (doc, term frequency)
+        self._doc_lengths = []
+
+        for doc, scheme in enumerate(self.schemes):
+            names = " ".join(
+                [scheme.name, scheme.name_marathi, scheme.name_hindi]
+                + [t.name for t in scheme.translations.values()]
+            )
+            tokens = tokenize(scheme_document(scheme)) + tokenize(names)
+            self._doc_lengths.append(len(tokens))
+            counts: dict = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                self._postings.setdefault(token, []).append((doc, tf))
+
+        n = len(self.schemes)
+        self._avg_length = sum(self._doc_lengths) / n if n else 0.0
+        self._idf = {
+            token: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for token, postings in self._postings.items()
+        }
+
+        self.dimensions = dimensions
+        self._embeddings = None
+        self._embeddings_pending = use_embeddings and n > 0
+
+    def _document_vectors(self):
+        # Built on the first search (or warm()), keeping NumPy out of import time
+        if self._embeddings_pending:
+            self._embeddings_pending = False
+            np = numpy_module()
+            if np is not None:
+                self._embeddings = np.vstack([self._embed(scheme_document(s)) for s in self.schemes])
+        return self._embeddings
+
+    def warm(self):
+        self._document_vectors()
+
+    @property
+    def uses_embeddings(self) -> bool:
+        return self._document_vectors() is not None
+
+    def search(self, query: str, k: int = 3, min_relative_score: float = 0.35) -> List[tuple]:
+        """Return up to k (scheme, score) pairs, dropping results far below the best match"""
+        scores = self._bm25(tokenize(query))
+        embeddings = self._document_vectors()
+        if embeddings is not None and scores:
+            similarity = embeddings @ self._embed(query)
+            top_bm25 = max(scores.values())
+            for doc, value in enumerate(similarity):
+                if value > 0 and doc in scores:
+                    scores[doc] += top_bm25 * float(value)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        if not ranked:
+            return []
+        best = ranked[0][1]
+        return [(self.schemes[doc], score) for doc, score in ranked if score >= best * min_relative_score]
+
+    def _bm25(self, tokens: List[str]) -> dict:
+        scores: dict = {}
+        for token in set(tokens):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = self._idf[token]
+            for doc, tf in postings:
+                norm = tf + self.k1 * (1 - self.b + self.b * self._doc_lengths[doc] / self._avg_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return scores
+
+    def _embed(self, text: str):
+        """Hashed character trigram vector, L2-normalized"""
+        np = _numpy  # loaded by _document_vectors()
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in TOKEN_RE.findall(text.lower()):
+            padded = f" {token} "
+            for i in range(len(padded) - 2):
+                vector[zlib.crc32(padded[i:i + 3].encode("utf-8")) % self.dimensions] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+# ---------------- PROMPT CONTEXT ----------------
+FIELD_LABELS = {
+    "en": ("Eligibility", "Benefits", "Documents", "Apply"),
+    "hi": ("पात्रता", "लाभ", "दस्तावेज", "आवेदन"),
+    "mr": ("पात्रता", "लाभ", "कागदपत्रे", "अर्ज"),
+}
+
+
+def format_scheme_facts(scheme: SchemeInfo, lang: str) -> str:
+    """Compact fact sheet for one scheme in the target language (English fallback)"""
+    translation = scheme.translations.get(lang) or scheme.translations.get("en")
+    eligibility, benefits, documents, apply = FIELD_LABELS.get(lang, FIELD_LABELS["en"])
+    if translation is None:
+        lines = [
+            f"{scheme.name} / {scheme.name_marathi}",
+            scheme.description,
+            f"{eligibility}: {scheme.eligibility}",
+            f"{benefits}: {scheme.benefits}",
+        ]
+    else:
+        lines = [
+            f"{translation.name} / {scheme.name}",
+            translation.description,
+            f"{eligibility}: " + "; ".join(translation.eligibility),
+            f"{benefits}: " + "; ".join(translation.benefits),
+            f"{documents}: " + "; ".join(translation.documents),
+        ]
+    if scheme.apply_url:
+        lines.append(f"{apply}: {scheme.apply_url}")
+    return "\n".join(lines)
+
+
+def build_scheme_context(results: List[tuple], lang: str) -> str:
+    if not results:
+        return "No matching scheme in the catalog for this question."
+    return "\n\n".join(format_scheme_facts(scheme, lang) for scheme, _ in results)
+
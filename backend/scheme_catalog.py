@@ -0,0 +1,189 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+# ---------------- MODELS ----------------
+class SchemeTranslation(BaseModel):
+    name: str
+    description: str
+    eligibility: List[str] = []
+    documents: List[str] = []
+    benefits: List[str] = []
+
+class SchemeFAQ(BaseModel):
+    question: Dict[str, str]
+    answer: Dict[str, str]
+
+class SchemeInfo(BaseModel):
+    id: int
+    name: str
+    name_marathi: str
+    name_hindi: str
+    category: str
+    description: str
+    eligibility: str
+    benefits: str
+    slug: Optional[str] = None
+    apply_url: Optional[str] = None
+    translations: Dict[str, SchemeTranslation] = {}
+    faqs: List[SchemeFAQ] = []
+
+
+SCHEME_FIELDS = tuple(SchemeInfo.model_fields)
+CATALOG_LANGUAGES = ("en", "hi", "mr")
+MAX_PAGE_SIZE = 100
+
+
+def _dumps(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# ---------------- CATALOG ----------------
+class SchemeCatalog:
+    """Scheme records loaded once from a data file, indexed by id, slug, category and language.
+
+    Query results are serialized once and kept, with their ETag, in a small LRU
+    keyed on the normalized query, so repeated catalog requests skip both
+    filtering and JSON encoding.
+    """
+
+    def __init__(self, schemes: List[SchemeInfo], version: str, response_cache_size: int = 256):
+        self.schemes = sorted(schemes, key=lambda s: s.id)
+        self.version = version
+        self.response_cache_size = response_cache_size
+        self._by_id = {s.id: i for i, s in enumerate(self.schemes)}
+        self._by_slug = {s.slug: i for i, s in enumerate(self.schemes) if s.slug}
+        self._by_category: Dict[str, List[int]] = {}
+        self._by_language: Dict[str, List[int]] = {lang: [] for lang in CATALOG_LANGUAGES}
+        for i, scheme in enumerate(self.schemes):
+            self._by_category.setdefault(scheme.category, []).append(i)
+            for lang in scheme.translations:
+                self._by_language.setdefault(lang, []).append(i)
+
+        # Plain dicts per record: the full view and one trimmed view per language
+        self._records = [s.model_dump() for s in self.schemes]
+        self._localized = {
+            lang: [self._localize(record, lang) for record in self._records]
+            for lang in self._by_language
+        }
+        self._responses: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    @classmethod
+    def load(cls, path: str) -> "SchemeCatalog":
+        with open(path, "rb") as f:
+            raw = f.read()
+        data = json.loads(raw)
+        schemes = [SchemeInfo.model_validate(item) for item in data["schemes"]]
+        return cls(schemes, hashlib.sha256(raw).hexdigest()[:16])
+
+    def __len__(self) -> int:
+        return len(self.schemes)
+
+    @property
+    def categories(self) -> List[str]:
+        return sorted(self._by_category)
+
+    def get(self, key: str) -> Optional[SchemeInfo]:
+        """Look a scheme up by numeric id or slug"""
+        index = self._by_id.get(int(key)) if key.isdigit() else self._by_slug.get(key)
+        return None if index is None else self.schemes[index]
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        lang: Optional[str] = None,
+        fields: Optional[str] = None,
+        offset: int = 0,
+        limit: int = MAX_PAGE_SIZE
+    ) -> tuple:
+        """Return (serialized body, etag) for a filtered, paginated, projected listing.
+
+        Raises ValueError for unknown languages or fields.
+        """
+        field_list = self._parse_fields(fields)
+        if lang is not None and lang not in self._localized:
+            raise ValueError(f"Unsupported language '{lang}'")
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        key = ("list", category, lang, field_list, offset, limit)
+
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        indices = self._by_category.get(category, []) if category else range(len(self.schemes))
+        if lang is not None:
+            available = set(self._by_language[lang])
+            indices = [i for i in indices if i in available]
+        indices = list(indices)
+
+        records = self._localized[lang] if lang else self._records
+        page = [self._project(records[i], field_list) for i in indices[offset:offset + limit]]
+        body = _dumps({
+            "schemes": page,
+            "total": len(indices),
+            "offset": offset,
+            "limit": limit,
+            "version": self.version
+        })
+        return self._store(key, body)
+
+    def item(self, key: str, lang: Optional[str] = None, fields: Optional[str] = None) -> Optional[tuple]:
+        """Return (serialized body, etag) for a single scheme, or None if unknown"""
+        field_list = self._parse_fields(fields)
+        if lang is not None and lang not in self._localized:
+            raise ValueError(f"Unsupported language '{lang}'")
+        index = self._by_id.get(int(key)) if key.isdigit() else self._by_slug.get(key)
+        if index is None:
+            return None
+
+        cache_key = ("item", index, lang, field_list)
+        cached = self._cached(cache_key)
+        if cached is not None:
+            return cached
+
+        records = self._localized[lang] if lang else self._records
+        return self._store(cache_key, _dumps(self._project(records[index], field_list)))
+
+    def _parse_fields(self, fields: Optional[str]) -> Optional[tuple]:
+        if not fields:
+            return None
+        field_list = tuple(f.strip() for f in fields.split(",") if f.strip())
+        unknown = [f for f in field_list if f not in SCHEME_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return field_list
+
+    @staticmethod
+    def _project(record: dict, field_list: Optional[tuple]) -> dict:
+        if field_list is None:
+            return record
+        return {f: record[f] for f in field_list}
+
+    @staticmethod
+    def _localize(record: dict, lang: str) -> dict:
+        localized = dict(record)
+        localized["translations"] = {
+            k: v for k, v in record["translations"].items() if k == lang
+        }
+        localized["faqs"] = [
+            {"question": {lang: faq["question"].get(lang, "")}, "answer": {lang: faq["answer"].get(lang, "")}}
+            for faq in record["faqs"]
+        ]
+        return localized
+
+    def _cached(self, key: tuple) -> Optional[tuple]:
+        cached = self._responses.get(key)
+        if cached is not None:
+            self._responses.move_to_end(key)
+        return cached
+
+    def _store(self, key: tuple, body: bytes) -> tuple:
+        etag = f'"{self.version}-{hashlib.sha1(body).hexdigest()[:12]}"'
+        self._responses[key] = (body, etag)
+        if len(self._responses) > self.response_cache_size:
+            self._responses.popitem(last=False)
+        return body, etag
@@ -0,0 +1,349 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+from time import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+
+
+class SharedAudio:
+    __slots__ = ("status", "data")
+
+    def __init__(self, status: str, data: Optional[bytes] = None):
+        self.status = status
+        self.data = data
+
+
+class StreamManifest:
+    """Segments of a pipelined reply published by the worker that is generating it"""
+
+    __slots__ = ("audio_ids", "total")
+
+    def __init__(self, audio_ids: list, total: Optional[int]):
+        self.audio_ids = audio_ids  # contiguous from position 0
+        self.total = total  # segment count once the stream is closed, else None
+
+
+# ---------------- BASE ----------------
+class SharedState:
+    """Cross-worker view of reply audio and pipelined audio streams.
+
+    The base class keeps nothing: with a single worker everything is answered
+    from process memory. Backends let any worker serve /audio/{id} and
+    /audio/stream/{id} for replies generated on another worker or host.
+    Pending and stream entries expire after `pending_ttl` seconds so a crashed
+    worker cannot leave clients waiting forever.
+    """
+
+    backend = "none"
+
+    def __init__(self, ttl: float = 300, pending_ttl: float = 60):
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+        self.reads = 0
+        self.writes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend != "none"
+
+    async def mark_pending(self, audio_id: str):
+        pass
+
+    async def put_audio(self, audio_id: str, data: bytes):
+        pass
+
+    async def mark_failed(self, audio_id: str):
+        pass
+
+    async def get_audio(self, audio_id: str) -> Optional[SharedAudio]:
+        return None
+
+    async def open_stream(self, stream_id: str):
+        pass
+
+    async def add_segment(self, stream_id: str, position: int, audio_id: str):
+        pass
+
+    async def close_stream(self, stream_id: str, total: int):
+        pass
+
+    async def get_stream(self, stream_id: str) -> Optional[StreamManifest]:
+        return None
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "ttl_seconds": self.ttl,
+            "pending_ttl_seconds": self.pending_ttl,
+            "reads": self.reads,
+            "writes": self.writes
+        }
+
+
+def _contiguous(positions: dict) -> list:
+    audio_ids = []
+    while len(audio_ids) in positions:
+        audio_ids.append(positions[len(audio_ids)])
+    return audio_ids
+
+
+# ---------------- SQLITE ----------------
+class SQLiteSharedState(SharedState):
+    """Database file shared by the workers of one host (WAL mode, one connection per process)"""
+
+    backend = "sqlite"
+
+    def __init__(self, path: str = "janseva_shared.db", ttl: float = 300, pending_ttl: float = 60):
+        super().__init__(ttl, pending_ttl)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS audio (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                data BLOB,
+                expires REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_audio_expires ON audio (expires);
+            CREATE TABLE IF NOT EXISTS streams (
+                id TEXT PRIMARY KEY,
+                total INTEGER,
+                expires REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_streams_expires ON streams (expires);
+            CREATE TABLE IF NOT EXISTS stream_segments (
+                stream_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                audio_id TEXT NOT NULL,
+                PRIMARY KEY (stream_id, position)
+            );
+        """)
+
+    async def mark_pending(self, audio_id: str):
+        # Never downgrade audio another worker already finished
+        await asyncio.to_thread(
+            self._write,
+            "INSERT INTO audio (id, status, data, expires) VALUES (?, ?, NULL, ?) "
+            "ON CONFLICT(id) DO UPDATE SET status = excluded.status, expires = excluded.expires "
+            "WHERE audio.status != 'ready'",
+            (audio_id, PENDING, time() + self.pending_ttl)
+        )
+
+    async def put_audio(self, audio_id: str, data: bytes):
+        await asyncio.to_thread(
+            self._write,
+            "INSERT OR REPLACE INTO audio (id, status, data, expires) VALUES (?, ?, ?, ?)",
+            (audio_id, READY, data, time() + self.ttl)
+        )
+
+    async def mark_failed(self, audio_id: str):
+        await asyncio.to_thread(
+            self._write,
+            "INSERT INTO audio (id, status, data, expires) VALUES (?, ?, NULL, ?) "
+            "ON CONFLICT(id) DO UPDATE SET status = excluded.status, expires = excluded.expires "
+            "WHERE audio.status != 'ready'",
+            (audio_id, FAILED, time() + self.ttl)
+        )
+
+    async def get_audio(self, audio_id: str) -> Optional[SharedAudio]:
+        row = await asyncio.to_thread(
+            self._read_one, "SELECT status, data FROM audio WHERE id = ? AND expires > ?", (audio_id, time())
+        )
+        return SharedAudio(row[0], row[1]) if row is not None else None
+
+    async def open_stream(self, stream_id: str):
+        await asyncio.to_thread(
+            self._write,
+            "INSERT OR IGNORE INTO streams (id, total, expires) VALUES (?, NULL, ?)",
+            (stream_id, time() + self.pending_ttl)
+        )
+
+    async def add_segment(self, stream_id: str, position: int, audio_id: str):
+        await asyncio.to_thread(
+            self._write,
+            "INSERT OR REPLACE INTO stream_segments (stream_id, position, audio_id) VALUES (?, ?, ?)",
+            (stream_id, position, audio_id)
+        )
+
+    async def close_stream(self, stream_id: str, total: int):
+        await asyncio.to_thread(
+            self._write,
+            "UPDATE streams SET total = ?, expires = ? WHERE id = ?",
+            (total, time() + self.ttl, stream_id)
+        )
+
+    async def get_stream(self, stream_id: str) -> Optional[StreamManifest]:
+        return await asyncio.to_thread(self._get_stream, stream_id)
+
+    async def close(self):
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            audio = self._db.execute("SELECT COUNT(*) FROM audio").fetchone()[0]
+            streams = self._db.execute("SELECT COUNT(*) FROM streams").fetchone()[0]
+        return {**super().stats(), "path": self.path, "audio_entries": audio, "streams": streams}
+
+    def _write(self, sql: str, params: tuple):
+        with self._lock:
+            self._db.execute(sql, params)
+            self.writes += 1
+            if self.writes % 100 == 0:
+                self._evict(time())
+
+    def _read_one(self, sql: str, params: tuple):
+        with self._lock:
+            self.reads += 1
+            return self._db.execute(sql, params).fetchone()
+
+    def _get_stream(self, stream_id: str) -> Optional[StreamManifest]:
+        with self._lock:
+            self.reads += 1
+            row = self._db.execute(
+                "SELECT total FROM streams WHERE id = ? AND expires > ?", (stream_id, time())
+            ).fetchone()
+            if row is None:
+                return None
+            rows = self._db.execute(
+                "SELECT position, audio_id FROM stream_segments WHERE stream_id = ?", (stream_id,)
+            ).fetchall()
+        return StreamManifest(_contiguous(dict(rows)), row[0])
+
+    def _evict(self, now: float):
+        self._db.execute("DELETE FROM audio WHERE expires <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM stream_segments WHERE stream_id IN (SELECT id FROM streams WHERE expires <= ?)", (now,)
+        )
+        self._db.execute("DELETE FROM streams WHERE expires <= ?", (now,))
+
+
+# ---------------- REDIS ----------------
+class RedisSharedState(SharedState):
+    """Networked state for workers on several hosts, speaking the Redis protocol.
+
+    Finished audio, pending/failed markers and stream segment maps are separate
+    keys with their own expiry. Requires the optional `redis` package.
+    """
+
+    backend = "redis"
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        ttl: float = 300,
+        pending_ttl: float = 60,
+        prefix: str = "janseva:shared:",
+        client=None
+    ):
+        super().__init__(ttl, pending_ttl)
+        self.url = url
+        self.prefix = prefix
+        if client is None:
+            try:
+                import redis.asyncio as aioredis
+            except ImportError:
+                raise RuntimeError("SHARED_STATE_BACKEND=redis requires the 'redis' package (pip install redis)")
+            client = aioredis.from_url(url)
+        self._client = client
+
+    def _key(self, *parts: str) -> str:
+        return self.prefix + ":".join(parts)
+
+    async def mark_pending(self, audio_id: str):
+        self.writes += 1
+        await self._client.set(self._key("status", audio_id), PENDING, ex=int(self.pending_ttl))
+
+    async def put_audio(self, audio_id: str, data: bytes):
+        self.writes += 1
+        pipe = self._client.pipeline(transaction=True)
+        pipe.set(self._key("audio", audio_id), data, ex=int(self.ttl))
+        pipe.delete(self._key("status", audio_id))
+        await pipe.execute()
+
+    async def mark_failed(self, audio_id: str):
+        self.writes += 1
+        await self._client.set(self._key("status", audio_id), FAILED, ex=int(self.ttl))
+
+    async def get_audio(self, audio_id: str) -> Optional[SharedAudio]:
+        self.reads += 1
+        data, status = await self._client.mget(self._key("audio", audio_id), self._key("status", audio_id))
+        if data is not None:
+            return SharedAudio(READY, data)
+        if status is not None:
+            return SharedAudio(status.decode() if isinstance(status, bytes) else status)
+        return None
+
+    async def open_stream(self, stream_id: str):
+        self.writes += 1
+        await self._client.set(self._key("stream", stream_id), -1, ex=int(self.pending_ttl))
+
+    async def add_segment(self, stream_id: str, position: int, audio_id: str):
+        self.writes += 1
+        key = self._key("segments", stream_id)
+        pipe = self._client.pipeline(transaction=True)
+        pipe.hset(key, str(position), audio_id)
+        pipe.expire(key, int(max(self.ttl, self.pending_ttl)))
+        await pipe.execute()
+
+    async def close_stream(self, stream_id: str, total: int):
+        self.writes += 1
+        await self._client.set(self._key("stream", stream_id), total, ex=int(self.ttl))
+
+    async def get_stream(self, stream_id: str) -> Optional[StreamManifest]:
+        self.reads += 1
+        pipe = self._client.pipeline(transaction=False)
+        pipe.get(self._key("stream", stream_id))
+        pipe.hgetall(self._key("segments", stream_id))
+        total, segments = await pipe.execute()
+        if total is None:
+            return None
+        positions = {int(position): _text(audio_id) for position, audio_id in segments.items()}
+        total = int(total)
+        return StreamManifest(_contiguous(positions), total if total >= 0 else None)
+
+    async def close(self):
+        await self._client.aclose()
+
+    def stats(self) -> dict:
+        return {**super().stats(), "url": self.url, "prefix": self.prefix}
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+# ---------------- FACTORY ----------------
+def create_shared_state(ttl: float = 300, pending_ttl: float = 60) -> SharedState:
+    """Build the state selected by SHARED_STATE_BACKEND (none, sqlite or redis)"""
+    backend = os.getenv("SHARED_STATE_BACKEND", "none").lower()
+
+    if backend == "sqlite":
+        return SQLiteSharedState(
+            path=os.getenv("SHARED_STATE_DB_PATH", "janseva_shared.db"),
+            ttl=ttl,
+            pending_ttl=pending_ttl
+        )
+    if backend == "redis":
+        return RedisSharedState(
+            url=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            ttl=ttl,
+            pending_ttl=pending_ttl
+        )
+    if backend not in ("none", "memory"):
+        logger.warning(f"Unknown SHARED_STATE_BACKEND '{backend}', keeping state per process")
+    return SharedState(ttl, pending_ttl)
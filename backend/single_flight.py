@@ -0,0 +1,100 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Hashable, Optional
+
+
+class SharedStream:
+    """Output of one upstream call, replayable from the start by any number of readers.
+
+    The producer runs in its own task, so a reader going away (client disconnect)
+    never cancels the call for the others.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.metadata = {}  # filled in by the producer, e.g. token usage
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def start(self, source: AsyncIterator):
+        self.task = asyncio.ensure_future(self._pump(source))
+        self.task.add_done_callback(_consume_exception)
+
+    async def _pump(self, source: AsyncIterator) -> list:
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self._notify()
+        finally:
+            self._notify()
+        return self.chunks
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def result(self) -> list:
+        """Wait for the call to finish and return every chunk"""
+        return await asyncio.shield(self.task)
+
+    async def __aiter__(self):
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.task.done():
+                self.task.result()  # re-raise the producer's error
+                return
+            await changed.wait()
+
+
+def _consume_exception(task: asyncio.Task):
+    # Readers may all be gone; don't let asyncio log "exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    """Deduplicate identical in-flight calls: the first caller runs it, later callers share the result"""
+
+    def __init__(self):
+        self._calls = {}  # key -> asyncio.Task or SharedStream
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _track(self, key: Hashable, call, task: asyncio.Task):
+        self._calls[key] = call
+        self.leaders += 1
+        task.add_done_callback(lambda _: self._calls.pop(key, None) if self._calls.get(key) is call else None)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable]):
+        """Await factory() once per key across concurrent callers"""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            task.add_done_callback(_consume_exception)
+            self._track(key, task, task)
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stream(self, key: Hashable, factory: Callable[[SharedStream], AsyncIterator]) -> tuple:
+        """(SharedStream, is_leader): join the in-flight stream for key or start factory(stream)"""
+        call = self._calls.get(key)
+        if call is not None:
+            self.coalesced += 1
+            return call, False
+        call = SharedStream()
+        call.start(factory(call))
+        self._track(key, call, call.task)
+        return call, True
+
+    def stats(self) -> dict:
+        total = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "upstream_calls": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_rate": self.coalesced / total if total else 0.0
+        }
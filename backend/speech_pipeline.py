@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import re
+from time import time
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- SEGMENTATION ----------------
+# Break after sentence punctuation (incl. Devanagari danda) followed by whitespace,
+# on newlines, and before bullets -- the same symbols sanitize_for_tts strips.
+SEGMENT_BOUNDARY_RE = re.compile(r"(?<=[.!?।])\s+|\n+|(?=[•●▪])")
+
+
+class SpeechSegmenter:
+    """Incrementally splits streamed reply text into speakable segments.
+
+    Text is buffered until a boundary is seen; pieces shorter than min_chars are
+    merged with the next one so gTTS isn't called for fragments like "• ".
+    """
+
+    def __init__(self, min_chars: int = 24):
+        self.min_chars = min_chars
+        self._buffer = ""
+        self._pending = ""
+
+    def feed(self, text: str) -> list:
+        self._buffer += text
+        parts = SEGMENT_BOUNDARY_RE.split(self._buffer)
+        # The tail may still be growing, keep it for the next chunk
+        self._buffer = parts.pop()
+        return self._collect(parts)
+
+    def flush(self) -> list:
+        segments = self._collect([self._buffer])
+        self._buffer = ""
+        if self._pending:
+            segments.append(self._pending)
+            self._pending = ""
+        return segments
+
+    def _collect(self, parts: list) -> list:
+        segments = []
+        for part in parts:
+            part = part.strip()
+            if not part:
+                continue
+            self._pending = f"{self._pending} {part}" if self._pending else part
+            if len(self._pending) >= self.min_chars:
+                segments.append(self._pending)
+                self._pending = ""
+        return segments
+
+
+# ---------------- GROWING AUDIO STREAM ----------------
+class AudioStream:
+    """Ordered sequence of per-segment synthesis tasks exposed as one MP3 byte stream.
+
+    Segments are synthesized concurrently but yielded in order; MP3 frames can
+    be concatenated, so clients can start playback on the first segment.
+    """
+
+    def __init__(self, stream_id: str, media_type: str = "audio/mpeg"):
+        self.stream_id = stream_id
+        self.media_type = media_type
+        self.created = time()
+        self.closed = False
+        self._segments = []  # asyncio.Task -> bytes
+        self._changed = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def add(self, task: asyncio.Task):
+        self._segments.append(task)
+        self._changed.set()
+
+    def close(self):
+        self.closed = True
+        self._changed.set()
+
+    def cancel(self):
+        for task in self._segments:
+            task.cancel()
+        self.close()
+
+    async def iter_bytes(self):
+        index = 0
+        while True:
+            if index < len(self._segments):
+                task = self._segments[index]
+                try:
+                    # Shielded: a listener that disconnects must not cancel synthesis other listeners share
+                    data = await asyncio.shield(task)
+                except asyncio.CancelledError:
+                    if not task.cancelled():
+                        raise
+                    data = b""  # the stream itself was cancelled
+                except Exception as e:
+                    logger.error(f"Audio stream {self.stream_id} segment {index} failed: {e}")
+                    data = b""
+                index += 1
+                if data:
+                    yield data
+                continue
+
+            if self.closed:
+                return
+            self._changed.clear()
+            await self._changed.wait()
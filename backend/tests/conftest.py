@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.join(BACKEND, "benchmarks"))
+
+
+@pytest.fixture(scope="session")
+def catalog():
+    from scheme_catalog import SchemeCatalog
+
+    return SchemeCatalog.load(os.path.join(BACKEND, "data", "schemes.json"))
@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+os.environ.setdefault("WARMUP", "0")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    main = pytest.importorskip("main")
+    from starlette.testclient import TestClient
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "sekret")
+    return TestClient(main.app)
+
+
+def test_answer_cache_flush_needs_the_admin_token(client, monkeypatch):
+    assert client.delete("/cache/answers").status_code == 403
+    assert client.delete("/cache/answers", headers={"X-Admin-Token": "guess"}).status_code == 403
+    assert client.delete("/cache/answers", headers={"X-Admin-Token": "sekret"}).status_code == 200
+
+
+def test_admin_endpoints_are_closed_without_a_configured_token(client, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    assert client.delete("/cache/answers", headers={"X-Admin-Token": ""}).status_code == 403
+    assert client.post("/schemes/reload", headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_scheme_reload_needs_the_admin_token(client):
+    assert client.post("/schemes/reload").status_code == 403
+    assert client.post("/schemes/reload", headers={"X-Admin-Token": "guess"}).status_code == 403
@@ -0,0 +1,31 @@
+import pytest
+
+from answer_cache import AnswerCache
+
+
+def test_similarity_tier_is_off_by_default():
+    cache = AnswerCache()
+    cache.set("What is the eligibility for Lek Ladki yojana?", "en", "answer")
+    assert cache.get("what is the eligibility for lek ladki yojana", "en") == "answer"
+    assert cache.get("What is the eligibilty for Lek Ladki yojana?", "en") is None
+
+
+def test_near_duplicate_is_reused_when_enabled():
+    cache = AnswerCache(similarity_threshold=0.8)
+    cache.set("What is the eligibility for Lek Ladki yojana?", "en", "answer")
+    assert cache.get("What is the eligibilty for Lek Ladki yojana?", "en") == "answer"
+    assert cache.similar_hits == 1
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("Can I get Lek Ladki benefits for 2 girls?", "Can I get Lek Ladki benefits for 3 girls?"),
+    ("Can I apply with a yellow ration card?", "Can I apply without a yellow ration card?"),
+    ("Can I apply if my yellow ration card is available?", "Can I apply if my yellow ration card is not available?"),
+    ("Can I apply if my ration card is available?", "Can I apply if my ration card isn't available?"),
+    ("lek ladki yojana chalu hai kya", "lek ladki yojana band hai kya"),
+    ("क्या २ बेटियों को लाभ मिलेगा", "क्या ३ बेटियों को लाभ मिलेगा"),
+])
+def test_numbers_and_negations_must_match(cached, asked):
+    cache = AnswerCache(similarity_threshold=0.5)
+    cache.set(cached, "en", "answer")
+    assert cache.get(asked, "en") is None
@@ -0,0 +1,46 @@
+import asyncio
+import os
+
+from audio_store import AudioStore
+
+
+def test_spill_without_a_loop_writes_synchronously(tmp_path):
+    store = AudioStore(max_bytes=100, spill_dir=str(tmp_path))
+    store.put("a", b"a" * 80)
+    store.put("b", b"b" * 80)
+
+    blob = store.get("a")
+    assert blob.on_disk and open(blob.path, "rb").read() == b"a" * 80
+    assert store.memory_bytes == 80 and store.disk_bytes == 80 and store.spills == 1
+
+
+def test_spill_in_a_loop_writes_in_a_thread_and_serves_from_memory_meanwhile(tmp_path):
+    store = AudioStore(max_bytes=100, spill_dir=str(tmp_path))
+
+    async def run():
+        store.put("a", b"a" * 80)
+        store.put("b", b"b" * 80)
+        in_flight = store.get("a")
+        assert not in_flight.on_disk and in_flight.data == b"a" * 80
+        assert store.disk_bytes == 80 and store.spills == 0
+        await asyncio.gather(*store._writes)
+        return store.get("a")
+
+    blob = asyncio.run(run())
+    assert blob.on_disk and open(blob.path, "rb").read() == b"a" * 80
+    assert store.spills == 1 and not store._writes
+
+
+def test_blob_replaced_during_spill_leaves_no_file_behind(tmp_path):
+    store = AudioStore(max_bytes=100, spill_dir=str(tmp_path))
+
+    async def run():
+        store.put("a", b"a" * 80)
+        store.put("b", b"b" * 80)
+        store.put("a", b"A" * 10)  # replaces the blob whose spill is still being written
+        await asyncio.gather(*store._writes)
+
+    asyncio.run(run())
+    assert os.listdir(tmp_path) == []
+    assert store.get("a").data == b"A" * 10
+    assert store.disk_bytes == 0 and store.spills == 0
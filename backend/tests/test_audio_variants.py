@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+os.environ.setdefault("WARMUP", "0")
+
+AUDIO_ID = "0123456789abcdef0123456789abcdef"
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    main = pytest.importorskip("main")
+    from audio_store import AudioStore
+    from tts_cache import TTSCache
+
+    monkeypatch.setattr(main, "tts_cache", TTSCache(str(tmp_path / "tts")))
+    monkeypatch.setattr(main, "tts_variants", TTSCache(str(tmp_path / "tts" / "variants"), suffix=".audio"))
+    monkeypatch.setattr(main, "audio_store", AudioStore())
+    monkeypatch.setattr(main.transcoder, "binary", None)  # only what is already on disk can be served
+    main.tts_cache.save(AUDIO_ID, b"ID3" + b"x" * 100)
+    return main
+
+
+def test_cached_variant_is_read_into_memory(app_module):
+    from starlette.testclient import TestClient
+
+    variant = app_module.VARIANTS["opus-24"]
+    key = app_module.variant_key(AUDIO_ID, variant)
+    app_module.tts_variants.save(key, b"OggS-cached")
+
+    response = TestClient(app_module.app).get(f"/audio/{AUDIO_ID}", params={"format": "opus"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/ogg"
+    assert response.content == b"OggS-cached"
+    # Served from the hot store from now on, even if the file goes away
+    os.remove(app_module.tts_variants.path(key))
+    assert TestClient(app_module.app).get(f"/audio/{AUDIO_ID}", params={"format": "opus"}).content == b"OggS-cached"
+
+
+def test_evicted_variant_is_a_miss(app_module):
+    from starlette.testclient import TestClient
+
+    key = app_module.variant_key(AUDIO_ID, app_module.VARIANTS["opus-24"])
+    app_module.tts_variants.save(key, b"OggS-cached")
+    os.remove(app_module.tts_variants.path(key))  # evicted by another worker
+
+    response = TestClient(app_module.app).get(f"/audio/{AUDIO_ID}", params={"format": "opus"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.content.startswith(b"ID3")
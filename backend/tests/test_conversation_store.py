@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+import conversation_store
+from conversation_store import ConversationStore, MemoryConversationStore, SQLiteConversationStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(conversation_store, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryConversationStore(max_messages=3, ttl=60)
+    else:
+        store = SQLiteConversationStore(str(tmp_path / "conversations.db"), max_messages=3, ttl=60)
+    yield store
+    asyncio.run(store.close())
+
+
+def message(i: int) -> dict:
+    return {"role": "user", "content": f"message {i}"}
+
+
+def test_base_store_cannot_be_instantiated():
+    with pytest.raises(TypeError):
+        ConversationStore()
+
+
+def test_conversations_keep_only_the_newest_messages(store, clock):
+    async def scenario():
+        for i in range(5):
+            await store.append("a", message(i))
+        await store.append("b", message(9))
+        return await store.get("a"), await store.get("b"), await store.get("missing")
+
+    a, b, missing = asyncio.run(scenario())
+    assert a == [message(2), message(3), message(4)]
+    assert b == [message(9)]
+    assert missing is None
+
+
+def test_idle_conversations_expire_and_reads_extend_them(store, clock):
+    async def scenario():
+        await store.append("a", message(1))
+        await store.append("b", message(2))
+        clock.now += 45
+        assert await store.get("a") == [message(1)]
+        clock.now += 45
+        return await store.get("a"), await store.get("b")
+
+    a, b = asyncio.run(scenario())
+    assert a == [message(1)]
+    assert b is None
+
+
+def test_delete_and_clear(store, clock):
+    async def scenario():
+        await store.append("a", message(1))
+        await store.append("b", message(2))
+        deleted = await store.delete("a"), await store.delete("a")
+        remaining = await store.get("a"), await store.get("b")
+        await store.clear()
+        return deleted, remaining, await store.get("b")
+
+    deleted, remaining, cleared = asyncio.run(scenario())
+    assert deleted == (True, False)
+    assert remaining == (None, [message(2)])
+    assert cleared is None
+    assert store.stats()["conversations"] == 0
+
+
+def test_memory_store_evicts_least_recently_used_over_budget(clock):
+    store = MemoryConversationStore(max_messages=10, ttl=0, max_bytes=400)
+
+    async def scenario():
+        for conv_id in ("a", "b", "c"):
+            await store.append(conv_id, message(1))
+        await store.get("a")
+        await store.append("d", {"role": "user", "content": "x" * 150})
+        return [await store.get(conv_id) is not None for conv_id in ("a", "b", "c", "d")]
+
+    assert asyncio.run(scenario()) == [True, False, True, True]
+    assert store.evictions == 1
+    assert store.total_bytes <= 400
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+
+class Message:
+    def __init__(self, content: str):
+        self.content = content
+        self.usage_metadata = None
+
+
+class CountingChain:
+    def __init__(self):
+        self.calls = 0
+
+    def stats(self) -> dict:
+        return {}
+
+    async def ainvoke(self, inputs, *args, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.001)
+        return Message(f"• Apply at the nearest office ({self.calls})")
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    main = pytest.importorskip("main")
+    monkeypatch.setattr(main, "FAQ_BUNDLE_PATH", str(tmp_path / "faq.bin"))
+    monkeypatch.setattr(main, "faq_bundle", None)
+    monkeypatch.setattr(main.fast_path, "bundle", None)
+    monkeypatch.setattr(main, "chain", CountingChain())
+    yield main
+    if main.faq_bundle is not None:
+        main.faq_bundle.close()
+
+
+def test_concurrent_startup_builds_generate_the_bundle_once(app_module):
+    async def workers():
+        return await asyncio.gather(*[app_module.pregenerate_faqs(with_audio=False) for _ in range(3)])
+
+    reports = asyncio.run(workers())
+    answers = reports[0]["answers"]
+
+    assert app_module.chain.calls == answers
+    assert sum(1 for report in reports if report["regenerated"]) == 1
+    assert all(report["version"] == reports[0]["version"] for report in reports)
+    assert app_module.faq_bundle.covers(app_module.scheme_catalog, with_audio=False)
+    assert not app_module.faq_bundle.covers(app_module.scheme_catalog, with_audio=True)
+
+
+def test_force_rebuilds_a_fresh_bundle(app_module):
+    asyncio.run(app_module.pregenerate_faqs(with_audio=False))
+    first = app_module.chain.calls
+    report = asyncio.run(app_module.pregenerate_faqs(force=True, with_audio=False))
+
+    assert app_module.chain.calls == 2 * first
+    assert len(report["regenerated"]) == len(app_module.scheme_catalog)
+
+
+def test_rebuild_reuses_the_bundle_on_disk_not_the_one_in_memory(app_module, monkeypatch):
+    asyncio.run(app_module.pregenerate_faqs(with_audio=False))
+    first = app_module.chain.calls
+    # This worker still serves nothing while another one already wrote the bundle
+    app_module.faq_bundle.close()
+    monkeypatch.setattr(app_module, "faq_bundle", None)
+    changed = app_module.scheme_catalog.schemes[0]
+    monkeypatch.setattr(changed, "description", changed.description + " (revised)")
+
+    report = asyncio.run(app_module.pregenerate_faqs(with_audio=False))
+
+    assert report["regenerated"] == [changed.id]
+    assert len(report["reused"]) == len(app_module.scheme_catalog) - 1
+    assert app_module.chain.calls - first < first
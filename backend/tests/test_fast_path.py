@@ -0,0 +1,31 @@
+import pytest
+
+from fast_path import FastPathMatcher
+
+
+@pytest.fixture(scope="module")
+def matcher(catalog):
+    return FastPathMatcher(catalog)
+
+
+@pytest.mark.parametrize("question, intents", [
+    ("What is the eligibility for Lek Ladki Yojana?", ["eligibility"]),
+    ("How do I apply for lek ladki", ["apply"]),
+    ("Tell me about Lek Ladki scheme", ["overview"]),
+    ("lek ladki yojana ke liye patrata kya hai", ["eligibility"]),
+])
+def test_plain_field_questions_use_fast_path(matcher, question, intents):
+    matched = matcher.match(question)
+    assert matched is not None
+    scheme, found = matched
+    assert "lek" in scheme.name.lower() and found == intents
+
+
+@pytest.mark.parametrize("question", [
+    "Is Lek Ladki discontinued?",
+    "lek ladki yojana band hai kya",
+    "Lek Ladki eligibility for boys",
+    "can my son apply for lek ladki",
+])
+def test_unexplained_qualifier_goes_to_llm(matcher, question):
+    assert matcher.match(question) is None
@@ -0,0 +1,64 @@
+import asyncio
+import os
+
+import pytest
+
+from http_middleware import OpenCORSMiddleware
+
+os.environ.setdefault("WARMUP", "0")
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def request(app, method: str, path: str, headers: list) -> dict:
+    scope = {
+        "type": "http", "method": method, "path": path, "headers": headers,
+        "query_string": b"", "root_path": "", "scheme": "http", "server": ("test", 80), "client": ("test", 1),
+        "http_version": "1.1", "asgi": {"version": "3.0"}
+    }
+    start = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            start.update(status=message["status"], headers=dict(message["headers"]))
+
+    asyncio.run(app(scope, receive, send))
+    return start
+
+
+def test_credentialed_preflight_names_what_it_allows():
+    app = OpenCORSMiddleware(ok_app, allow_credentials=True)
+    response = request(app, "OPTIONS", "/chat", [
+        (b"origin", b"https://app.example"),
+        (b"access-control-request-method", b"POST"),
+        (b"access-control-request-headers", b"content-type, x-session-id"),
+    ])
+
+    headers = response["headers"]
+    assert headers[b"access-control-allow-origin"] == b"https://app.example"
+    assert headers[b"access-control-allow-credentials"] == b"true"
+    assert headers[b"access-control-allow-methods"] == b"POST"
+    assert headers[b"access-control-allow-headers"] == b"content-type, x-session-id"
+    assert b"*" not in headers.values()
+
+    open_app = OpenCORSMiddleware(ok_app, allow_credentials=False)
+    headers = request(open_app, "OPTIONS", "/chat", [(b"origin", b"https://app.example")])["headers"]
+    assert headers[b"access-control-allow-origin"] == b"*"
+    assert headers[b"access-control-allow-methods"] == b"*"
+
+
+def test_oversized_upload_rejection_carries_cors_headers():
+    main = pytest.importorskip("main")
+
+    response = request(main.app, "POST", "/chat/voice", [
+        (b"origin", b"https://app.example"),
+        (b"content-length", str(main.VOICE_MAX_BYTES * 2).encode()),
+    ])
+    assert response["status"] == 413
+    assert response["headers"][b"access-control-allow-origin"] == b"https://app.example"
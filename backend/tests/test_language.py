@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+import language
+
+os.environ.setdefault("WARMUP", "0")
+
+
+def test_detection_and_transliteration_gate_share_one_scoring_pass(monkeypatch):
+    main = pytest.importorskip("main")
+    calls = []
+    scores = language.language_scores
+    monkeypatch.setattr(language, "language_scores", lambda text: calls.append(text) or scores(text))
+    monkeypatch.setattr(main, "transliterate_if_roman", lambda text: "देवनागरी")
+    language.analyze_language.cache_clear()
+
+    text = "mujhe kisan yojana ke baare mein batao"
+    assert main.preprocess_message(text) == ("hi", "देवनागरी")
+    assert main.preprocess_message(text, preferred_lang="mr") == ("mr", "देवनागरी")
+    english = "How do I apply for the farmer pension?"
+    assert main.preprocess_message(english) == ("en", english)
+    assert len(calls) == 2
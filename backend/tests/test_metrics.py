@@ -0,0 +1,55 @@
+import asyncio
+
+from metrics import MetricsMiddleware, RequestProfiler
+
+
+class ClientGone(Exception):
+    pass
+
+
+async def streaming_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"data: 1\n\n", "more_body": True})
+    await send({"type": "http.response.body", "body": b"data: 2\n\n", "more_body": True})
+
+
+def request(app, headers: list, fail_after: int = None) -> int:
+    scope = {"type": "http", "method": "GET", "path": "/chat/stream", "headers": headers}
+    sent = 0
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal sent
+        if fail_after is not None and sent >= fail_after:
+            raise ClientGone()
+        sent += 1
+
+    try:
+        asyncio.run(app(scope, receive, send))
+    except ClientGone:
+        pass
+    return sent
+
+
+def test_profile_header_needs_a_configured_token(tmp_path):
+    open_profiler = RequestProfiler(str(tmp_path))
+    assert not open_profiler.wants("anything")
+
+    profiler = RequestProfiler(str(tmp_path), token="sekret")
+    assert not profiler.wants("guess")
+    assert profiler.wants("sekret")
+    assert not RequestProfiler(None, token="sekret").wants("sekret")
+
+
+def test_profiler_is_released_when_the_client_disconnects(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), token="sekret")
+    app = MetricsMiddleware(streaming_app, profiler=profiler)
+
+    assert request(app, [(b"x-profile", b"sekret")], fail_after=2) == 2
+    assert not profiler.active
+    assert profiler.dumps == 1
+
+    assert request(app, [(b"x-profile", b"sekret")]) == 3
+    assert profiler.dumps == 2
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+import shared_state
+from shared_state import FAILED, PENDING, READY, SharedState, SQLiteSharedState, create_shared_state
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(shared_state, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "shared.db")
+
+
+def test_none_backend_keeps_nothing(monkeypatch):
+    monkeypatch.delenv("SHARED_STATE_BACKEND", raising=False)
+    state = create_shared_state()
+    assert type(state) is SharedState and not state.enabled
+
+    async def scenario():
+        await state.put_audio("a", b"ID3")
+        await state.open_stream("s")
+        await state.add_segment("s", 0, "a")
+        return await state.get_audio("a"), await state.get_stream("s")
+
+    assert asyncio.run(scenario()) == (None, None)
+
+
+def test_sqlite_audio_lifecycle_and_expiry(db_path, clock):
+    state = SQLiteSharedState(db_path, ttl=300, pending_ttl=60)
+
+    async def scenario():
+        await state.mark_pending("a")
+        pending = await state.get_audio("a")
+        await state.put_audio("a", b"ID3 audio")
+        await state.mark_pending("a")  # a late marker never hides finished audio
+        await state.mark_failed("a")
+        ready = await state.get_audio("a")
+
+        await state.mark_pending("b")
+        clock.now += 61
+        stale = await state.get_audio("b")
+        still_ready = await state.get_audio("a")
+        clock.now += 300
+        expired = await state.get_audio("a")
+        await state.mark_failed("c")
+        failed = await state.get_audio("c")
+        return pending, ready, stale, still_ready, expired, failed
+
+    pending, ready, stale, still_ready, expired, failed = asyncio.run(scenario())
+    assert (pending.status, pending.data) == (PENDING, None)
+    assert (ready.status, ready.data) == (READY, b"ID3 audio")
+    assert stale is None
+    assert still_ready.status == READY
+    assert expired is None
+    assert failed.status == FAILED
+    asyncio.run(state.close())
+
+
+def test_sqlite_streams_are_contiguous_until_closed(db_path, clock):
+    state = SQLiteSharedState(db_path, ttl=300, pending_ttl=60)
+
+    async def scenario():
+        await state.open_stream("s")
+        await state.add_segment("s", 0, "a0")
+        await state.add_segment("s", 2, "a2")
+        partial = await state.get_stream("s")
+        await state.add_segment("s", 1, "a1")
+        await state.close_stream("s", 3)
+        return partial, await state.get_stream("s"), await state.get_stream("missing")
+
+    partial, closed, missing = asyncio.run(scenario())
+    assert (partial.audio_ids, partial.total) == (["a0"], None)
+    assert (closed.audio_ids, closed.total) == (["a0", "a1", "a2"], 3)
+    assert missing is None
+    asyncio.run(state.close())
+
+
+def test_sqlite_workers_share_concurrent_writes(db_path, clock):
+    # Two connections to one file stand in for two worker processes
+    workers = [SQLiteSharedState(db_path), SQLiteSharedState(db_path)]
+
+    async def scenario():
+        await workers[0].open_stream("s")
+        await asyncio.gather(*(
+            workers[i % 2].add_segment("s", i, f"a{i}") for i in range(200)
+        ), *(
+            workers[i % 2].put_audio(f"a{i}", b"%d" % i) for i in range(200)
+        ))
+        return await workers[1].get_stream("s"), await workers[0].get_audio("a199")
+
+    manifest, audio = asyncio.run(scenario())
+    assert manifest.audio_ids == [f"a{i}" for i in range(200)]
+    assert audio.data == b"199"
+    # Every write is counted once despite running on worker threads; eviction ran along the way
+    assert workers[0].writes + workers[1].writes == 401
+    for worker in workers:
+        asyncio.run(worker.close())
+
+
+def test_sqlite_eviction_drops_expired_rows(db_path, clock):
+    state = SQLiteSharedState(db_path, ttl=10, pending_ttl=10)
+
+    async def scenario():
+        await state.open_stream("old")
+        await state.add_segment("old", 0, "x")
+        for i in range(97):
+            await state.put_audio(f"old{i}", b"x")
+        clock.now += 11
+        await state.put_audio("fresh", b"y")  # 100th write triggers eviction
+
+    asyncio.run(scenario())
+    stats = state.stats()
+    assert stats["audio_entries"] == 1 and stats["streams"] == 0
+    asyncio.run(state.close())
@@ -0,0 +1,44 @@
+import asyncio
+
+from speech_pipeline import AudioStream
+
+
+async def synthesize(gate: asyncio.Event, data: bytes) -> bytes:
+    await gate.wait()
+    return data
+
+
+async def collect(stream: AudioStream) -> bytes:
+    return b"".join([data async for data in stream.iter_bytes()])
+
+
+def test_disconnected_listener_does_not_cancel_shared_synthesis():
+    async def scenario():
+        gate = asyncio.Event()
+        stream = AudioStream("s")
+        segment = asyncio.create_task(synthesize(gate, b"ID3 one"))
+        stream.add(segment)
+        stream.close()
+
+        gone = asyncio.create_task(collect(stream))
+        await asyncio.sleep(0)
+        gone.cancel()
+        await asyncio.gather(gone, return_exceptions=True)
+
+        assert gone.cancelled() and not segment.done()
+        gate.set()
+        return await collect(stream)
+
+    assert asyncio.run(scenario()) == b"ID3 one"
+
+
+def test_cancelled_stream_ends_instead_of_raising():
+    async def scenario():
+        stream = AudioStream("s")
+        stream.add(asyncio.create_task(synthesize(asyncio.Event(), b"never")))
+        listener = asyncio.create_task(collect(stream))
+        await asyncio.sleep(0)
+        stream.cancel()
+        return await listener
+
+    assert asyncio.run(scenario()) == b""
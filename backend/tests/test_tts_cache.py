@@ -0,0 +1,36 @@
+import os
+
+from tts_cache import TTSCache
+
+
+def test_directory_is_created_on_first_write(tmp_path):
+    directory = tmp_path / "cache"
+    cache = TTSCache(str(directory))
+    assert not directory.exists()
+    assert cache.load("a") is None and cache.size("a") is None
+    cache.save("a", b"x" * 10)
+    assert cache.load("a") == b"x" * 10 and cache.size("a") == 10
+
+
+def test_file_evicted_by_another_worker_is_a_miss(tmp_path):
+    ours, theirs = TTSCache(str(tmp_path)), TTSCache(str(tmp_path))
+    ours.save("a", b"x" * 10)
+    os.remove(theirs.path("a"))
+    assert ours.size("a") is None
+    assert ours.load("a") is None
+    assert ours.stats()["files"] == 0
+
+
+def test_budget_covers_files_written_by_other_workers(tmp_path):
+    first = TTSCache(str(tmp_path), max_bytes=100)
+    second = TTSCache(str(tmp_path), max_bytes=100)
+    for i in range(4):
+        first.save(f"first{i}", b"x" * 20)
+        os.utime(first.path(f"first{i}"), (i, i))
+    for i in range(3):
+        second.save(f"second{i}", b"y" * 20)
+
+    on_disk = sum(os.path.getsize(os.path.join(tmp_path, name)) for name in os.listdir(tmp_path))
+    assert on_disk <= 100
+    assert not os.path.exists(first.path("first0"))
+    assert os.path.exists(second.path("second2"))
@@ -0,0 +1,244 @@
+"""Circuit breaker, retry and hedging behaviour of ResilientChain.
+
+Most tests drive scripted fake models; the last ones go through ChatGroq
+against benchmarks/fake_groq.py served in-process.
+"""
+import asyncio
+from time import sleep
+
+import httpx
+import pytest
+from langchain_core.prompts import ChatPromptTemplate
+
+from upstream import CircuitBreaker, LatencyWindow, ModelRoute, RateLimiter, ResilientChain, UpstreamUnavailable
+
+
+class Retryable(asyncio.TimeoutError):
+    pass
+
+
+class FakeModel:
+    """Plays back a script of results: a string answers, an exception is raised, a float sleeps first"""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+
+    async def _next(self):
+        self.calls += 1
+        step = self.script.pop(0) if len(self.script) > 1 else self.script[0]
+        if isinstance(step, tuple):
+            delay, step = step
+            await asyncio.sleep(delay)
+        if isinstance(step, BaseException):
+            raise step
+        return step
+
+    async def ainvoke(self, prompt_value):
+        return await self._next()
+
+    async def astream(self, prompt_value):
+        result = await self._next()
+        for word in result.split(" "):
+            yield word
+
+
+PROMPT = ChatPromptTemplate.from_messages([("human", "{question}")])
+
+
+def route(model, failures: int = 2, reset: float = 0.05) -> ModelRoute:
+    return ModelRoute("fake", model, RateLimiter(6000, 10_000_000), CircuitBreaker(failures, reset), LatencyWindow())
+
+
+def chain(primary: ModelRoute, **kwargs) -> ResilientChain:
+    kwargs.setdefault("backoff_base", 0.001)
+    kwargs.setdefault("hedge_after", None)
+    return ResilientChain(PROMPT, primary, **kwargs)
+
+
+def ask(c: ResilientChain):
+    return asyncio.run(c.ainvoke({"question": "hi"}))
+
+
+# ---------------- BREAKER ----------------
+def test_breaker_opens_after_threshold_and_probes_after_timeout():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    sleep(0.06)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # one probe at a time
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.trips == 2
+
+
+def test_unsettled_probe_is_released():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    sleep(0.06)
+    assert breaker.allow()
+    breaker.record(None)
+    assert breaker.allow()
+
+
+# ---------------- RETRIES ----------------
+def test_retryable_errors_are_retried():
+    model = FakeModel(Retryable(), Retryable(), "ok")
+    c = chain(route(model, failures=5), max_retries=2)
+    assert ask(c) == "ok"
+    assert model.calls == 3 and c.retries == 2
+
+
+def test_non_retryable_error_is_raised_once():
+    model = FakeModel(ValueError("bad request"))
+    c = chain(route(model), max_retries=2)
+    with pytest.raises(ValueError):
+        ask(c)
+    assert model.calls == 1 and c.retries == 0
+
+
+def test_breaker_opens_then_recovers_through_probe():
+    model = FakeModel(Retryable(), Retryable(), "ok")
+    r = route(model, failures=2)
+    c = chain(r, max_retries=1)
+    with pytest.raises(Retryable):
+        ask(c)
+    assert r.breaker.state == "open"
+    with pytest.raises(UpstreamUnavailable):
+        ask(c)
+
+    sleep(0.06)
+    assert ask(c) == "ok"
+    assert r.breaker.state == "closed"
+
+
+def test_non_retryable_probe_failure_does_not_wedge_breaker():
+    model = FakeModel(Retryable(), ValueError("bad request"), "ok")
+    r = route(model, failures=1)
+    c = chain(r, max_retries=0)
+    with pytest.raises(Retryable):
+        ask(c)
+    sleep(0.06)
+    with pytest.raises(ValueError):
+        ask(c)  # the probe reached the upstream, which answered
+    assert not r.breaker.probing
+    assert ask(c) == "ok"
+
+
+def test_cancelled_probe_is_released():
+    model = FakeModel(Retryable(), (1.0, "late"), "ok")
+    r = route(model, failures=1)
+    c = chain(r, max_retries=0)
+    with pytest.raises(Retryable):
+        ask(c)
+    sleep(0.06)
+
+    async def cancelled():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(c.ainvoke({"question": "hi"}), timeout=0.05)
+
+    asyncio.run(cancelled())
+    assert not r.breaker.probing
+    assert ask(c) == "ok"
+
+
+def test_stream_retries_before_first_chunk_only():
+    model = FakeModel(Retryable(), "hello there")
+    c = chain(route(model, failures=5), max_retries=1)
+
+    async def collect():
+        return [chunk async for chunk in c.astream({"question": "hi"})]
+
+    assert asyncio.run(collect()) == ["hello", "there"]
+    assert c.retries == 1
+
+
+# ---------------- HEDGING ----------------
+def test_slow_call_is_hedged_and_second_request_wins():
+    model = FakeModel((0.5, "slow"), (0.01, "fast"))
+    c = chain(route(model), hedge_after=0.05)
+    assert ask(c) == "fast"
+    assert c.hedges == 1 and c.hedge_wins == 1
+
+
+def test_fast_call_is_not_hedged():
+    model = FakeModel((0.01, "fast"))
+    c = chain(route(model), hedge_after=0.2)
+    assert ask(c) == "fast"
+    assert c.hedges == 0 and model.calls == 1
+
+
+def test_cancelling_before_hedge_cancels_primary():
+    model = FakeModel((0.5, "slow"))
+    c = chain(route(model), hedge_after=0.3)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(c.ainvoke({"question": "hi"}), timeout=0.05)
+        await asyncio.sleep(0)
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    assert asyncio.run(run()) == []
+
+
+# ---------------- FAKE GROQ ----------------
+@pytest.fixture
+def fake_groq():
+    import fake_groq
+
+    saved = vars(fake_groq.config).copy()
+    fake_groq.config.latency = 0.0
+    fake_groq.config.jitter = 0.0
+    fake_groq.config.chunk_delay = 0.0
+    yield fake_groq
+    vars(fake_groq.config).update(saved)
+
+
+def groq_route(fake_groq, failures: int = 2) -> ModelRoute:
+    from langchain_groq import ChatGroq
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_groq.app))
+    model = ChatGroq(
+        model="llama-3.3-70b-versatile", api_key="fake", max_retries=0,
+        base_url="http://fake-groq", http_async_client=client
+    )
+    return route(model, failures=failures)
+
+
+def test_fake_groq_invoke_and_stream(fake_groq):
+    c = chain(groq_route(fake_groq))
+    assert ask(c).content == fake_groq.REPLY
+
+    async def collect():
+        return "".join([chunk.content async for chunk in c.astream({"question": "hi"})])
+
+    assert asyncio.run(collect()) == fake_groq.REPLY
+
+
+def test_fake_groq_errors_open_breaker(fake_groq):
+    fake_groq.config.error_rate = 1.0
+    r = groq_route(fake_groq, failures=2)
+    c = chain(r, max_retries=1)
+    with pytest.raises(Exception):
+        ask(c)
+    assert r.breaker.state == "open"
+    with pytest.raises(UpstreamUnavailable):
+        ask(c)
+
+    fake_groq.config.error_rate = 0.0
+    sleep(0.06)
+    assert ask(c).content == fake_groq.REPLY
+    assert r.breaker.state == "closed"
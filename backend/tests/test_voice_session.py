@@ -0,0 +1,167 @@
+import asyncio
+import json
+import math
+import os
+import struct
+
+import pytest
+
+os.environ.setdefault("WARMUP", "0")
+
+from voice_activity import EnergyVAD  # noqa: E402
+
+RATE = 16000
+
+
+def tone(seconds: float, amplitude: int = 3000) -> bytes:
+    return b"".join(
+        struct.pack("<h", int(amplitude * math.sin(2 * math.pi * 220 * i / RATE))) for i in range(int(seconds * RATE))
+    )
+
+
+def silence(seconds: float, amplitude: int = 20) -> bytes:
+    return b"".join(struct.pack("<h", amplitude if i % 2 else -amplitude) for i in range(int(seconds * RATE)))
+
+
+def feed(vad: EnergyVAD, audio: bytes, chunk: int = 640) -> list:
+    events = []
+    for i in range(0, len(audio), chunk):
+        events.extend(vad.feed(audio[i:i + chunk]))
+    return events
+
+
+# ---------------- VAD ----------------
+def test_vad_cuts_utterances_at_silence():
+    vad = EnergyVAD(RATE, hangover_ms=600)
+    events = feed(vad, silence(0.5) + tone(1.0) + silence(1.0) + tone(0.8) + silence(1.0))
+
+    assert [event for event, _ in events] == ["start", "end", "start", "end"]
+    first, second = events[1][1], events[3][1]
+    # Pre-roll is kept and the trailing hangover silence is trimmed
+    assert 1.0 <= len(first) / 2 / RATE <= 1.3
+    assert 0.8 <= len(second) / 2 / RATE <= 1.1
+    assert vad.utterances == 2 and not vad.in_speech
+
+
+def test_vad_drops_clicks_and_ignores_frame_boundaries():
+    vad = EnergyVAD(RATE)
+    events = feed(vad, silence(0.5) + tone(0.08) + silence(1.0), chunk=333)
+
+    assert events == [("start", None), ("end", None)]
+    assert vad.dropped == 1 and vad.utterances == 0
+
+
+def test_vad_flush_and_max_length():
+    vad = EnergyVAD(RATE, max_speech_ms=1000)
+    events = feed(vad, tone(1.5))
+    assert [event for event, _ in events] == ["start", "end", "start"]
+    assert all(len(pcm) / 2 / RATE <= 1.0 for event, pcm in events if event == "end")
+
+    assert vad.in_speech
+    assert vad.flush()
+    assert vad.flush() is None
+
+
+# ---------------- SESSION ----------------
+class Message:
+    def __init__(self, content: str):
+        self.content = content
+        self.usage_metadata = {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+
+
+class FakeChain:
+    reply = "Apply at the nearest office. Carry your ration card."
+
+    def stats(self) -> dict:
+        return {}
+
+    async def ainvoke(self, inputs, *args, **kwargs):
+        return Message(self.reply)
+
+    async def astream(self, inputs, *args, **kwargs):
+        for word in self.reply.split(" "):
+            await asyncio.sleep(0)
+            yield Message(word + " ")
+
+
+class FakeTranscriptions:
+    def __init__(self):
+        self.calls = []
+
+    async def create(self, file=None, **kwargs):
+        self.calls.append(len(file[1].read()))
+        return "How do I apply for the farmer pension?"
+
+
+class FakeGroq:
+    def __init__(self):
+        self.audio = type("Audio", (), {})()
+        self.audio.transcriptions = FakeTranscriptions()
+
+
+@pytest.fixture
+def voice(tmp_path, monkeypatch):
+    main = pytest.importorskip("main")
+    from starlette.testclient import TestClient
+    from tts_cache import TTSCache
+
+    groq = FakeGroq()
+    # Fake MP3s must never reach the real content-addressed cache
+    monkeypatch.setattr(main, "tts_cache", TTSCache(str(tmp_path / "tts")))
+    monkeypatch.setattr(main, "tts_variants", TTSCache(str(tmp_path / "tts" / "variants"), suffix=".audio"))
+    monkeypatch.setattr(main, "chain", FakeChain())
+    monkeypatch.setattr(main, "groq_async_client", groq)
+    monkeypatch.setattr(main, "synthesize_speech", lambda text, lang: b"ID3" + text.encode()[:16])
+    return main, TestClient(main.app), groq.audio.transcriptions
+
+
+def read_until_closed(ws) -> list:
+    received = []
+    while True:
+        message = ws.receive()
+        if message["type"] == "websocket.close":
+            return received
+        if message.get("bytes") is not None:
+            received.append(("bytes", None))
+        else:
+            event = json.loads(message["text"])
+            received.append((event["type"], event.get("turn")))
+
+
+def test_session_answers_spoken_and_typed_turns_in_order(voice):
+    main, client, transcriptions = voice
+    audio = silence(0.5) + tone(1.0) + silence(1.0) + tone(0.8)
+
+    with client.websocket_connect("/ws/voice?sample_rate=16000") as ws:
+        assert ws.receive_json()["type"] == "session"
+        for i in range(0, len(audio), 640):
+            ws.send_bytes(audio[i:i + 640])
+        ws.send_text(json.dumps({"type": "end"}))  # push-to-talk release of the second utterance
+        ws.send_text(json.dumps({"type": "text", "text": "What documents are needed?"}))
+        ws.send_text(json.dumps({"type": "close"}))
+        events = read_until_closed(ws)
+
+    assert len(transcriptions.calls) == 2
+    assert [turn for event, turn in events if event == "transcript"] == [1, 2]
+    assert [turn for event, turn in events if event == "done"] == [1, 2, 3]
+    assert [turn for event, turn in events if event == "audio_end"] == [1, 2, 3]
+    assert ("bytes", None) in events
+    assert events.count(("vad", None)) == 4
+
+
+def test_session_close_does_not_wait_for_a_dead_turn_runner(voice, monkeypatch):
+    main, client, _ = voice
+
+    async def crashed(self):
+        await self.turns.get()
+        raise RuntimeError("turn runner crashed")
+
+    monkeypatch.setattr(main.VoiceSession, "run_turns", crashed)
+    with client.websocket_connect("/ws/voice?sample_rate=16000") as ws:
+        assert ws.receive_json()["type"] == "session"
+        for text in ("first question", "second question"):
+            ws.send_text(json.dumps({"type": "text", "text": text}))
+        ws.send_text(json.dumps({"type": "close"}))
+        message = ws.receive()
+
+    assert message == {"type": "websocket.close", "code": 1011, "reason": ""}
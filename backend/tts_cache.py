@@ -0,0 +1,150 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def tts_cache_key(sanitized_text: str, lang: str) -> str:
+    """Content address for synthesized speech: same sanitized text + language -> same audio"""
+    return hashlib.sha256(f"{lang}\0{sanitized_text}".encode("utf-8")).hexdigest()[:32]
+
+
+class TTSCache:
+    """Persistent, content-addressed tier of synthesized MP3s.
+
+    Files are named after tts_cache_key() so they survive restarts and can be
+    shared by workers pointing at the same directory. The tier is bounded by
+    max_bytes, evicting the oldest files first. Other workers add and evict
+    files too, so the index is rebuilt from the directory every
+    `rescan_interval` seconds and before evicting, which keeps the cap on
+    the directory rather than on this process's writes. The directory is
+    created on first write. save() blocks on disk I/O; call it off the event loop.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str],
+        max_bytes: int = 1024 * 1024 * 1024,
+        suffix: str = ".mp3",
+        rescan_interval: float = 60.0
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.rescan_interval = rescan_interval
+        self.total_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._files: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+        self._scanned_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def has(self, key: str) -> bool:
+        return self.enabled and (key in self._files or os.path.exists(self.path(key)))
+
+    def size(self, key: str) -> Optional[int]:
+        """Size of a cached file, or None if it is gone (possibly evicted by another worker)"""
+        if not self.enabled:
+            return None
+        try:
+            return os.path.getsize(self.path(key))
+        except OSError:
+            with self._lock:
+                self._forget(key)
+            return None
+
+    def load(self, key: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        try:
+            with open(self.path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(key)
+            return None
+
+    def save(self, key: str, data: bytes):
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+        with self._lock:
+            try:
+                self._refresh()
+                tmp_path = f"{self.path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path(key))
+            except OSError as e:
+                logger.error(f"TTS cache write failed for {key}: {e}")
+                return
+
+            self._forget(key)
+            self._files[key] = len(data)
+            self.total_bytes += len(data)
+            if self.total_bytes > self.max_bytes:
+                # Count what every worker has written before deciding what to evict
+                self._scan()
+            while self.total_bytes > self.max_bytes and self._files:
+                oldest = next(iter(self._files))
+                self._forget(oldest)
+                try:
+                    os.remove(self.path(oldest))
+                except OSError:
+                    pass
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "directory": self.directory,
+            "files": len(self._files),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions
+        }
+
+    def _forget(self, key: str):
+        size = self._files.pop(key, None)
+        if size is not None:
+            self.total_bytes -= size
+
+    def _refresh(self):
+        if self._scanned_at is None:
+            os.makedirs(self.directory, exist_ok=True)
+        if self._scanned_at is None or monotonic() - self._scanned_at >= self.rescan_interval:
+            self._scan()
+
+    def _scan(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.suffix):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, name[:-len(self.suffix)], st.st_size))
+        self._files.clear()
+        self.total_bytes = 0
+        for _, key, size in sorted(entries):
+            self._files[key] = size
+            self.total_bytes += size
+        self._scanned_at = monotonic()
@@ -0,0 +1,398 @@
+import asyncio
+import logging
+import random
+from collections import deque
+from time import monotonic
+from typing import Optional
+
+from context_builder import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailable(Exception):
+    """No model route can take the call right now; retry after `retry_after` seconds"""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, timeouts, connection drops and 5xx are worth another attempt"""
+    from groq import APIConnectionError, APIStatusError, APITimeoutError
+
+    if isinstance(error, (APITimeoutError, APIConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------------- RATE LIMITING ----------------
+class TokenBucket:
+    """Refills `rate` units per second up to `capacity`; a rate of 0 means unlimited"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+
+    def _refill(self):
+        now = monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        return max(amount - self.tokens, 0.0) / self.rate
+
+    def take(self, amount: float):
+        if self.rate > 0:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets matching a Groq model quota"""
+
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm / 60.0, rpm)
+        self.tokens = TokenBucket(tpm / 60.0, tpm)
+        self.throttled = 0
+
+    def wait_time(self, tokens: int) -> float:
+        return max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    def try_acquire(self, tokens: int) -> bool:
+        if self.wait_time(tokens) > 0:
+            return False
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        return True
+
+    async def acquire(self, tokens: int):
+        # Reserve immediately, then sleep off the debt, so waiters are served in arrival order
+        wait = self.wait_time(tokens)
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        if wait > 0:
+            self.throttled += 1
+            await asyncio.sleep(wait)
+
+
+# ---------------- HEALTH TRACKING ----------------
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures; lets one probe through after `reset_timeout`"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(self.reset_timeout - (monotonic() - self.opened_at), 0.0)
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self.probing:
+                self.trips += 1
+            self.opened_at = monotonic()
+            self.probing = False
+
+    def record(self, healthy: Optional[bool]):
+        """Settle an allowed call: True/False for the upstream's health, None if it ended without an answer.
+
+        Every call that passed allow() must end here so a half-open probe is
+        always released, whatever way the call exited.
+        """
+        if healthy is True:
+            self.record_success()
+        elif healthy is False:
+            self.record_failure()
+        else:
+            self.probing = False
+
+
+class LatencyWindow:
+    """Latencies of successful calls over the last `window` seconds"""
+
+    def __init__(self, window: float = 60.0, min_samples: int = 5):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = deque()  # (recorded_at, seconds)
+
+    def add(self, seconds: float):
+        self._samples.append((monotonic(), seconds))
+
+    def percentile(self, q: float) -> Optional[float]:
+        """The q-th percentile, or None until min_samples recent calls are recorded"""
+        cutoff = monotonic() - self.window
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        if len(self._samples) < self.min_samples:
+            return None
+        values = sorted(seconds for _, seconds in self._samples)
+        return values[min(int(q * len(values)), len(values) - 1)]
+
+
+# ---------------- ROUTES ----------------
+class ModelRoute:
+    """One Groq model with its own quota, breaker and latency history"""
+
+    def __init__(self, name: str, model, limiter: RateLimiter, breaker: CircuitBreaker, latency: LatencyWindow):
+        self.name = name
+        self.model = model
+        self.limiter = limiter
+        self.breaker = breaker
+        self.latency = latency
+        self.calls = 0
+        self.failures = 0
+
+    def stats(self) -> dict:
+        p95 = self.latency.percentile(0.95)
+        return {
+            "model": self.name,
+            "calls": self.calls,
+            "failures": self.failures,
+            "circuit": self.breaker.state,
+            "circuit_trips": self.breaker.trips,
+            "throttled": self.limiter.throttled,
+            "p95_seconds": round(p95, 3) if p95 is not None else None
+        }
+
+
+def estimate_prompt_tokens(prompt_value) -> int:
+    return sum(estimate_tokens(str(m.content)) + 4 for m in prompt_value.to_messages())
+
+
+class ResilientChain:
+    """prompt | model with retries, hedging, circuit breaking and fallback to a faster model.
+
+    Drop-in for the `prompt | llm` runnable: exposes ainvoke and astream.
+    """
+
+    def __init__(
+        self,
+        prompt,
+        primary: ModelRoute,
+        fallback: Optional[ModelRoute] = None,
+        max_retries: int = 2,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        hedge_after: Optional[float] = 2.0,
+        fallback_p95: float = 8.0,
+        max_throttle_wait: float = 2.0,
+        completion_reserve: int = 300
+    ):
+        self.prompt = prompt
+        self.primary = primary
+        self.fallback = fallback
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.fallback_p95 = fallback_p95
+        self.max_throttle_wait = max_throttle_wait
+        self.completion_reserve = completion_reserve
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+
+    # ---- routing ----
+    def _primary_degraded(self, tokens: int) -> bool:
+        p95 = self.primary.latency.percentile(0.95)
+        if p95 is not None and p95 > self.fallback_p95:
+            return True
+        return self.primary.limiter.wait_time(tokens) > self.max_throttle_wait
+
+    def choose_route(self, tokens: int) -> ModelRoute:
+        if self.fallback is not None and self._primary_degraded(tokens) and self.fallback.breaker.allow():
+            self.fallbacks += 1
+            return self.fallback
+        if self.primary.breaker.allow():
+            return self.primary
+        if self.fallback is not None and self.fallback.breaker.allow():
+            self.fallbacks += 1
+            return self.fallback
+
+        retry_after = self.primary.breaker.retry_after()
+        if self.fallback is not None:
+            retry_after = min(retry_after, self.fallback.breaker.retry_after())
+        raise UpstreamUnavailable("Assistant is temporarily unavailable, please try again", max(retry_after, 1.0))
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        # Full jitter; honour Retry-After from a 429 when Groq sends one
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        hinted = retry_after_seconds(error)
+        return max(delay, min(hinted, self.backoff_max)) if hinted is not None else delay
+
+    def _hedge_delay(self, route: ModelRoute) -> Optional[float]:
+        if self.hedge_after is None:
+            return None
+        p95 = route.latency.percentile(0.95)
+        return max(self.hedge_after, p95) if p95 is not None else self.hedge_after
+
+    async def _acquire_route(self, tokens: int) -> ModelRoute:
+        route = self.choose_route(tokens)
+        try:
+            await route.limiter.acquire(tokens)
+        except BaseException:
+            # Cancelled while throttled: give back a half-open probe slot taken by choose_route
+            route.breaker.record(None)
+            raise
+        return route
+
+    # ---- single attempts ----
+    async def _call(self, route: ModelRoute, prompt_value):
+        route.calls += 1
+        started = monotonic()
+        healthy = None  # unknown if cancelled before the upstream answered
+        try:
+            result = await route.model.ainvoke(prompt_value)
+            healthy = True
+            route.latency.add(monotonic() - started)
+            return result
+        except Exception as e:
+            route.failures += 1
+            # A non-retryable error (400, validation) still means the upstream answered
+            healthy = not is_retryable(e)
+            raise
+        finally:
+            route.breaker.record(healthy)
+
+    async def _hedged_call(self, route: ModelRoute, prompt_value, tokens: int):
+        """Send a second identical request if the first is slower than usual; first success wins"""
+        first = asyncio.ensure_future(self._call(route, prompt_value))
+        delay = self._hedge_delay(route)
+        if delay is None:
+            return await first
+
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+        except BaseException:
+            # asyncio.wait does not cancel what it waits on
+            first.cancel()
+            raise
+        if done or route.breaker.state != "closed" or not route.limiter.try_acquire(tokens):
+            return await first
+
+        self.hedges += 1
+        second = asyncio.ensure_future(self._call(route, prompt_value))
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    # ---- runnable interface ----
+    async def ainvoke(self, inputs: dict, config=None):
+        prompt_value = self.prompt.invoke(inputs)
+        tokens = estimate_prompt_tokens(prompt_value) + self.completion_reserve
+
+        for attempt in range(self.max_retries + 1):
+            route = await self._acquire_route(tokens)
+            try:
+                return await self._hedged_call(route, prompt_value, tokens)
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                logger.warning(f"Groq call on {route.name} failed ({e}); retrying")
+                await asyncio.sleep(self._backoff(attempt, e))
+
+    async def astream(self, inputs: dict, config=None):
+        """Stream from the chosen route; a failed attempt is retried only before the first chunk"""
+        prompt_value = self.prompt.invoke(inputs)
+        tokens = estimate_prompt_tokens(prompt_value) + self.completion_reserve
+
+        for attempt in range(self.max_retries + 1):
+            route = await self._acquire_route(tokens)
+            route.calls += 1
+            started = monotonic()
+            emitted = False
+            healthy = None  # unknown if the consumer stops or cancels mid-stream
+            try:
+                async for chunk in route.model.astream(prompt_value):
+                    if not emitted:
+                        # Time to first token is what a streaming user waits on
+                        route.latency.add(monotonic() - started)
+                        emitted = True
+                    yield chunk
+                healthy = True
+                return
+            except Exception as e:
+                route.failures += 1
+                retryable = is_retryable(e)
+                healthy = not retryable
+                if emitted or not retryable or attempt == self.max_retries:
+                    raise
+                error = e
+            finally:
+                route.breaker.record(healthy)
+            self.retries += 1
+            logger.warning(f"Groq stream on {route.name} failed ({error}); retrying")
+            await asyncio.sleep(self._backoff(attempt, error))
+
+    def stats(self) -> dict:
+        return {
+            "primary": self.primary.stats(),
+            "fallback": self.fallback.stats() if self.fallback is not None else None,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "fallbacks": self.fallbacks
+        }
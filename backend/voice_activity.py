@@ -0,0 +1,128 @@
+import io
+import math
+import wave
+from array import array
+from collections import deque
+from typing import List, Optional
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """Wrap 16-bit mono little-endian PCM in a WAV container for Whisper"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def frame_rms(frame: bytes) -> float:
+    samples = array("h")
+    samples.frombytes(frame)
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+class EnergyVAD:
+    """Cuts a live 16-bit mono PCM stream into utterances by frame energy.
+
+    Speech starts after `start_ms` of frames louder than the adaptive
+    threshold (a multiple of the tracked noise floor) and ends after
+    `hangover_ms` of quieter frames. `pre_roll_ms` of audio before the
+    onset is kept so the first syllable is not clipped; utterances shorter
+    than `min_speech_ms` are dropped as clicks and longer than
+    `max_speech_ms` are cut.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 20,
+        start_ms: int = 60,
+        hangover_ms: int = 600,
+        pre_roll_ms: int = 200,
+        min_speech_ms: int = 250,
+        max_speech_ms: int = 30000,
+        min_rms: float = 300.0,
+        noise_ratio: float = 3.0
+    ):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_bytes = sample_rate * frame_ms // 1000 * 2
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_speech_frames = max(1, max_speech_ms // frame_ms)
+        self.min_rms = min_rms
+        self.noise_ratio = noise_ratio
+        self.noise_floor = min_rms / noise_ratio
+        self.in_speech = False
+        self.utterances = 0
+        self.dropped = 0
+        self._pending = b""
+        self._pre_roll = deque(maxlen=max(1, pre_roll_ms // frame_ms))
+        self._speech = []  # frames of the current utterance
+        self._voiced = 0  # consecutive loud frames before onset
+        self._silent = 0  # consecutive quiet frames inside speech
+
+    @property
+    def threshold(self) -> float:
+        return max(self.min_rms, self.noise_floor * self.noise_ratio)
+
+    def feed(self, pcm: bytes) -> List[tuple]:
+        """Consume audio; returns ("start", None) and ("end", utterance_pcm) events in order"""
+        data = self._pending + pcm
+        usable = len(data) - len(data) % self.frame_bytes
+        self._pending = data[usable:]
+        events = []
+        for offset in range(0, usable, self.frame_bytes):
+            event = self._frame(data[offset:offset + self.frame_bytes])
+            if event is not None:
+                events.append(event)
+        return events
+
+    def flush(self) -> Optional[bytes]:
+        """End the current utterance now (client said it stopped talking); None if there is none"""
+        if not self.in_speech:
+            return None
+        return self._finish()[1]
+
+    def _frame(self, frame: bytes) -> Optional[tuple]:
+        rms = frame_rms(frame)
+        loud = rms >= self.threshold
+
+        if not self.in_speech:
+            self._pre_roll.append(frame)
+            if not loud:
+                self._voiced = 0
+                # Track background noise only while nobody is talking
+                self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+                return None
+            self._voiced += 1
+            if self._voiced < self.start_frames:
+                return None
+            self.in_speech = True
+            self._speech = list(self._pre_roll)
+            self._pre_roll.clear()
+            self._silent = 0
+            return ("start", None)
+
+        self._speech.append(frame)
+        self._silent = 0 if loud else self._silent + 1
+        if self._silent >= self.hangover_frames or len(self._speech) >= self.max_speech_frames:
+            return self._finish()
+        return None
+
+    def _finish(self) -> tuple:
+        frames = self._speech[:len(self._speech) - self._silent] if self._silent else self._speech
+        self.in_speech = False
+        self._speech = []
+        self._voiced = 0
+        self._silent = 0
+        if len(frames) < self.min_speech_frames:
+            self.dropped += 1
+            return ("end", None)
+        self.utterances += 1
+        return ("end", b"".join(frames))